@@ -3,3 +3,88 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.resolve()
 XHS_SERVER = "http://127.0.0.1:11901"
 LOCAL_CHROME_PATH = ""   # change me necessary！ for example C:/Program Files/Google/Chrome/Application/chrome.exe
+
+# 浏览器池：同时存在的浏览器进程上限、空闲多少秒后回收
+BROWSER_POOL_SIZE = 4
+BROWSER_IDLE_TIMEOUT = 300
+
+# 账号 cookie 校验：同时校验的账号数、结果缓存秒数
+COOKIE_CHECK_CONCURRENCY = 4
+COOKIE_CHECK_TTL = 600
+# 先用 HTTP 接口快速判断 cookie 是否有效，无法判断时才启动浏览器
+COOKIE_HTTP_PROBE = True
+
+# 素材预览 /getFile：浏览器缓存秒数（文件名带 uuid、内容不会变，可以缓存很久）；
+# 部署在 nginx / apache 后面时可开启 X-Sendfile，由前端服务器直接发送文件
+FILE_CACHE_MAX_AGE = 30 * 24 * 3600
+USE_X_SENDFILE = False
+
+# SQLite：等待写锁的秒数、每个连接缓存的预编译语句数
+DB_BUSY_TIMEOUT = 30
+DB_CACHED_STATEMENTS = 256
+
+# 素材 / 账号分页列表：总数缓存秒数、单页最大条数
+LISTING_COUNT_TTL = 30
+LISTING_MAX_LIMIT = 200
+
+# 素材入库时用 ffprobe 探测时长 / 分辨率 / 编码 / 码率 / 帧率（需安装 ffmpeg），在独立进程池里执行
+FFPROBE_PATH = "ffprobe"
+MEDIA_PROBE_WORKERS = 2
+MEDIA_PROBE_TIMEOUT = 60
+
+# 发布前按平台转码（需安装 ffmpeg，默认关闭）：平台 -> 转码档位（见 myUtils/transcode.py 的 TRANSCODE_PROFILES），
+# 素材已符合档位时直接用原文件；变体按 内容哈希 + 档位 缓存在 videoFile/variants，多个账号共用
+TRANSCODE_ENABLED = False
+FFMPEG_PATH = "ffmpeg"
+TRANSCODE_WORKERS = 1
+TRANSCODE_TIMEOUT = 3600
+PLATFORM_TRANSCODE_PROFILES = {
+    "douyin": "h264_1080p",
+    "tencent": "h264_1080p",
+    "kuaishou": "h264_1080p",
+    "xiaohongshu": "h264_1080p",
+}
+
+# 素材探测完成后生成封面、雪碧图和 360p 代理视频（需安装 ffmpeg），素材管理页预览用代理视频；
+# PREVIEW_AUTO_COVER 开启时，没有指定封面的发布任务自动使用生成的封面
+PREVIEWS_ENABLED = True
+PREVIEW_WORKERS = 1
+PREVIEW_TIMEOUT = 1800
+PREVIEW_AUTO_COVER = True
+
+# 磁盘清理：后台每 GC_INTERVAL 秒执行一次（0 关闭），中间临时文件 GC_GRACE_SECONDS 内不动；
+# videoFile 下没有素材记录的文件、未完成的分片上传、多久没用的转码变体、没有账号引用的 cookie 的保留时间；
+# videoFile 配额（MB，0 不限）和磁盘最少剩余空间（MB），超出时先淘汰转码变体，原素材不会被自动删除
+GC_INTERVAL = 3600
+GC_GRACE_SECONDS = 3600
+ORPHAN_RETENTION_DAYS = 7
+UPLOAD_SESSION_TTL = 7 * 24 * 3600
+VARIANT_RETENTION_DAYS = 14
+COOKIE_RETENTION_DAYS = 7
+DISK_QUOTA_MB = 0
+DISK_MIN_FREE_MB = 2048
+
+# 发布任务队列：worker 数量、单个任务最多执行次数、空闲轮询间隔（秒）
+# 上传有断点记录，重试会跳过已发布的视频并尽量从上次进度继续
+JOB_WORKERS = 4
+JOB_MAX_ATTEMPTS = 2
+JOB_POLL_INTERVAL = 2
+
+# 发布限速（令牌桶）：平台 -> (每分钟最多发布数, 可突发数)，以及单个账号的限速
+PUBLISH_RATE_LIMITS = {
+    "douyin": (6, 2),
+    "tencent": (6, 2),
+    "kuaishou": (6, 2),
+    "xiaohongshu": (4, 1),
+    "tiktok": (6, 2),
+    "bilibili": (4, 1),
+    "baijiahao": (4, 1),
+}
+ACCOUNT_RATE_LIMIT = (2, 1)
+# 每个平台同时执行的发布任务上限（一个素材分发到多个平台时各平台并行，互不占用名额）
+PLATFORM_CONCURRENCY = {
+    "douyin": 2,
+    "tencent": 1,
+    "kuaishou": 2,
+    "xiaohongshu": 1,
+}
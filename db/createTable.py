@@ -1,42 +1,13 @@
-import sqlite3
-import json
-import os
+import sys
+from pathlib import Path
 
-# 数据库文件路径（如果不存在会自动创建）
-db_file = './database.db'
+# 允许在 db 目录下直接运行：python createTable.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# 如果数据库已存在，则删除旧的表（可选）
-# if os.path.exists(db_file):
-#     os.remove(db_file)
+from utils.db import DB_PATH, migrate
 
-# 连接到SQLite数据库（如果文件不存在则会自动创建）
-conn = sqlite3.connect(db_file)
-cursor = conn.cursor()
-
-# 创建账号记录表
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS user_info (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    type INTEGER NOT NULL,
-    filePath TEXT NOT NULL,  -- 存储文件路径
-    userName TEXT NOT NULL,
-    status INTEGER DEFAULT 0
-)
-''')
-
-# 创建文件记录表
-cursor.execute('''CREATE TABLE IF NOT EXISTS file_records (
-    id INTEGER PRIMARY KEY AUTOINCREMENT, -- 唯一标识每条记录
-    filename TEXT NOT NULL,               -- 文件名
-    filesize REAL,                     -- 文件大小（单位：MB）
-    upload_time DATETIME DEFAULT CURRENT_TIMESTAMP, -- 上传时间，默认当前时间
-    file_path TEXT                        -- 文件路径
-)
-''')
-
-
-# 提交更改
-conn.commit()
-print("✅ 表创建成功")
-# 关闭连接
-conn.close()
\ No newline at end of file
+# 表结构和索引统一由 utils/db.py 的版本化迁移维护（后端启动时也会自动执行），
+# 这里只是手动建库 / 升级的入口。
+# 如果需要清空重建，先删除 db 目录下的 database.db 再运行本脚本。
+migrate()
+print(f"✅ 表创建成功：{DB_PATH}")
@@ -1,4 +1,3 @@
-import time
 from pathlib import Path
 
 from uploader.bilibili_uploader.main import read_cookie_json_file, extract_keys_from_json, random_emoji, BilibiliUploader
@@ -36,7 +35,6 @@ if __name__ == '__main__':
         # I set desc same as title, do what u like.
         desc = title
         bili_uploader = BilibiliUploader(cookie_data, file, title, desc, tid, tags, timestamps[index])
-        bili_uploader.upload()
-
         # life is beautiful don't so rush. be kind be patience
-        time.sleep(30)
+        # 发布间隔由 uploader 内部的限速器控制（见 conf.py 的 PUBLISH_RATE_LIMITS / ACCOUNT_RATE_LIMIT）
+        bili_uploader.upload()
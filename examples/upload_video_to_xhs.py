@@ -1,11 +1,12 @@
 import configparser
 from pathlib import Path
-from time import sleep
 
 from xhs import XhsClient
 
 from conf import BASE_DIR
+from utils.base_social_media import SOCIAL_MEDIA_XIAOHONGSHU
 from utils.files_times import generate_schedule_time_next_day, get_title_and_hashtags
+from utils.rate_limiter import rate_limiter
 from uploader.xhs_uploader.main import sign_local, beauty_print
 
 config = configparser.RawConfigParser()
@@ -57,6 +58,8 @@ if __name__ == '__main__':
 
         hash_tags_str = ' ' + ' '.join(['#' + tag + '[话题]#' for tag in hash_tags])
 
+        # 按平台 / 账号限速取令牌，避免风控（替代固定的 sleep(30)）
+        rate_limiter.acquire_sync(SOCIAL_MEDIA_XIAOHONGSHU, 'account1')
         note = xhs_client.create_video_note(title=title[:20], video_path=str(file),
                                             desc=title + tags_str + hash_tags_str,
                                             topics=topics,
@@ -64,5 +67,3 @@ if __name__ == '__main__':
                                             post_time=publish_datetimes[index].strftime("%Y-%m-%d %H:%M:%S"))
 
         beauty_print(note)
-        # 强制休眠30s，避免风控（必要）
-        sleep(30)
@@ -1,9 +1,16 @@
 # -*- coding: utf-8 -*-
-import os, re, sys, time, socket, shutil, hashlib, platform, argparse, subprocess, locale
+import os, re, sys, time, socket, shutil, sqlite3, hashlib, platform, argparse, subprocess, threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, \
+    CancelledError as FutureCancelledError
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 import httpx
 
+from cli_main import build_cookie_path, load_meta_from_txt, bool_from_env
+from uploader.douyin_uploader.main import douyin_setup, DouYinVideo
+from utils.browser_pool import BrowserPoolService
+
 ENV = os.getenv
 
 # ====== 固定配置（可用环境变量覆盖） ======
@@ -19,9 +26,7 @@ VIDEOS_DIR   = Path(ENV("VIDEOS_DIR",  ROOT_DIR / "videos"))
 RUNS_DIR     = Path(ENV("RUNS_DIR",    ROOT_DIR / "runs"))
 COOKIES_DIR  = Path(ENV("COOKIES_DIR", ROOT_DIR / "cookies"))
 PROFILES_DIR = Path(ENV("PROFILES_DIR",ROOT_DIR / "profiles"))
-
-PYTHON_EXE = sys.executable
-CLI_PATH   = str(ROOT_DIR / "cli_main.py")
+RECORD_INDEX_DB = Path(ENV("RECORD_INDEX_DB", RUNS_DIR / "record_index.db"))   # 救援回写用的本地记录索引
 
 TZ = timezone(timedelta(hours=8))
 
@@ -38,13 +43,51 @@ FIELD_DYID        = "抖音链接/ID"
 FIELD_ERR         = "错误信息"           # 文本
 FIELD_HOST        = "执行机器"
 FIELD_LAST_RUN    = "最后执行时间"
+FIELD_LEASE       = ENV("FIELD_LEASE", "租约到期")   # 日期字段：认领的机器在这个时间前独占该记录
 
 # ====== 单选名称（不要再用 optXXXX） ======
 STATUS_OK_NAME   = ENV("STATUS_OK_NAME",   "执行成功")
 STATUS_FAIL_NAME = ENV("STATUS_FAIL_NAME", "执行失败")
+STATUS_RUNNING_NAME = ENV("STATUS_RUNNING_NAME", "执行中")
 
 VIDEO_EXTS = (".mp4", ".mov", ".mkv", ".avi", ".wmv", ".m4v")
 
+# ====== 暂存方式：auto 先硬链接、再 reflink，跨盘时不暂存视频、只把 .txt 作为 --meta 传给 CLI；copy 为旧的整份拷贝 ======
+STAGE_MODE            = ENV("STAGE_MODE", "auto").strip().lower()
+
+# ====== 暂存清理：发布成功后删掉 VIDEOS_DIR 里暂存的视频和 .txt；失败的保留 N 天便于排查 ======
+KEEP_STAGED           = ENV("KEEP_STAGED_VIDEOS", "").strip().lower() in ("1", "true", "yes")
+STAGED_RETENTION_DAYS = float(ENV("STAGED_RETENTION_DAYS", "3"))
+STAGED_NAME_RE        = re.compile(r"_\d{8}-\d{4}_")   # build_dest_name 生成的 帐号_时间_原文件名
+
+# ====== 并发：最多 DISPATCH_WORKERS 条记录同时上传，同一账号最多 ACCOUNT_CONCURRENCY 条（共用 cookie，默认串行） ======
+DISPATCH_WORKERS    = max(1, int(ENV("DISPATCH_WORKERS", "3")))
+ACCOUNT_CONCURRENCY = max(1, int(ENV("ACCOUNT_CONCURRENCY", "1")))
+
+# ====== 进程内上传：浏览器常驻复用；同一账号 COOKIE_CHECK_TTL 秒内只校验一次 cookie ======
+UPLOAD_BROWSERS  = int(ENV("UPLOAD_BROWSERS", str(DISPATCH_WORKERS)))
+COOKIE_CHECK_TTL = float(ENV("COOKIE_CHECK_TTL", "1800"))
+UPLOAD_TIMEOUT   = float(ENV("UPLOAD_TIMEOUT", "1800"))   # 单条记录上传的最长秒数，超时取消并归还浏览器
+UPLOAD_ERRORS    = {"quota_reached": "购物车额度已满", "add_product_error": "添加商品失败"}
+
+# ====== 常驻模式（--daemon）：每 POLL_INTERVAL 秒拉一次到点记录；token 到期前 TOKEN_REFRESH_AHEAD 秒刷新 ======
+POLL_INTERVAL       = float(ENV("POLL_INTERVAL", "60"))
+TOKEN_REFRESH_AHEAD = 300
+TOKEN_INVALID_CODES = (99991661, 99991663, 99991668)
+
+# ====== 状态回写：攒批后一次 batch_update（单次上限 500 条），最多等 WRITEBACK_INTERVAL 秒 ======
+WRITEBACK_BATCH    = 500
+WRITEBACK_INTERVAL = float(ENV("WRITEBACK_INTERVAL", "5"))
+WRITEBACK_RETRIES  = 5
+RETRYABLE_CODES    = (99991400, 1254290, 1254291, 1254607)   # 频控 / 写冲突 / 数据未就绪
+
+# ====== 多机认领：执行前把记录标成「执行中 + 本机 + 租约到期时间」，执行中每 1/3 租期续期；
+#        其他机器只在租约过期后才能重新认领。LEASE_SECONDS=0 关闭（单机）；表里没有租约字段时自动关闭 ======
+LEASE_SECONDS        = float(ENV("LEASE_SECONDS", "600"))
+CLAIM_SETTLE_SECONDS = float(ENV("CLAIM_SETTLE_SECONDS", "2"))   # 写入认领后等这么久再读回确认
+LEASE_MAX_SECONDS    = float(ENV("LEASE_MAX_SECONDS", "3600"))   # 单条记录最多续期到这么久，之后放弃租约并取消上传
+FIELD_MISSING_CODES  = (1254045,)                                # FieldNameNotFound
+
 def log(msg: str):
     now = datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
     print(f"{now} | {msg}")
@@ -69,6 +112,8 @@ def machine_id() -> str:
     base = f"{socket.gethostname()}|{platform.system()}|{platform.machine()}"
     return hashlib.sha1(base.encode("utf-8")).hexdigest()[:12]
 
+def host_id() -> str: return f"{socket.gethostname()}-{machine_id()}"
+
 def ensure_dir(p: Path): p.mkdir(parents=True, exist_ok=True); return p
 
 def unique_path(p: Path) -> Path:
@@ -103,32 +148,148 @@ def write_txt_for(video_dst: Path, title: str, topics: str, link: str, short_tit
     return txt
 
 # ========= Feishu API =========
+RECORDS_URL = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{APP_TOKEN}/tables/{TABLE_ID}/records"
+
+_client: httpx.Client | None = None
+_token, _token_expire_at = None, 0.0
+
+def http() -> httpx.Client:
+    """进程内共用一个 httpx.Client（连接池 + keep-alive），常驻模式下不用每次请求重新握手。"""
+    global _client
+    if _client is None: _client = httpx.Client(timeout=30)
+    return _client
+
 def feishu_headers(token: str): return {"Authorization": f"Bearer {token}"}
 
-def get_tenant_access_token() -> str:
+def get_tenant_access_token(force: bool = False) -> str:
+    """tenant_access_token 有效期约 2 小时，缓存到过期前 TOKEN_REFRESH_AHEAD 秒。"""
+    global _token, _token_expire_at
+    if _token and not force and time.time() < _token_expire_at - TOKEN_REFRESH_AHEAD: return _token
     url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal/"
     payload = {"app_id": FEISHU_APP_ID, "app_secret": FEISHU_APP_SECRET}
-    with httpx.Client(timeout=20) as c:
-        r = c.post(url, json=payload); r.raise_for_status()
-        data = r.json(); token = data.get("tenant_access_token")
-        if not token: raise RuntimeError(f"get token fail: {data}")
-        return token
+    r = http().post(url, json=payload, timeout=20); r.raise_for_status()
+    data = r.json(); token = data.get("tenant_access_token")
+    if not token: raise RuntimeError(f"get token fail: {data}")
+    _token, _token_expire_at = token, time.time() + int(data.get("expire") or 7200)
+    return token
 
 def list_records(token: str):
-    url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{APP_TOKEN}/tables/{TABLE_ID}/records"
     params = {"page_size": 500}
     if VIEW_ID: params["view_id"] = VIEW_ID
     items = []
-    with httpx.Client(timeout=30) as c:
-        while True:
-            r = c.get(url, headers=feishu_headers(token), params=params); r.raise_for_status()
-            d = r.json().get("data", {})
-            items.extend(d.get("items", []))
-            if d.get("has_more") and d.get("page_token"):
-                params["page_token"] = d["page_token"]; continue
-            break
+    while True:
+        r = http().get(RECORDS_URL, headers=feishu_headers(token), params=params); r.raise_for_status()
+        d = r.json().get("data", {})
+        items.extend(d.get("items", []))
+        if d.get("has_more") and d.get("page_token"):
+            params["page_token"] = d["page_token"]; continue
+        break
     return items
 
+def _flatten_text(value):
+    # search 接口的文本字段返回 [{"type": "text", "text": "..."}] 分段，拼回和 list 接口一样的字符串
+    if isinstance(value, list) and value and all(isinstance(v, dict) and "text" in v for v in value):
+        return "".join(v["text"] for v in value)
+    return value
+
+def search_records(token: str, conditions: list[dict]):
+    """records/search 按条件在服务端过滤（条件之间为 and），返回 items；接口不可用时返回 None。"""
+    body = {"filter": {"conjunction": "and", "conditions": conditions}}
+    if VIEW_ID: body["view_id"] = VIEW_ID
+    params, items = {"page_size": 500}, []
+    while True:
+        j = http().post(f"{RECORDS_URL}/search", headers=feishu_headers(token), params=params, json=body).json()
+        if j.get("code") != 0:
+            if j.get("code") in TOKEN_INVALID_CODES: raise RuntimeError(f"token 失效：{j.get('msg')}")
+            log(f"[WARN] records/search 失败：{j.get('code')} {j.get('msg')}")
+            return None
+        d = j.get("data", {})
+        for it in d.get("items") or []:
+            it["fields"] = {k: _flatten_text(v) for k, v in (it.get("fields") or {}).items()}
+            items.append(it)
+        if d.get("has_more") and d.get("page_token"):
+            params["page_token"] = d["page_token"]; continue
+        return items
+
+def get_record(token: str, record_id: str) -> dict | None:
+    j = http().get(f"{RECORDS_URL}/{record_id}", headers=feishu_headers(token)).json()
+    if j.get("code") != 0: return None
+    return {k: _flatten_text(v) for k, v in (j.get("data", {}).get("record", {}).get("fields") or {}).items()}
+
+def list_due_records(token: str):
+    """
+    用 records/search 在服务端过滤「发布状态为空且发布时间不晚于今天」的记录，只传输今天及以前的行；
+    search 接口不可用（权限 / 字段类型不符）时退回全表拉取 + 本地过滤。拉到的记录顺便写入本地索引。
+    """
+    items = search_records(token, [
+        {"field_name": FIELD_STATUS, "operator": "isEmpty", "value": []},
+        {"field_name": FIELD_PUBTIME, "operator": "isLess", "value": ["Tomorrow"]},
+    ])
+    if items is None:
+        log("[WARN] 改为全表拉取")
+        items = list_records(token)
+    elif LEASE_SECONDS:
+        # 认领后机器挂掉、租约已过期的记录，允许重新认领
+        expired = search_records(token, [
+            {"field_name": FIELD_STATUS, "operator": "is", "value": [STATUS_RUNNING_NAME]},
+            {"field_name": FIELD_LEASE, "operator": "isLess", "value": ["Tomorrow"]},
+        ]) or []
+        seen = {it.get("record_id") for it in items}
+        items += [it for it in expired if it.get("record_id") not in seen]
+    record_index().upsert(items)
+    # 服务端日期条件只精确到天（ExactDate 会把当天晚些时候到点的记录漏掉），
+    # 所以服务端取「明天之前」的超集，本地再按毫秒过滤出真正到点的
+    return [r for r in items if ready_to_publish(r.get("fields", {}))]
+
+class RecordIndex:
+    """
+    本地持久化的记录索引（SQLite）：record_id <-> (作品文件夹, 发布帐号, 发布时间)。
+    轮询拉到的记录增量写入；救援回写时按字段直接查，不再拉全表逐条比较。
+    """
+    COLUMNS = {FIELD_WORKDIR: "workdir", FIELD_ACCOUNT: "account", FIELD_PUBTIME: "pub_ms"}
+
+    def __init__(self, path: Path = RECORD_INDEX_DB):
+        ensure_dir(path.parent)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS records (record_id TEXT PRIMARY KEY, workdir TEXT, "
+                               "account TEXT, pub_ms INTEGER, seen_at REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_records_keys ON records (workdir, account, pub_ms)")
+
+    def upsert(self, items: list[dict]):
+        rows = []
+        for it in items:
+            f = it.get("fields", {})
+            rid = _clean_record_id(it.get("record_id"))
+            if not rid: continue
+            workdir = f.get(FIELD_WORKDIR)
+            rows.append((rid, workdir if isinstance(workdir, str) else None,
+                         str(f.get(FIELD_ACCOUNT) or "").strip(), to_epoch_ms(f.get(FIELD_PUBTIME)), time.time()))
+        if not rows: return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", rows)
+
+    def forget(self, record_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM records WHERE record_id = ?", (record_id,))
+
+    def lookup(self, keys: dict) -> str | None:
+        """按 rescue_keys 查 record_id（值为 None 的键不参与匹配），多条时取最近一次见到的。"""
+        where = [(self.COLUMNS[k], v) for k, v in keys.items() if v is not None and k in self.COLUMNS]
+        if not where: return None
+        sql = "SELECT record_id FROM records WHERE " + " AND ".join(f"{c} = ?" for c, _ in where)
+        with self._lock:
+            row = self._conn.execute(sql + " ORDER BY seen_at DESC LIMIT 1", [v for _, v in where]).fetchone()
+        return row[0] if row else None
+
+_index: RecordIndex | None = None
+
+def record_index() -> RecordIndex:
+    global _index
+    if _index is None: _index = RecordIndex()
+    return _index
+
 def _clean_record_id(rid: str) -> str:
     if not isinstance(rid, str): return ""
     rid = rid.strip()
@@ -141,11 +302,9 @@ def batch_update_records(token: str, records: list[dict]) -> dict:
     records: [{"record_id": "recXXXX", "fields": {...}}, ...]
     返回原始JSON（code==0为成功）
     """
-    url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{APP_TOKEN}/tables/{TABLE_ID}/records/batch_update"
-    with httpx.Client(timeout=25) as c:
-        r = c.post(url, headers=feishu_headers(token), json={"records": records})
-        # 不 raise_for_status，让上层能看见飞书的业务 code / msg
-        return r.json()
+    r = http().post(f"{RECORDS_URL}/batch_update", headers=feishu_headers(token), json={"records": records}, timeout=25)
+    # 不 raise_for_status，让上层能看见飞书的业务 code / msg
+    return r.json()
 
 def batch_update_one(token: str, record_id: str, fields: dict) -> bool:
     rid = _clean_record_id(record_id)
@@ -159,49 +318,294 @@ def batch_update_one(token: str, record_id: str, fields: dict) -> bool:
     log(f"[WARN] batch_update 失败：{j}")
     return False
 
+def _refresh_index_for(token: str, rescue_keys: dict) -> bool:
+    """本地索引查不到时，只按 作品文件夹 + 发布帐号 到服务端搜一次（search 不可用才拉全表），结果写入索引。"""
+    conditions = [{"field_name": k, "operator": "is", "value": [str(rescue_keys[k])]}
+                  for k in (FIELD_WORKDIR, FIELD_ACCOUNT) if rescue_keys.get(k)]
+    items = search_records(token, conditions) if conditions else None
+    if items is None:
+        try: items = list_records(token)
+        except Exception as e2:
+            log(f"[RESCUE] 拉表失败：{e2}"); return False
+    record_index().upsert(items)
+    return True
+
 def rescue_batch_update(token: str, fields_to_set: dict, rescue_keys: dict) -> bool:
     """
-    当记录被移表/删除或 record_id 脏字符导致失败时，重扫全表并按关键字段重定位，再 batch_update。
+    当记录被移表/删除或 record_id 脏字符导致失败时，按关键字段在本地索引里重定位，再 batch_update；
+    索引里没有（或查到的 record_id 也已失效）时按字段到服务端搜一次刷新索引后再查。
     rescue_keys 例：{FIELD_WORKDIR: abs_video_path, FIELD_ACCOUNT: account, FIELD_PUBTIME: pub_ms}
     """
-    log(f"[RESCUE] 尝试按字段重查记录回写... keys={rescue_keys}")
-    try:
-        items = list_records(token)
-    except Exception as e2:
-        log(f"[RESCUE] 拉表失败：{e2}")
-        return False
-
-    target_id = None
-    for it in items:
-        f = it.get("fields", {})
-        ok = True
-        for k, v in rescue_keys.items():
-            if v is None: continue
-            if f.get(k) != v: ok = False; break
-        if ok:
-            target_id = it.get("record_id"); break
-
-    if not target_id:
-        log("[RESCUE] 未能通过字段定位到记录，放弃回写")
-        return False
+    log(f"[RESCUE] 尝试按字段重定位记录回写... keys={rescue_keys}")
+    index = record_index()
+    for refreshed in (False, True):
+        if refreshed and not _refresh_index_for(token, rescue_keys): return False
+        target_id = index.lookup(rescue_keys)
+        if not target_id: continue
+        if batch_update_one(token, target_id, fields_to_set):
+            log(f"[RESCUE] 已通过重定位 record_id={target_id} 回写成功"); return True
+        index.forget(target_id)
+    log("[RESCUE] 未能通过字段定位到记录，放弃回写")
+    return False
 
-    ok = batch_update_one(token, target_id, fields_to_set)
-    if ok:
-        log(f"[RESCUE] 已通过重查 record_id={target_id} 回写成功")
-    else:
-        log(f"[RESCUE] 仍失败")
-    return ok
+class WriteBackBuffer:
+    """
+    记录状态回写缓冲：put() 只入队，后台线程攒满 WRITEBACK_BATCH 条或最早一条等了 interval 秒就
+    合并成一次 batch_update；频控 / 网络错误指数退避重试，整批被拒（多半是某条 record_id 失效）时
+    再逐条回写、失败的走 rescue_batch_update。同一条记录多次 put 会合并字段。
+    仍然失败的记录留在 _failed 里，每次 flush() 重试一次，写成功前 pending_ids() 一直包含它们。
+    """
+    def __init__(self, interval: float = WRITEBACK_INTERVAL):
+        self.interval = interval
+        self._pending: dict[str, dict] = {}    # record_id -> {"fields", "rescue_keys"}
+        self._inflight: dict[str, dict] = {}
+        self._failed: dict[str, dict] = {}     # 回写失败、等下次 flush 重试的记录
+        self._first_at = None
+        self._flushing = self._stopped = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name="writeback", daemon=True)
+        self._thread.start()
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): self.close()
+
+    def put(self, record_id: str, fields: dict, rescue_keys: dict):
+        rid = _clean_record_id(record_id)
+        if not (rid and rid.startswith("rec")):
+            log(f"[WARN] record_id 异常：{record_id!r}，按字段定位回写")
+            rescue_batch_update(get_tenant_access_token(), fields, rescue_keys); return
+        with self._cond:
+            entry = self._pending.setdefault(rid, self._failed.pop(rid, None) or {"fields": {}, "rescue_keys": rescue_keys})
+            entry["fields"].update(fields)
+            if self._first_at is None: self._first_at = time.monotonic(); self._cond.notify_all()
+            elif len(self._pending) >= WRITEBACK_BATCH: self._cond.notify_all()
+
+    def pending_ids(self) -> set[str]:
+        """还没回写成功的记录（含回写失败待重试的）；下一轮拉取时跳过它们，避免状态未落表前重复发布。"""
+        with self._cond: return set(self._pending) | set(self._inflight) | set(self._failed)
+
+    def flush(self):
+        """把已入队的和之前失败的全部尝试回写一次再返回；仍失败的留到下次 flush。"""
+        with self._cond:
+            for rid, entry in self._failed.items(): self._pending.setdefault(rid, entry)
+            self._failed = {}
+            if self._pending and self._first_at is None: self._first_at = time.monotonic()
+            self._flushing = True; self._cond.notify_all()
+            while self._pending or self._inflight: self._cond.wait()
+            self._flushing = False
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            for rid, entry in self._failed.items(): log(f"[WRITEBACK] 退出时记录 {rid} 仍未回写：{entry['fields']}")
+            self._stopped = True; self._cond.notify_all()
+        self._thread.join()
+
+    def _wait_time(self):
+        if not self._pending: return None
+        if self._flushing or self._stopped or len(self._pending) >= WRITEBACK_BATCH: return 0
+        return max(0.0, self._first_at + self.interval - time.monotonic())
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while (wait_s := self._wait_time()) != 0:
+                    if self._stopped: return
+                    self._cond.wait(timeout=wait_s)
+                rids = list(self._pending)[:WRITEBACK_BATCH]
+                self._inflight = {rid: self._pending.pop(rid) for rid in rids}
+                self._first_at = time.monotonic() if self._pending else None
+            try: failed = self._send(self._inflight)
+            except Exception as e: log(f"[WRITEBACK] 回写异常：{e}"); failed = self._inflight
+            with self._cond:
+                for rid, entry in failed.items():
+                    newer = self._pending.get(rid)   # 回写期间又 put 过：新字段覆盖旧字段后一起重发
+                    if newer: newer["fields"] = {**entry["fields"], **newer["fields"]}
+                    else: self._failed[rid] = entry
+                self._inflight = {}; self._cond.notify_all()
+
+    def _send(self, batch: dict) -> dict:
+        """回写一批记录，返回没写成功的 {record_id: entry}。"""
+        records = [{"record_id": rid, "fields": e["fields"]} for rid, e in batch.items()]
+        for attempt in range(WRITEBACK_RETRIES):
+            try: j = batch_update_records(get_tenant_access_token(), records)
+            except Exception as e: j = {"code": -1, "msg": str(e)}
+            code = j.get("code")
+            if code == 0:
+                log(f"[WRITEBACK] 已回写 {len(records)} 条记录"); return {}
+            if code in TOKEN_INVALID_CODES:
+                get_tenant_access_token(force=True); continue
+            if code != -1 and code not in RETRYABLE_CODES: break
+            delay = min(60, 2 ** attempt)
+            log(f"[WRITEBACK] batch_update 失败（{code} {j.get('msg')}），{delay}s 后重试")
+            time.sleep(delay)
+        log(f"[WRITEBACK] 整批回写失败，逐条回写 {len(records)} 条")
+        token, failed = get_tenant_access_token(), {}
+        for rid, e in batch.items():
+            if not batch_update_one(token, rid, e["fields"]) and not rescue_batch_update(token, e["fields"], e["rescue_keys"]):
+                log(f"[WRITEBACK] 记录 {rid} 回写失败，下次 flush 重试：{e['fields']}")
+                failed[rid] = e
+        return failed
 
 # ========= 业务 =========
+def lease_expired(fields: dict) -> bool:
+    lease_ms = to_epoch_ms(fields.get(FIELD_LEASE))
+    return lease_ms is None or lease_ms <= now_ms()
+
 def ready_to_publish(fields: dict) -> bool:
+    """状态为空且已到发布时间；开启租约时，「执行中」但租约已过期（认领的机器挂了）的也算。"""
     status = fields.get(FIELD_STATUS)
     pub_ms = to_epoch_ms(fields.get(FIELD_PUBTIME))
-    return (not status) and (pub_ms is not None) and (pub_ms <= now_ms())
+    if pub_ms is None or pub_ms > now_ms(): return False
+    return (not status) or bool(LEASE_SECONDS and status == STATUS_RUNNING_NAME and lease_expired(fields))
+
+class Lease:
+    """
+    本机持有的记录租约：后台每 1/3 租期直接 batch_update 续期一次，写成功才算续上（confirmed_until）。
+    续期失败且距确认的到期时间不足半个租期（连续两次失败）或持有超过 LEASE_MAX_SECONDS 时视为丢失：
+    停止续期并通知 on_lost 注册的回调（取消上传），其他机器随后可能重新认领。LEASE_SECONDS=0 时什么都不做。
+    """
+    def __init__(self, record_id: str, rescue_keys: dict, writeback: "WriteBackBuffer", expires_ms: int | None = None):
+        self.record_id, self.rescue_keys, self.writeback = record_id, rescue_keys, writeback
+        self.active = bool(LEASE_SECONDS)
+        self.confirmed_until = expires_ms or now_ms() + int(LEASE_SECONDS * 1000)
+        self.lost = False
+        self._started = time.monotonic()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.active:
+            self._thread = threading.Thread(target=self._renew, name=f"lease-{record_id}", daemon=True)
+            self._thread.start()
+
+    def _renew(self):
+        while not self._stop.wait(LEASE_SECONDS / 3):
+            if time.monotonic() - self._started >= LEASE_MAX_SECONDS:
+                self._mark_lost(f"持有超过 {LEASE_MAX_SECONDS:.0f} 秒，不再续期"); return
+            lease_ms = now_ms() + int(LEASE_SECONDS * 1000)
+            try: j = batch_update_records(get_tenant_access_token(), [{"record_id": self.record_id, "fields": {FIELD_LEASE: lease_ms}}])
+            except Exception as e: j = {"code": -1, "msg": str(e)}
+            if j.get("code") == 0: self.confirmed_until = lease_ms; continue
+            log(f"[LEASE] 记录 {self.record_id} 续期失败：{j.get('code')} {j.get('msg')}")
+            if now_ms() > self.confirmed_until - int(LEASE_SECONDS * 1000 / 2):
+                self._mark_lost("续期失败，租约可能已过期"); return
+
+    def _mark_lost(self, reason: str):
+        log(f"[LEASE] 记录 {self.record_id} 租约丢失（{reason}），取消执行")
+        with self._lock:
+            self.lost = True
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks: fn()
+
+    def on_lost(self, fn):
+        """租约丢失时调用 fn（在续期线程里）；已经丢失时立即调用。"""
+        with self._lock:
+            if not self.lost: self._callbacks.append(fn); return
+        fn()
+
+    def release(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread(): self._thread.join()
+        self._thread = None
+
+    def final_fields(self, payload: dict) -> dict | None:
+        """
+        执行结果一并清空租约（停止续期后再写，避免续期覆盖在结果之后）。
+        租约丢失后只有记录仍由本机持有时才写；已被其他机器重新认领时返回 None，不覆盖对方的状态。
+        """
+        self.release()
+        if not self.active: return payload
+        if self.lost:
+            current = get_record(get_tenant_access_token(), self.record_id) or {}
+            if current.get(FIELD_HOST) != host_id() or current.get(FIELD_STATUS) != STATUS_RUNNING_NAME: return None
+        return {**payload, FIELD_LEASE: None}
+
+def write_result(rid: str, lease: Lease, payload: dict, rescue_keys: dict, writeback: "WriteBackBuffer"):
+    fields = lease.final_fields(payload)
+    if fields is None:
+        log(f"[LEASE] 记录 {rid} 已被其他机器重新认领，不回写本机结果：{payload}"); return
+    writeback.put(rid, fields, rescue_keys)
+
+def claim_record(record_id: str, rescue_keys: dict, writeback: "WriteBackBuffer") -> Lease | None:
+    """
+    认领记录：先读回确认仍可认领，写入「执行中 + 本机 + 租约到期时间」，等 CLAIM_SETTLE_SECONDS 后再读回，
+    机器和租约都是自己写的才算认领成功；多台机器同时认领时只有最后写入的一台能读回自己。
+    飞书没有条件更新，两台机器的写入间隔超过 CLAIM_SETTLE_SECONDS 时才可能都认领成功，读回前的预检查把这种情况压到很小。
+    返回 None 表示被其他机器认领了。
+    """
+    global LEASE_SECONDS
+    if not LEASE_SECONDS: return Lease(record_id, rescue_keys, writeback)
+    record_id = _clean_record_id(record_id)
+    if not record_id.startswith("rec"): return None
+    token = get_tenant_access_token()
+    current = get_record(token, record_id)
+    if current is None or not ready_to_publish(current): return None
+    lease_ms = now_ms() + int(LEASE_SECONDS * 1000)
+    claim = {FIELD_STATUS: STATUS_RUNNING_NAME, FIELD_HOST: host_id(), FIELD_LEASE: lease_ms}
+    j = batch_update_records(token, [{"record_id": record_id, "fields": claim}])
+    if j.get("code") in FIELD_MISSING_CODES:
+        log(f"[WARN] 表里没有「{FIELD_LEASE}」字段，关闭多机认领（按单机运行）：{j.get('msg')}")
+        LEASE_SECONDS = 0
+        return Lease(record_id, rescue_keys, writeback)
+    if j.get("code") != 0:
+        log(f"[WARN] 认领记录 {record_id} 失败：{j.get('code')} {j.get('msg')}"); return None
+    time.sleep(CLAIM_SETTLE_SECONDS)
+    current = get_record(token, record_id) or {}
+    if current.get(FIELD_HOST) != host_id() or to_epoch_ms(current.get(FIELD_LEASE)) != lease_ms: return None
+    return Lease(record_id, rescue_keys, writeback, expires_ms=lease_ms)
 
 def build_dest_name(account: str, pub_ms: int, src_video: Path) -> str:
     ts = datetime.fromtimestamp(pub_ms/1000, TZ).strftime("%Y%m%d-%H%M")
     return f"{slugify(account)}_{ts}_{src_video.stem}{src_video.suffix}"
 
+def reflink(src: Path, dst: Path) -> bool:
+    """写时复制克隆（btrfs / XFS / APFS），不支持时返回 False。"""
+    if sys.platform.startswith("linux"): cmd = ["cp", "--reflink=always", str(src), str(dst)]
+    elif sys.platform == "darwin": cmd = ["cp", "-c", str(src), str(dst)]
+    else: return False
+    try: ok = subprocess.run(cmd, capture_output=True).returncode == 0
+    except OSError: ok = False
+    if not ok and dst.exists(): dst.unlink()
+    return ok
+
+def stage_video(src: Path, dst: Path) -> str:
+    """
+    把源视频暂存为 dst，返回方式：link / reflink / copy；
+    返回 meta 表示没有暂存视频（跨盘或不支持链接），直接上传源文件，元数据走 --meta。
+    """
+    if STAGE_MODE == "copy":
+        shutil.copy2(src, dst); return "copy"
+    try: os.link(src, dst); return "link"
+    except OSError: pass
+    if reflink(src, dst): return "reflink"
+    return "meta"
+
+def cleanup_staged(txt_path: Path, video_dst: Path | None):
+    """video_dst 为 None 表示没有暂存视频（meta 方式），只删 .txt，绝不动源视频。"""
+    if KEEP_STAGED: return
+    for p in (video_dst, txt_path):
+        if p is None: continue
+        try: p.unlink()
+        except FileNotFoundError: pass
+
+def sweep_staged():
+    """删除超过 STAGED_RETENTION_DAYS 天的暂存视频 / .txt（只动 build_dest_name 命名的文件）。"""
+    if KEEP_STAGED or not VIDEOS_DIR.exists(): return
+    cutoff = time.time() - STAGED_RETENTION_DAYS * 86400
+    freed, count = 0, 0
+    for p in VIDEOS_DIR.iterdir():
+        if not p.is_file() or not STAGED_NAME_RE.search(p.name): continue
+        if p.suffix.lower() not in VIDEO_EXTS + (".txt",): continue
+        # 硬链接和源视频共用 mtime（可能很旧），按同名 .txt（暂存时新写的）判断是否过期
+        txt = p.with_suffix(".txt")
+        if (txt if txt.exists() else p).stat().st_mtime >= cutoff: continue
+        freed += p.stat().st_size; count += 1
+        p.unlink()
+    if count:
+        log(f"[GC] 清理过期暂存文件 {count} 个，释放 {freed / 1024 / 1024:.1f}MB")
+
 def find_error_screenshot(account: str, start_ts: float) -> Path | None:
     acc_dir = RUNS_DIR / account
     if not acc_dir.exists(): return None
@@ -210,50 +614,90 @@ def find_error_screenshot(account: str, start_ts: float) -> Path | None:
     pngs.sort(key=lambda p: p.stat().st_mtime)
     return pngs[-1]
 
-def run_cli_upload(account: str, video_path: Path, publish_ts_ms: int | None, headed: bool = False) -> tuple[int, str]:
-    pt_arg = "0" if (not publish_ts_ms or publish_ts_ms <= now_ms()) else str(int(publish_ts_ms/1000))
-    cmd = [PYTHON_EXE, CLI_PATH, "douyin", account, "upload", str(video_path), "-pt", pt_arg]
-    if headed: cmd.append("--headed")  # 透传给 CLI
-
-    log(f"[CLI] {' '.join(cmd)}")
-
-    enc = locale.getpreferredencoding(False)
-    proc = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        encoding=enc,
-        errors="replace",
-    )
-    out_lines = []
-    while True:
-        line = proc.stdout.readline()
-        if not line and proc.poll() is not None:
-            break
-        if line:
-            print(line.rstrip())
-            out_lines.append(line)
-    code = proc.wait()
-    return code, "".join(out_lines)
-
-def process_one_record(token: str, rec: dict, headed: bool = False):
+class UploadRuntime:
+    """
+    常驻的事件循环 + 浏览器池，所有记录在本进程里直接调用 DouYinVideo 上传，
+    不再每条记录起一个 cli_main.py 子进程（重复加载 Playwright、重复开浏览器校验 cookie）。
+    事件循环跑在 BrowserPoolService 的线程里，upload() 可以被多个工作线程同时调用。
+    """
+    def __init__(self, headed: bool = False):
+        self.headless = bool_from_env("HEADLESS", True) and not headed
+        self.skip_cookie_check = os.getenv("SKIP_COOKIE_CHECK") == "1"
+        self.service = BrowserPoolService(size=UPLOAD_BROWSERS)
+        self.pool = self.service.pool
+        self.cookie_checked: dict[str, float] = {}   # 账号 -> 上次 cookie 校验通过的时间
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): self.service.shutdown()
+
+    async def _ensure_cookie(self, account: str, cookie_file: Path):
+        if self.skip_cookie_check or time.time() - self.cookie_checked.get(account, 0) < COOKIE_CHECK_TTL: return
+        cookie_file.parent.mkdir(parents=True, exist_ok=True)
+        if await douyin_setup(str(cookie_file), handle=True, account_alias=account, headless=self.headless):
+            self.cookie_checked[account] = time.time()
+
+    async def _upload(self, account: str, video_path: Path, meta_path: Path, publish_ts_ms: int | None):
+        cookie_file = build_cookie_path(account)
+        await self._ensure_cookie(account, cookie_file)
+        title, tags, product_url, product_title = load_meta_from_txt(meta_path)
+        publish_date = 0 if (not publish_ts_ms or publish_ts_ms <= now_ms()) \
+            else datetime.fromtimestamp(publish_ts_ms / 1000, TZ).replace(tzinfo=None)
+        app = DouYinVideo(title=title or video_path.stem, file_path=str(video_path), tags=tags,
+                          publish_date=publish_date, account_file=str(cookie_file),
+                          product_url=product_url, product_title=product_title,
+                          headless=self.headless, browser_pool=self.pool)
+        return await app.main()
+
+    def upload(self, account: str, video_path: Path, meta_path: Path, publish_ts_ms: int | None,
+               lease: "Lease | None" = None) -> tuple[bool, str]:
+        """返回 (是否发布成功, 原因)；原因见 DouYinVideo.upload，异常时为异常信息。租约丢失时取消上传。"""
+        future = self.service.submit(self._upload(account, video_path, meta_path, publish_ts_ms))
+        if lease is not None: lease.on_lost(future.cancel)
+        try:
+            return future.result(timeout=UPLOAD_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            self.cookie_checked.pop(account, None)
+            return False, f"上传超过 {UPLOAD_TIMEOUT:.0f} 秒未完成，已取消"
+        except FutureCancelledError:
+            return False, "租约丢失，已取消上传"
+        except Exception as e:
+            self.cookie_checked.pop(account, None)   # 失败后下一条记录重新校验 cookie
+            return False, f"{type(e).__name__}: {e}"
+
+def process_one_record(rec: dict, runtime: UploadRuntime, writeback: WriteBackBuffer):
     rid    = rec.get("record_id")
     fields = rec.get("fields", {})
 
     account  = str(fields.get(FIELD_ACCOUNT) or "").strip()
     video_fp = fields.get(FIELD_WORKDIR)
     pub_ms   = to_epoch_ms(fields.get(FIELD_PUBTIME))
-    title    = fields.get(FIELD_TITLE) or ""
-    topics   = fields.get(FIELD_TOPICS) or ""
-    link     = fields.get(FIELD_LINK) or ""
-    s_title  = fields.get(FIELD_SHORT_TITLE) or ""
 
-    host = f"{socket.gethostname()}-{machine_id()}"
+    host = host_id()
     now_iso = datetime.now(TZ).isoformat(timespec="seconds")
 
     # 只接受“视频绝对路径”
-    rescue_keys = {FIELD_WORKDIR: video_fp if isinstance(video_fp, str) else video_fp, FIELD_ACCOUNT: account, FIELD_PUBTIME: pub_ms}
+    rescue_keys = {FIELD_WORKDIR: video_fp if isinstance(video_fp, str) else None, FIELD_ACCOUNT: account, FIELD_PUBTIME: pub_ms}
+
+    lease = claim_record(rid, rescue_keys, writeback)
+    if lease is None:
+        log(f"[SKIP] 记录 {rid} 已被其他机器认领或无法认领，跳过")
+        return
+    try:
+        _run_claimed_record(rid, fields, lease, rescue_keys, runtime, writeback, host, now_iso)
+    finally:
+        lease.release()   # 异常退出时停止续期，租约过期后可被重新认领
+
+def _run_claimed_record(rid: str, fields: dict, lease: Lease, rescue_keys: dict,
+                        runtime: UploadRuntime, writeback: WriteBackBuffer, host: str, now_iso: str):
+    account  = str(fields.get(FIELD_ACCOUNT) or "").strip()
+    video_fp = fields.get(FIELD_WORKDIR)
+    pub_ms   = to_epoch_ms(fields.get(FIELD_PUBTIME))
+    title    = fields.get(FIELD_TITLE) or ""
+    topics   = fields.get(FIELD_TOPICS) or ""
+    link     = fields.get(FIELD_LINK) or ""
+    s_title  = fields.get(FIELD_SHORT_TITLE) or ""
 
     if not isinstance(video_fp, str) or (not os.path.isabs(video_fp)):
         payload = {
@@ -261,8 +705,7 @@ def process_one_record(token: str, rec: dict, headed: bool = False):
             FIELD_ERR: "作品文件夹必须是视频文件绝对路径",
             FIELD_HOST: host, FIELD_LAST_RUN: now_iso
         }
-        if not batch_update_one(token, rid, payload):
-            rescue_batch_update(token, payload, rescue_keys)
+        write_result(rid, lease, payload, rescue_keys, writeback)
         log(f"[FAIL] {rid} 非绝对路径：{video_fp}")
         return
 
@@ -273,85 +716,118 @@ def process_one_record(token: str, rec: dict, headed: bool = False):
             FIELD_ERR: "视频文件不存在或不是文件",
             FIELD_HOST: host, FIELD_LAST_RUN: now_iso
         }
-        if not batch_update_one(token, rid, payload):
-            rescue_batch_update(token, payload, rescue_keys)
+        write_result(rid, lease, payload, rescue_keys, writeback)
         log(f"[FAIL] {rid} 视频不存在/非文件：{video_fp}")
         return
 
     ensure_dir(VIDEOS_DIR)
     dest_name = build_dest_name(account, pub_ms or now_ms(), src_video)
     video_dst = unique_path(VIDEOS_DIR / dest_name)
-    shutil.copy2(src_video, video_dst)
+    method = stage_video(src_video, video_dst)
     txt_path = write_txt_for(video_dst, title, topics, link, s_title)
-    log(f"[PREP] 拷贝视频到 {video_dst}，生成 {txt_path.name}")
+    if method == "meta":
+        video_dst = None
+        log(f"[PREP] 源视频与 {VIDEOS_DIR} 不在同一磁盘，直接上传源文件，元数据见 {txt_path.name}")
+    else:
+        log(f"[PREP] 暂存视频到 {video_dst}（{method}），生成 {txt_path.name}")
 
     start_ts = time.time()
-    code, output = run_cli_upload(account, video_dst, pub_ms, headed=headed)
+    ok, reason = runtime.upload(account, video_dst or src_video, txt_path, pub_ms, lease)
     _ = find_error_screenshot(account, start_ts)  # 如要上传图片，可在此处读取，但现在错误信息已写文本
 
-    # 用于救援匹配（跨表/删除导致 record_id 无效）
-    src_video_str = str(src_video.resolve())
-    rescue_keys = {FIELD_WORKDIR: src_video_str, FIELD_ACCOUNT: account, FIELD_PUBTIME: pub_ms}
 
-    if code == 0 and ("视频发布成功" in output or "视频发布成功" in output.replace(" ", "")):
+    if ok:
         payload = {
             FIELD_STATUS: STATUS_OK_NAME,            # ✅ 名称字符串
             FIELD_HOST: host, FIELD_LAST_RUN: now_iso
         }
-        if not batch_update_one(token, rid, payload):
-            if rescue_batch_update(token, payload, rescue_keys):
-                log(f"[OK] 记录 {rid} 执行成功并已回写（经救援）")
-            else:
-                log(f"[WARN] 记录 {rid} 执行成功，但回写失败")
-        else:
-            log(f"[OK] 记录 {rid} 执行成功并已回写")
+        write_result(rid, lease, payload, rescue_keys, writeback)
+        log(f"[OK] 记录 {rid} 执行成功，等待回写")
+        cleanup_staged(txt_path, video_dst)
     else:
-        err_text = "购物车额度已满" if "额度已满" in output else "发布失败"
+        err_text = UPLOAD_ERRORS.get(reason) or f"发布失败：{reason}"
         payload = {
             FIELD_STATUS: STATUS_FAIL_NAME,          # ✅ 名称字符串
             FIELD_ERR: err_text,                     # ✅ 文本
             FIELD_HOST: host, FIELD_LAST_RUN: now_iso
         }
-        if not batch_update_one(token, rid, payload):
-            if rescue_batch_update(token, payload, rescue_keys):
-                log(f"[FAIL] 记录 {rid} 执行失败（已回写：{err_text}，经救援）")
-            else:
-                log(f"[FAIL] 记录 {rid} 执行失败，且回写失败")
-        else:
-            log(f"[FAIL] 记录 {rid} 执行失败（已回写：{err_text}）")
+        write_result(rid, lease, payload, rescue_keys, writeback)
+        log(f"[FAIL] 记录 {rid} 执行失败（{err_text}），等待回写")
 
 def parse_args():
     p = argparse.ArgumentParser()
-    p.add_argument("--headed", action="store_true", help="以可视化模式运行（转传给 cli_main.py 的 --headed）")
+    p.add_argument("--headed", action="store_true", help="以可视化模式运行（同 cli_main.py 的 --headed）")
+    p.add_argument("--daemon", action="store_true", help="常驻运行，每 --interval 秒拉取一次到点任务")
+    p.add_argument("--interval", type=float, default=POLL_INTERVAL, help="常驻模式的轮询间隔（秒）")
+    p.add_argument("--workers", type=int, default=DISPATCH_WORKERS, help="同时上传的记录数（不同账号并行）")
     return p.parse_args()
 
+def _process_safely(rec: dict, runtime: UploadRuntime, writeback: WriteBackBuffer):
+    try:
+        process_one_record(rec, runtime, writeback)
+    except Exception as e:
+        log(f"[ERROR] 处理记录 {rec.get('record_id')} 出错：{e}")
+
+def run_due_records(runtime: UploadRuntime, writeback: WriteBackBuffer, workers: int = DISPATCH_WORKERS):
+    """
+    不同账号的记录并行执行（最多 workers 条），同一账号同时最多 ACCOUNT_CONCURRENCY 条，按发布时间先后；
+    账号满额时不占工作线程，先去跑别的账号。
+    """
+    writeback.flush()   # 上一轮的状态先落表，否则这些记录还会被当成未执行拉回来
+    skip = writeback.pending_ids()
+    ready = [r for r in list_due_records(get_tenant_access_token()) if _clean_record_id(r.get("record_id")) not in skip]
+    if not ready: return 0
+    log(f"准备执行 {len(ready)} 条到点任务（并发 {workers}，单账号 {ACCOUNT_CONCURRENCY}）")
+    queues: dict[str, deque] = defaultdict(deque)
+    for r in sorted(ready, key=lambda r: to_epoch_ms(r.get("fields", {}).get(FIELD_PUBTIME)) or 0):
+        queues[str(r.get("fields", {}).get(FIELD_ACCOUNT) or "").strip()].append(r)
+    running, active = {}, defaultdict(int)   # future -> 账号；账号 -> 正在执行数
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dispatch") as ex:
+        while queues or running:
+            for account in list(queues):
+                q = queues[account]
+                while q and len(running) < workers and active[account] < ACCOUNT_CONCURRENCY:
+                    running[ex.submit(_process_safely, q.popleft(), runtime, writeback)] = account
+                    active[account] += 1
+                if not q: del queues[account]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for f in done: active[running.pop(f)] -= 1
+    return len(ready)
+
 def main():
     args = parse_args()
     headed_env = os.getenv("DISPATCH_HEADED", "").strip().lower() in ("1", "true", "yes")
     headed = args.headed or headed_env
 
-    log("Feishu Dispatcher 启动")
+    log("Feishu Dispatcher 启动" + (f"（常驻，每 {args.interval:g} 秒轮询）" if args.daemon else ""))
     # log(f"Using Feishu app={APP_TOKEN} table={TABLE_ID} view={VIEW_ID or '<default>'}")
     log(f"Browser mode: {'VISUAL (headed)' if headed else 'HEADLESS'}")
+    sweep_staged()
 
     try:
-        token = get_tenant_access_token()
+        get_tenant_access_token()
     except Exception as e:
         log(f"[FATAL] 获取 token 失败：{e}"); sys.exit(2)
 
-    try:
-        recs = list_records(token)
-    except Exception as e:
-        log(f"[FATAL] 读取表格失败：{e}"); sys.exit(3)
-
-    ready = [r for r in recs if ready_to_publish(r.get("fields", {}))]
-    log(f"共 {len(recs)} 条记录，准备执行 {len(ready)} 条到点任务")
-
-    for r in ready:
-        try:
-            process_one_record(token, r, headed=headed)
-        except Exception as e:
-            log(f"[ERROR] 处理记录出错：{e}")
+    with UploadRuntime(headed=headed) as runtime, WriteBackBuffer() as writeback:
+        if not args.daemon:
+            try:
+                count = run_due_records(runtime, writeback, max(1, args.workers))
+            except Exception as e:
+                log(f"[FATAL] 读取表格失败：{e}"); sys.exit(3)
+            log(f"共执行 {count} 条到点任务")
+        while args.daemon:
+            try:
+                run_due_records(runtime, writeback, max(1, args.workers))
+                sweep_staged()
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                log(f"[WARN] 本轮轮询失败，下轮重试：{e}")
+                try: get_tenant_access_token(force=True)
+                except Exception as e2: log(f"[WARN] 刷新 token 失败：{e2}")
+            try: time.sleep(args.interval)
+            except KeyboardInterrupt: break
 
     log("Feishu Dispatcher 完成")
 
@@ -1,17 +1,23 @@
 import asyncio
 import configparser
 import os
+import threading
+import time
 
 from playwright.async_api import async_playwright
 from xhs import XhsClient
 
-from conf import BASE_DIR
-from utils.base_social_media import set_init_script
+from conf import BASE_DIR, COOKIE_CHECK_CONCURRENCY, COOKIE_CHECK_TTL
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_DOUYIN, SOCIAL_MEDIA_TENCENT, SOCIAL_MEDIA_KUAISHOU, SOCIAL_MEDIA_XIAOHONGSHU
+from utils.http_cookie_auth import http_cookie_auth
 from utils.log import tencent_logger, kuaishou_logger
 from pathlib import Path
 from uploader.xhs_uploader.main import sign_local
 
 async def cookie_auth_douyin(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_DOUYIN, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -36,6 +42,9 @@ async def cookie_auth_douyin(account_file):
             return True
 
 async def cookie_auth_tencent(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_TENCENT, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -53,6 +62,9 @@ async def cookie_auth_tencent(account_file):
             return True
 
 async def cookie_auth_ks(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_KUAISHOU, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -72,6 +84,9 @@ async def cookie_auth_ks(account_file):
 
 
 async def cookie_auth_xhs(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_XIAOHONGSHU, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -113,5 +128,60 @@ async def check_cookie(type,file_path):
         case _:
             return False
 
+# cookie 校验结果缓存：{cookie 文件绝对路径: (文件 mtime, 校验时间, 结果)}
+# cookie 文件被重新写入（mtime 变化）或超过 TTL 后才会重新探测
+_cookie_cache = {}
+_cookie_cache_lock = threading.Lock()
+
+
+def _cookie_cache_get(path: Path, ttl: float):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _cookie_cache_lock:
+        entry = _cookie_cache.get(str(path))
+    if entry and entry[0] == mtime and time.monotonic() - entry[1] < ttl:
+        return entry[2]
+    return None
+
+
+def _cookie_cache_put(path: Path, result: bool):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return
+    with _cookie_cache_lock:
+        _cookie_cache[str(path)] = (mtime, time.monotonic(), result)
+
+
+async def check_cookie_cached(type, file_path, ttl=COOKIE_CHECK_TTL):
+    path = Path(BASE_DIR / "cookiesFile" / file_path)
+    cached = _cookie_cache_get(path, ttl)
+    if cached is not None:
+        return cached
+    result = await check_cookie(type, file_path)
+    _cookie_cache_put(path, result)
+    return result
+
+
+async def check_cookies(accounts, concurrency=COOKIE_CHECK_CONCURRENCY, ttl=COOKIE_CHECK_TTL):
+    """
+    并发校验多个账号的 cookie，返回与 accounts 顺序一致的布尔列表。
+    accounts: [(type, file_path), ...]
+    同时在跑的无头浏览器数量不超过 concurrency，命中缓存的账号不会启动浏览器。
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check_one(type, file_path):
+        async with semaphore:
+            try:
+                return await check_cookie_cached(type, file_path, ttl)
+            except Exception as e:
+                print(f"[+] cookie 校验异常 {file_path}: {e}")
+                return False
+
+    return await asyncio.gather(*(check_one(type, file_path) for type, file_path in accounts))
+
 # a = asyncio.run(check_cookie(1,"3a6cfdc0-3d51-11f0-8507-44e51723d63c.json"))
 # print(a)
\ No newline at end of file
@@ -0,0 +1,274 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+from conf import BASE_DIR
+from myUtils.listing import invalidate_counts
+from myUtils.mediaProbe import submit_probe
+from myUtils.search import index_file
+from utils.db import get_connection
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+CHUNK_SIZE = 1024 * 1024
+
+# 发布台账状态
+PUBLICATION_PUBLISHING = "publishing"
+PUBLICATION_PUBLISHED = "published"
+
+
+class DuplicatePublication(Exception):
+    """同一素材已经发布（或正在发布）到同一平台的同一账号。"""
+
+
+class UploadOffsetMismatch(Exception):
+    """分片续传时客户端给的 offset 和服务端已确认的不一致，客户端应按 offset 重新对齐。"""
+
+    def __init__(self, offset):
+        super().__init__(f"offset mismatch, server offset is {offset}")
+        self.offset = offset
+
+
+def _connect():
+    return get_connection(sqlite3.Row)
+
+
+def hash_file(path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def save_material(stream, filename):
+    """
+    边写盘边算 SHA-256。内容已存在时丢弃新文件，直接复用已有记录（文件丢失则用新文件补回）。
+    返回 (record, duplicate)，record 为 file_records 的一行。
+    """
+    VIDEO_DIR.mkdir(exist_ok=True)
+    part_path = VIDEO_DIR / f".{uuid.uuid1()}.part"
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(part_path, 'wb') as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                sha256.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        return _register_material(part_path, filename, sha256.hexdigest(), size)
+    finally:
+        if part_path.exists():
+            os.remove(part_path)
+
+
+def _register_material(part_path, filename, content_hash, size):
+    """把写好的临时文件登记为素材；内容重复时删掉临时文件，复用已有记录。"""
+    final_filename = f"{uuid.uuid1()}_{filename}"
+    with _connect() as conn:
+        existing = conn.execute("SELECT * FROM file_records WHERE content_hash = ?", (content_hash,)).fetchone()
+        if existing is None:
+            os.replace(part_path, VIDEO_DIR / final_filename)
+            try:
+                cursor = conn.execute('''
+                INSERT INTO file_records (filename, filesize, file_path, content_hash)
+                VALUES (?, ?, ?, ?)
+                ''', (filename, round(float(size) / (1024 * 1024), 2), final_filename, content_hash))
+                conn.commit()
+                invalidate_counts("file_records")
+                record = dict(conn.execute("SELECT * FROM file_records WHERE id = ?", (cursor.lastrowid,)).fetchone())
+                index_file(record['id'], record['filename'])
+                submit_probe(record)
+                return record, False
+            except sqlite3.IntegrityError:
+                # 并发上传了同样的内容，对方先写入了记录
+                os.remove(VIDEO_DIR / final_filename)
+                existing = conn.execute("SELECT * FROM file_records WHERE content_hash = ?",
+                                        (content_hash,)).fetchone()
+                return dict(existing), True
+
+        existing_path = VIDEO_DIR / existing['file_path']
+        if existing_path.exists():
+            os.remove(part_path)
+        else:
+            os.replace(part_path, existing_path)
+        return dict(existing), True
+
+
+# ---------------------------
+# 分片 / 断点续传（思路同 tus：init → append（带 offset）→ complete）
+# ---------------------------
+# 会话 id -> (已参与哈希的字节数, sha256 对象)；进程重启后丢失，续传时按已落盘部分重新计算
+_session_hashers = {}
+_session_locks = {}
+_session_locks_guard = threading.Lock()
+
+
+def _session_lock(upload_id):
+    with _session_locks_guard:
+        return _session_locks.setdefault(upload_id, threading.Lock())
+
+
+def _session_part_path(upload_id):
+    return VIDEO_DIR / f".{upload_id}.part"
+
+
+def create_upload_session(filename, size=None):
+    VIDEO_DIR.mkdir(exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    _session_part_path(upload_id).touch()
+    with _connect() as conn:
+        conn.execute("INSERT INTO upload_sessions (id, filename, size) VALUES (?, ?, ?)", (upload_id, filename, size))
+        conn.commit()
+    return get_upload_session(upload_id)
+
+
+def get_upload_session(upload_id):
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM upload_sessions WHERE id = ?", (upload_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def _session_hasher(upload_id, offset):
+    cached = _session_hashers.get(upload_id)
+    if cached is not None and cached[0] == offset:
+        return cached[1]
+    sha256 = hashlib.sha256()
+    remaining = offset
+    with open(_session_part_path(upload_id), 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            sha256.update(chunk)
+            remaining -= len(chunk)
+    return sha256
+
+
+def append_upload_chunk(upload_id, offset, stream):
+    """
+    从 offset 处追加一段数据并返回新的 offset。
+    offset 必须等于服务端已确认的 offset，否则抛 UploadOffsetMismatch；
+    连接中途断开时，已经写入的部分仍然会被确认，客户端查询 offset 后从断点继续。
+    """
+    with _session_lock(upload_id):
+        session = get_upload_session(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        if offset != session['offset']:
+            raise UploadOffsetMismatch(session['offset'])
+        sha256 = _session_hasher(upload_id, offset)
+        written = 0
+        try:
+            with open(_session_part_path(upload_id), 'r+b') as f:
+                # 丢掉上次断开时未确认的尾巴
+                f.seek(offset)
+                f.truncate()
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    if session['size'] is not None and offset + written + len(chunk) > session['size']:
+                        raise ValueError("chunk exceeds declared upload size")
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    written += len(chunk)
+        finally:
+            new_offset = offset + written
+            _session_hashers[upload_id] = (new_offset, sha256)
+            with _connect() as conn:
+                conn.execute("UPDATE upload_sessions SET offset = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                             (new_offset, upload_id))
+                conn.commit()
+        return new_offset
+
+
+def complete_upload_session(upload_id, filename=None):
+    """所有分片到齐后登记为素材，返回 (record, duplicate)。"""
+    with _session_lock(upload_id):
+        session = get_upload_session(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        if session['size'] is not None and session['offset'] != session['size']:
+            raise UploadOffsetMismatch(session['offset'])
+        sha256 = _session_hasher(upload_id, session['offset'])
+        result = _register_material(_session_part_path(upload_id), filename or session['filename'],
+                                    sha256.hexdigest(), session['offset'])
+        with _connect() as conn:
+            conn.execute("DELETE FROM upload_sessions WHERE id = ?", (upload_id,))
+            conn.commit()
+    _session_hashers.pop(upload_id, None)
+    with _session_locks_guard:
+        _session_locks.pop(upload_id, None)
+    return result
+
+
+# videoFile 下的文件名 -> 内容哈希；文件名带 uuid，内容不会变，可以一直缓存
+_hash_cache = {}
+
+
+def lookup_content_hash(file_name):
+    """只查库不现算，给 /getFile 生成 ETag 用；没有记录返回 None。"""
+    content_hash = _hash_cache.get(file_name)
+    if content_hash is None:
+        with _connect() as conn:
+            row = conn.execute("SELECT content_hash FROM file_records WHERE file_path = ?", (file_name,)).fetchone()
+        if row is None or not row['content_hash']:
+            return None
+        content_hash = _hash_cache[file_name] = row['content_hash']
+    return content_hash
+
+
+def get_content_hash(file_path) -> str:
+    """按 videoFile 下的文件查内容哈希；库里没有（老数据 / 手动放入的文件）就现算并回填。"""
+    file_path = Path(file_path)
+    with _connect() as conn:
+        row = conn.execute("SELECT id, content_hash FROM file_records WHERE file_path = ?",
+                           (file_path.name,)).fetchone()
+    if row is not None and row['content_hash']:
+        return row['content_hash']
+    content_hash = hash_file(file_path)
+    if row is not None:
+        try:
+            with _connect() as conn:
+                conn.execute("UPDATE file_records SET content_hash = ? WHERE id = ?", (content_hash, row['id']))
+                conn.commit()
+        except sqlite3.IntegrityError:
+            # 已有别的记录是同样的内容，保持原样
+            pass
+    return content_hash
+
+
+def claim_publication(content_hash, platform, account, job_id=None):
+    """
+    发布前在台账里占位：已被其它任务发布 / 占用则抛 DuplicatePublication。
+    同一任务的重试可以重复认领（续传由上传断点负责）。
+    """
+    with _connect() as conn:
+        try:
+            conn.execute('''
+            INSERT INTO publications (content_hash, platform, account, job_id, status) VALUES (?, ?, ?, ?, ?)
+            ''', (content_hash, platform, str(account), job_id, PUBLICATION_PUBLISHING))
+            conn.commit()
+            return
+        except sqlite3.IntegrityError:
+            row = conn.execute('''
+            SELECT * FROM publications WHERE content_hash = ? AND platform = ? AND account = ?
+            ''', (content_hash, platform, str(account))).fetchone()
+    if row is None or (job_id is not None and row['job_id'] == job_id):
+        return
+    state = "已发布过" if row['status'] == PUBLICATION_PUBLISHED else "正在发布"
+    raise DuplicatePublication(f"{platform} {account} {state}该素材（任务 {row['job_id']}）")
+
+
+def finish_publication(content_hash, platform, account, published):
+    """发布成功则记为 published；失败则释放占位，允许之后重新发布。"""
+    with _connect() as conn:
+        if published:
+            conn.execute('''
+            UPDATE publications SET status = ? WHERE content_hash = ? AND platform = ? AND account = ?
+            ''', (PUBLICATION_PUBLISHED, content_hash, platform, str(account)))
+        else:
+            conn.execute('''
+            DELETE FROM publications WHERE content_hash = ? AND platform = ? AND account = ? AND status = ?
+            ''', (content_hash, platform, str(account), PUBLICATION_PUBLISHING))
+        conn.commit()
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from conf import JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL, PLATFORM_CONCURRENCY, PREVIEW_AUTO_COVER
+from myUtils.fileStore import DuplicatePublication, get_content_hash, claim_publication, finish_publication
+from myUtils.postVideo import UPLOAD_APP_BUILDERS, PLATFORM_NAMES
+from myUtils.previews import get_poster_path
+from myUtils.transcode import get_upload_file
+from utils.browser_pool import get_browser_pool_service
+from utils.db import get_connection
+from utils.upload_checkpoint import UploadCheckpoint, UploadStage, PublishStateUnknown
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCESS = "success"
+JOB_FAILED = "failed"
+
+
+class UploadNotPublished(Exception):
+    """上传器正常返回但没有发布（如抖音购物车额度已满、添加商品失败），重试也一样，直接标记失败。"""
+
+
+def _connect():
+    # 认领 / 恢复任务时显式 BEGIN IMMEDIATE，保证是原子的
+    return get_connection(sqlite3.Row)
+
+
+def enqueue_jobs(payloads, batch_id=None, max_attempts=JOB_MAX_ATTEMPTS):
+    """写入一批发布任务，返回 (batch_id, [job_id, ...])。"""
+    batch_id = batch_id or uuid.uuid4().hex
+    job_ids = []
+    with _connect() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        for payload in payloads:
+            cursor = conn.execute('''
+            INSERT INTO publish_jobs (batch_id, type, payload, max_attempts)
+            VALUES (?, ?, ?, ?)
+            ''', (batch_id, payload.get('type'), json.dumps(payload, ensure_ascii=False), max_attempts))
+            job_ids.append(cursor.lastrowid)
+        conn.execute('COMMIT')
+    get_job_worker_pool().notify()
+    return batch_id, job_ids
+
+
+def claim_job(worker, exclude_types=()):
+    """认领最早的排队任务；exclude_types 里的平台已达到并发上限，暂不认领。"""
+    exclude_types = list(exclude_types)
+    type_filter = f"AND type NOT IN ({','.join('?' for _ in exclude_types)})" if exclude_types else ""
+    with _connect() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(f'''
+        SELECT * FROM publish_jobs WHERE status = ? {type_filter} ORDER BY id LIMIT 1
+        ''', [JOB_QUEUED] + exclude_types).fetchone()
+        if row is None:
+            conn.execute('COMMIT')
+            return None
+        conn.execute('''
+        UPDATE publish_jobs
+        SET status = ?, attempts = attempts + 1, worker = ?, started_at = CURRENT_TIMESTAMP,
+            finished_at = NULL, error = NULL
+        WHERE id = ?
+        ''', (JOB_RUNNING, worker, row['id']))
+        conn.execute('COMMIT')
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+
+def finish_job(job, error=None):
+    if error is None:
+        status = JOB_SUCCESS
+    elif job['attempts'] < job['max_attempts']:
+        # 还有重试次数，放回队列
+        status = JOB_QUEUED
+    else:
+        status = JOB_FAILED
+    with _connect() as conn:
+        conn.execute('''
+        UPDATE publish_jobs SET status = ?, error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (status, error, job['id']))
+    return status
+
+
+def recover_jobs():
+    """进程重启后，把上次没跑完的 running 任务重新放回队列（次数用完的标记失败）。"""
+    with _connect() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('''
+        UPDATE publish_jobs SET status = ?, error = '进程中断'
+        WHERE status = ? AND attempts >= max_attempts
+        ''', (JOB_FAILED, JOB_RUNNING))
+        conn.execute('''
+        UPDATE publish_jobs SET status = ? WHERE status = ?
+        ''', (JOB_QUEUED, JOB_RUNNING))
+        conn.execute('COMMIT')
+
+
+def get_jobs(job_ids=None, batch_id=None):
+    with _connect() as conn:
+        if batch_id:
+            rows = conn.execute('SELECT * FROM publish_jobs WHERE batch_id = ? ORDER BY id', (batch_id,)).fetchall()
+        else:
+            placeholders = ','.join('?' for _ in job_ids)
+            rows = conn.execute(f'SELECT * FROM publish_jobs WHERE id IN ({placeholders}) ORDER BY id',
+                                list(job_ids)).fetchall()
+    jobs = []
+    for row in rows:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        jobs.append(job)
+    return jobs
+
+
+async def run_publish_job(job, browser_pool):
+    data = json.loads(job['payload'])
+    builder = UPLOAD_APP_BUILDERS.get(data.get('type'))
+    if builder is None:
+        raise ValueError(f"unsupported type: {data.get('type')}")
+    category = data.get('category')
+    if category == 0:
+        category = None
+    apps = builder(data.get('title'), data.get('fileList', []), data.get('tags'), data.get('accountList', []),
+                   category, data.get('enableTimer'), data.get('videosPerDay'), data.get('dailyTimes'),
+                   data.get('startDays'), browser_pool=browser_pool)
+    platform = PLATFORM_NAMES[data.get('type')]
+    duplicates = []
+    for app in apps:
+        # 启动浏览器前先查发布台账：同一素材不重复发到同一账号
+        account = Path(app.account_file).name
+        content_hash = await asyncio.to_thread(get_content_hash, app.file_path)
+        try:
+            await asyncio.to_thread(claim_publication, content_hash, platform, account, job['id'])
+        except DuplicatePublication as e:
+            print(f"[job] 任务 {job['id']} 跳过：{e}")
+            duplicates.append(str(e))
+            continue
+        # 同一任务的每次重试共用断点，已完成的视频 / 账号不会重复上传
+        app.checkpoint = await asyncio.to_thread(UploadCheckpoint, job['id'], platform, app.account_file, app.file_path)
+        # 没指定封面时用入库时生成的封面（抖音 / 小红书上传器支持 thumbnail_path）
+        if PREVIEW_AUTO_COVER and hasattr(app, 'thumbnail_path') and not app.thumbnail_path:
+            app.thumbnail_path = await asyncio.to_thread(get_poster_path, app.file_path)
+        # 挂车信息（抖音上传器支持 product_url / product_title，需两项都有）
+        if hasattr(app, 'product_url') and data.get('productUrl') and data.get('productTitle'):
+            app.product_url, app.product_title = data['productUrl'], data['productTitle']
+        # 开启转码时换成该平台的变体（按内容哈希缓存，同一素材发多个账号只转一次）
+        app.file_path = await asyncio.to_thread(get_upload_file, app.file_path, platform)
+        try:
+            result = await app.main()
+            # 抖音上传器不发布时返回 (False, 原因) 而不抛异常；其它上传器返回 None，以断点是否到 PUBLISHED 为准
+            if not app.checkpoint.reached(UploadStage.PUBLISHED):
+                reason = result[1] if isinstance(result, tuple) and len(result) > 1 else "上传结束但未确认发布"
+                raise UploadNotPublished(f"{Path(app.file_path).name} 未发布到 {account}：{reason}")
+        finally:
+            # 停在“点击发布”时结果未知，保留占位，避免别的任务重复发布
+            if not app.checkpoint.reached(UploadStage.PUBLISHING) or app.checkpoint.reached(UploadStage.PUBLISHED):
+                await asyncio.to_thread(finish_publication, content_hash, platform, account,
+                                        app.checkpoint.reached(UploadStage.PUBLISHED))
+    if apps and len(duplicates) == len(apps):
+        raise DuplicatePublication("；".join(duplicates))
+
+
+async def execute_job(job, browser_pool):
+    """执行一条已认领的任务并写回结果，返回 (任务状态, 错误信息)。"""
+    error = None
+    try:
+        await run_publish_job(job, browser_pool)
+    except (PublishStateUnknown, DuplicatePublication, UploadNotPublished) as e:
+        # 是否已发布无法确认 / 已发布过 / 上传器主动放弃发布，重试没有意义，直接标记失败交给人工核实
+        job['attempts'] = job['max_attempts']
+        error = f"{type(e).__name__}: {e}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return await asyncio.to_thread(finish_job, job, error), error
+
+
+class JobWorkerPool(object):
+    """
+    在浏览器池所在的长驻事件循环里跑 size 个 worker 协程，
+    每个 worker 循环认领 publish_jobs 里的任务并调用对应上传器执行。
+    """
+
+    def __init__(self, size=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.service = get_browser_pool_service()
+        self.host = socket.gethostname()
+        self._wakeup = None
+        self._started = False
+        # 每个平台正在执行的任务数，用于 PLATFORM_CONCURRENCY 限制
+        self._running = {}
+        self._claim_lock = None
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        recover_jobs()
+        self.service.run(self._create_wakeup_event())
+        for index in range(self.size):
+            self.service.submit(self._worker(f"{self.host}-{index}"))
+
+    async def _create_wakeup_event(self):
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+
+    def notify(self):
+        # 有新任务时立刻唤醒空闲 worker，不用等下一次轮询
+        if self._wakeup is not None:
+            self.service.loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _saturated_types(self):
+        return [type for type, platform in PLATFORM_NAMES.items()
+                if self._running.get(type, 0) >= PLATFORM_CONCURRENCY.get(platform, self.size)]
+
+    async def _worker(self, name):
+        while True:
+            # 认领和计数放在同一把锁里，避免多个 worker 同时突破平台并发上限
+            async with self._claim_lock:
+                try:
+                    job = await asyncio.to_thread(claim_job, name, self._saturated_types())
+                except sqlite3.Error as e:
+                    print(f"[job] {name} 认领任务失败: {e}")
+                    job = None
+                if job is not None:
+                    self._running[job['type']] = self._running.get(job['type'], 0) + 1
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            print(f"[job] {name} 开始执行任务 {job['id']}（第 {job['attempts']} 次）")
+            start = time.monotonic()
+            try:
+                status, error = await execute_job(job, self.service.pool)
+            finally:
+                self._running[job['type']] -= 1
+                # 平台名额空出来了，唤醒其它 worker 继续认领
+                self._wakeup.set()
+            print(f"[job] 任务 {job['id']} {status}，耗时 {time.monotonic() - start:.1f}s" + (f"，错误：{error}" if error else ""))
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_job_worker_pool() -> JobWorkerPool:
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = JobWorkerPool()
+            _worker_pool.start()
+        return _worker_pool
@@ -0,0 +1,131 @@
+import base64
+import json
+import sqlite3
+import threading
+import time
+
+from conf import LISTING_COUNT_TTL, LISTING_MAX_LIMIT
+from utils.db import get_connection
+
+# 可排序字段 -> 列名；翻页统一按（排序列, id）做 keyset，排序列都有索引
+FILE_SORT_FIELDS = {
+    "upload_time": "upload_time",
+    "filesize": "filesize",
+    "filename": "filename",
+    "id": "id",
+}
+ACCOUNT_SORT_FIELDS = {
+    "id": "id",
+    "userName": "userName",
+}
+
+# (表名, 过滤条件) -> (时间, 总数)；写入时按表失效，其余情况 LISTING_COUNT_TTL 秒后重新统计
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def invalidate_counts(table):
+    with _count_lock:
+        for key in [key for key in _count_cache if key[0] == table]:
+            _count_cache.pop(key, None)
+
+
+def _cached_count(conn, table, where, params):
+    key = (table, where, tuple(params))
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and now - cached[0] < LISTING_COUNT_TTL:
+            return cached[1]
+    total = conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+    with _count_lock:
+        _count_cache[key] = (now, total)
+    return total
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+def _page(table, conditions, params, sort_fields, sort, order, limit, cursor):
+    if sort not in sort_fields:
+        raise ValueError(f"invalid sort: {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"invalid order: {order}")
+    limit = max(1, min(int(limit), LISTING_MAX_LIMIT))
+    column = sort_fields[sort]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        compare = "<" if order == "desc" else ">"
+        if column == "id":
+            page_conditions.append(f"id {compare} ?")
+            page_params.append(row_id)
+        else:
+            page_conditions.append(f"({column}, id) {compare} (?, ?)")
+            page_params.extend([value, row_id])
+    page_where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+    direction = order.upper()
+    order_by = "id " + direction if column == "id" else f"{column} {direction}, id {direction}"
+
+    with get_connection(sqlite3.Row) as conn:
+        rows = conn.execute(f"SELECT * FROM {table} {page_where} ORDER BY {order_by} LIMIT ?",
+                            page_params + [limit + 1]).fetchall()
+        total = _cached_count(conn, table, where, params)
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last[column], last["id"])
+    return {"items": items, "total": total, "nextCursor": next_cursor}
+
+
+def list_files(keyword=None, min_size=None, max_size=None, uploaded_from=None, uploaded_to=None,
+               sort="upload_time", order="desc", limit=50, cursor=None):
+    """素材分页：文件名关键字、大小区间（MB）、上传时间区间过滤。"""
+    conditions, params = [], []
+    if keyword:
+        conditions.append("filename LIKE ? ESCAPE '\\'")
+        escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    if min_size is not None:
+        conditions.append("filesize >= ?")
+        params.append(min_size)
+    if max_size is not None:
+        conditions.append("filesize <= ?")
+        params.append(max_size)
+    if uploaded_from:
+        conditions.append("upload_time >= ?")
+        params.append(uploaded_from)
+    if uploaded_to:
+        conditions.append("upload_time <= ?")
+        params.append(uploaded_to)
+    return _page("file_records", conditions, params, FILE_SORT_FIELDS, sort, order, limit, cursor)
+
+
+def list_accounts(type=None, status=None, keyword=None, sort="id", order="asc", limit=50, cursor=None):
+    """账号分页：平台、cookie 状态、用户名关键字过滤（只读库，不做 cookie 校验）。"""
+    conditions, params = [], []
+    if type is not None:
+        conditions.append("type = ?")
+        params.append(type)
+    if status is not None:
+        conditions.append("status = ?")
+        params.append(status)
+    if keyword:
+        conditions.append("userName LIKE ? ESCAPE '\\'")
+        escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    return _page("user_info", conditions, params, ACCOUNT_SORT_FIELDS, sort, order, limit, cursor)
@@ -1,5 +1,4 @@
 import asyncio
-import sqlite3
 
 from playwright.async_api import async_playwright
 
@@ -8,6 +7,8 @@ from utils.base_social_media import set_init_script
 import uuid
 from pathlib import Path
 from conf import BASE_DIR
+from utils.db import get_connection
+from myUtils.listing import invalidate_counts
 
 # 抖音登录
 async def douyin_cookie_gen(id,status_queue):
@@ -61,13 +62,14 @@ async def douyin_cookie_gen(id,status_queue):
         await page.close()
         await context.close()
         await browser.close()
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                                 INSERT INTO user_info (type, filePath, userName, status)
                                 VALUES (?, ?, ?, ?)
                                 ''', (3, f"{uuid_v1}.json", id, 1))
             conn.commit()
+            invalidate_counts("user_info")
             print("✅ 用户状态已记录")
         status_queue.put("200")
 
@@ -137,13 +139,14 @@ async def get_tencent_cookie(id,status_queue):
         await context.close()
         await browser.close()
 
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                                 INSERT INTO user_info (type, filePath, userName, status)
                                 VALUES (?, ?, ?, ?)
                                 ''', (2, f"{uuid_v1}.json", id, 1))
             conn.commit()
+            invalidate_counts("user_info")
             print("✅ 用户状态已记录")
         status_queue.put("200")
 
@@ -208,13 +211,14 @@ async def get_ks_cookie(id,status_queue):
         await context.close()
         await browser.close()
 
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                                         INSERT INTO user_info (type, filePath, userName, status)
                                         VALUES (?, ?, ?, ?)
                                         ''', (4, f"{uuid_v1}.json", id, 1))
             conn.commit()
+            invalidate_counts("user_info")
             print("✅ 用户状态已记录")
         status_queue.put("200")
 
@@ -279,13 +283,14 @@ async def xiaohongshu_cookie_gen(id,status_queue):
         await context.close()
         await browser.close()
 
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                            INSERT INTO user_info (type, filePath, userName, status)
                            VALUES (?, ?, ?, ?)
                            ''', (1, f"{uuid_v1}.json", id, 1))
             conn.commit()
+            invalidate_counts("user_info")
             print("✅ 用户状态已记录")
         status_queue.put("200")
 
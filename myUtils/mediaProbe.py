@@ -0,0 +1,152 @@
+import json
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+
+from conf import BASE_DIR, FFPROBE_PATH, MEDIA_PROBE_WORKERS, MEDIA_PROBE_TIMEOUT
+from myUtils.previews import submit_previews
+from utils.db import get_connection
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+
+# file_records 上的探测结果列；probed_at 为空表示还没探测过
+PROBE_FIELDS = ("duration", "width", "height", "video_codec", "audio_codec", "bitrate", "fps")
+
+_executor = None
+_executor_lock = threading.Lock()
+# 正在探测的素材 id，避免上传和启动补探测重复提交
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+class MediaProbeError(Exception):
+    """ffprobe 不可用或文件无法解析。"""
+
+
+def _frame_rate(value):
+    try:
+        rate = Fraction(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return round(float(rate), 3) if rate > 0 else None
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float_or_none(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_media(path) -> dict:
+    """
+    用 ffprobe 读出时长（秒）、宽高、视频 / 音频编码、码率（bit/s）和帧率。
+    在子进程池里执行，所以只接收路径、只返回普通 dict。
+    """
+    try:
+        completed = subprocess.run(
+            [FFPROBE_PATH, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", str(path)],
+            capture_output=True, timeout=MEDIA_PROBE_TIMEOUT,
+        )
+    except FileNotFoundError:
+        raise MediaProbeError(f"找不到 ffprobe（{FFPROBE_PATH}），请安装 ffmpeg 或修改 conf.py 的 FFPROBE_PATH")
+    except subprocess.TimeoutExpired:
+        raise MediaProbeError(f"ffprobe 超过 {MEDIA_PROBE_TIMEOUT} 秒未返回")
+    if completed.returncode != 0:
+        raise MediaProbeError(completed.stderr.decode("utf-8", "replace").strip() or "ffprobe failed")
+    data = json.loads(completed.stdout or b"{}")
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    fmt = data.get("format", {})
+    if video is None:
+        raise MediaProbeError("文件中没有视频流")
+    return {
+        "duration": _float_or_none(fmt.get("duration") or video.get("duration")),
+        "width": _int_or_none(video.get("width")),
+        "height": _int_or_none(video.get("height")),
+        "video_codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "bitrate": _int_or_none(fmt.get("bit_rate") or video.get("bit_rate")),
+        "fps": _frame_rate(video.get("avg_frame_rate")) or _frame_rate(video.get("r_frame_rate")),
+    }
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=MEDIA_PROBE_WORKERS)
+        return _executor
+
+
+def save_probe_result(record_id, info=None, error=None):
+    info = info or {}
+    with get_connection() as conn:
+        conn.execute(f'''
+        UPDATE file_records
+        SET {", ".join(f"{field} = ?" for field in PROBE_FIELDS)}, probe_error = ?, probed_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        ''', [info.get(field) for field in PROBE_FIELDS] + [error, record_id])
+
+
+def submit_probe(record):
+    """把素材交给进程池后台探测，结果写回 file_records；同一素材正在探测时不重复提交。"""
+    record_id = record["id"]
+    with _pending_lock:
+        if record_id in _pending:
+            return None
+        _pending.add(record_id)
+
+    def on_done(future):
+        try:
+            info = future.result()
+        except Exception as e:
+            save_probe_result(record_id, error=str(e))
+            print(f"⚠️ 素材 {record['filename']} 探测失败：{e}")
+        else:
+            save_probe_result(record_id, info=info)
+            submit_previews(record, info)
+        finally:
+            with _pending_lock:
+                _pending.discard(record_id)
+
+    future = _get_executor().submit(probe_media, VIDEO_DIR / record["file_path"])
+    future.add_done_callback(on_done)
+    return future
+
+
+def probe_pending_files():
+    """启动时补探测还没有结果的素材（老素材、上次进程退出时没探测完的），返回提交数。"""
+    with get_connection(sqlite3.Row) as conn:
+        rows = conn.execute("SELECT id, filename, file_path FROM file_records WHERE probed_at IS NULL").fetchall()
+    submitted = 0
+    for row in rows:
+        if (VIDEO_DIR / row["file_path"]).exists() and submit_probe(dict(row)) is not None:
+            submitted += 1
+    return submitted
+
+
+def get_media_info(file_path):
+    """
+    按素材路径（videoFile 下的文件名，或带目录的完整路径）读取探测结果；
+    没有对应记录或还没探测完返回 None。
+    """
+    with get_connection(sqlite3.Row) as conn:
+        row = conn.execute(f'''
+        SELECT {", ".join(PROBE_FIELDS)}, probe_error, probed_at FROM file_records WHERE file_path = ?
+        ''', (Path(file_path).name,)).fetchone()
+    if row is None or row["probed_at"] is None:
+        return None
+    return dict(row)
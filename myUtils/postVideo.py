@@ -1,4 +1,3 @@
-import asyncio
 from pathlib import Path
 
 from conf import BASE_DIR
@@ -6,18 +5,21 @@ from uploader.douyin_uploader.main import DouYinVideo
 from uploader.ks_uploader.main import KSVideo
 from uploader.tencent_uploader.main import TencentVideo
 from uploader.xiaohongshu_uploader.main import XiaoHongShuVideo
+from utils.base_social_media import SOCIAL_MEDIA_XIAOHONGSHU, SOCIAL_MEDIA_TENCENT, SOCIAL_MEDIA_DOUYIN, SOCIAL_MEDIA_KUAISHOU
+from utils.browser_pool import get_browser_pool_service
 from utils.constant import TencentZoneTypes
 from utils.files_times import generate_schedule_time_next_day
 
 
-def post_video_tencent(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+def build_tencent_apps(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0,browser_pool=None):
     # 生成文件的完整路径
     account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
     files = [Path(BASE_DIR / "videoFile" / file) for file in files]
     if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times,start_days)
+        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times, start_days=start_days)
     else:
         publish_datetimes = [0 for i in range(len(files))]
+    apps = []
     for index, file in enumerate(files):
         for cookie in account_file:
             print(f"文件路径{str(file)}")
@@ -25,18 +27,19 @@ def post_video_tencent(title,files,tags,account_file,category=TencentZoneTypes.L
             print(f"视频文件名：{file}")
             print(f"标题：{title}")
             print(f"Hashtag：{tags}")
-            app = TencentVideo(title, str(file), tags, publish_datetimes[index], cookie, category)
-            asyncio.run(app.main(), debug=False)
+            apps.append(TencentVideo(title, str(file), tags, publish_datetimes[index], cookie, category, browser_pool=browser_pool))
+    return apps
 
 
-def post_video_DouYin(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+def build_douyin_apps(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0,browser_pool=None):
     # 生成文件的完整路径
     account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
     files = [Path(BASE_DIR / "videoFile" / file) for file in files]
     if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times,start_days)
+        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times, start_days=start_days)
     else:
         publish_datetimes = [0 for i in range(len(files))]
+    apps = []
     for index, file in enumerate(files):
         for cookie in account_file:
             print(f"文件路径{str(file)}")
@@ -44,18 +47,19 @@ def post_video_DouYin(title,files,tags,account_file,category=TencentZoneTypes.LI
             print(f"视频文件名：{file}")
             print(f"标题：{title}")
             print(f"Hashtag：{tags}")
-            app = DouYinVideo(title, str(file), tags, publish_datetimes[index], cookie)
-            asyncio.run(app.main(), debug=False)
+            apps.append(DouYinVideo(title, str(file), tags, publish_datetimes[index], cookie, browser_pool=browser_pool))
+    return apps
 
 
-def post_video_ks(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+def build_ks_apps(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0,browser_pool=None):
     # 生成文件的完整路径
     account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
     files = [Path(BASE_DIR / "videoFile" / file) for file in files]
     if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times,start_days)
+        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times, start_days=start_days)
     else:
         publish_datetimes = [0 for i in range(len(files))]
+    apps = []
     for index, file in enumerate(files):
         for cookie in account_file:
             print(f"文件路径{str(file)}")
@@ -63,26 +67,67 @@ def post_video_ks(title,files,tags,account_file,category=TencentZoneTypes.LIFEST
             print(f"视频文件名：{file}")
             print(f"标题：{title}")
             print(f"Hashtag：{tags}")
-            app = KSVideo(title, str(file), tags, publish_datetimes[index], cookie)
-            asyncio.run(app.main(), debug=False)
+            apps.append(KSVideo(title, str(file), tags, publish_datetimes[index], cookie, browser_pool=browser_pool))
+    return apps
 
-def post_video_xhs(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+
+def build_xhs_apps(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0,browser_pool=None):
     # 生成文件的完整路径
     account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
     files = [Path(BASE_DIR / "videoFile" / file) for file in files]
     file_num = len(files)
     if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(file_num, videos_per_day, daily_times,start_days)
+        publish_datetimes = generate_schedule_time_next_day(file_num, videos_per_day, daily_times, start_days=start_days)
     else:
         publish_datetimes = 0
+    apps = []
     for index, file in enumerate(files):
         for cookie in account_file:
             # 打印视频文件名、标题和 hashtag
             print(f"视频文件名：{file}")
             print(f"标题：{title}")
             print(f"Hashtag：{tags}")
-            app = XiaoHongShuVideo(title, file, tags, publish_datetimes, cookie)
-            asyncio.run(app.main(), debug=False)
+            apps.append(XiaoHongShuVideo(title, file, tags, publish_datetimes, cookie, browser_pool=browser_pool))
+    return apps
+
+
+# 平台标识 -> 上传器构建函数（1 小红书 2 视频号 3 抖音 4 快手）
+UPLOAD_APP_BUILDERS = {
+    1: build_xhs_apps,
+    2: build_tencent_apps,
+    3: build_douyin_apps,
+    4: build_ks_apps,
+}
+
+PLATFORM_NAMES = {
+    1: SOCIAL_MEDIA_XIAOHONGSHU,
+    2: SOCIAL_MEDIA_TENCENT,
+    3: SOCIAL_MEDIA_DOUYIN,
+    4: SOCIAL_MEDIA_KUAISHOU,
+}
+
+
+def run_upload_apps(builder, *args):
+    # 整批任务共用长驻浏览器池，只在池里没有可用浏览器时才冷启动 Chromium
+    pool_service = get_browser_pool_service()
+    for app in builder(*args, browser_pool=pool_service.pool):
+        pool_service.run(app.main())
+
+
+def post_video_tencent(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+    run_upload_apps(build_tencent_apps, title, files, tags, account_file, category, enableTimer, videos_per_day, daily_times, start_days)
+
+
+def post_video_DouYin(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+    run_upload_apps(build_douyin_apps, title, files, tags, account_file, category, enableTimer, videos_per_day, daily_times, start_days)
+
+
+def post_video_ks(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+    run_upload_apps(build_ks_apps, title, files, tags, account_file, category, enableTimer, videos_per_day, daily_times, start_days)
+
+
+def post_video_xhs(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
+    run_upload_apps(build_xhs_apps, title, files, tags, account_file, category, enableTimer, videos_per_day, daily_times, start_days)
 
 
 
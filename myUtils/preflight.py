@@ -0,0 +1,227 @@
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from conf import BASE_DIR, TRANSCODE_ENABLED, PLATFORM_TRANSCODE_PROFILES
+from myUtils.mediaProbe import get_media_info
+from utils.base_social_media import SOCIAL_MEDIA_XIAOHONGSHU, SOCIAL_MEDIA_TENCENT, SOCIAL_MEDIA_DOUYIN, \
+    SOCIAL_MEDIA_KUAISHOU, clean_str_for_short_title, format_str_for_short_title
+from utils.files_times import generate_schedule_time_next_day
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+COOKIE_DIR = Path(BASE_DIR / "cookiesFile")
+
+# 问题级别：error 拒绝入队；fixed 已自动修正（修正后的内容写入任务）；warning 仅提示
+LEVEL_ERROR = "error"
+LEVEL_FIXED = "fixed"
+LEVEL_WARNING = "warning"
+
+# 各平台发布限制（以创作者中心网页端的说明为准，平台调整时改这里）：
+#   title_max / title_min  标题字数；tags_max 话题个数（超出的丢弃）
+#   short_title_min / short_title_max  视频号短标题字数（由标题过滤特殊字符后生成）
+#   product_title_max      抖音挂车商品短标题字数
+#   max_size_mb            文件大小上限；min_duration / max_duration 时长（秒）
+#   min_short_side         分辨率短边下限；video_codecs 可上传的视频编码
+#   schedule_min_ahead / schedule_max_ahead  定时发布距现在的最短 / 最长时间
+PLATFORM_RULES = {
+    SOCIAL_MEDIA_DOUYIN: {
+        "title_max": 30,
+        "product_title_max": 10,
+        "max_size_mb": 16 * 1024,
+        "max_duration": 60 * 60,
+        "min_short_side": 360,
+        "video_codecs": ("h264", "hevc"),
+        "schedule_min_ahead": timedelta(hours=2),
+        "schedule_max_ahead": timedelta(days=14),
+    },
+    SOCIAL_MEDIA_TENCENT: {
+        "title_max": 1000,
+        "short_title_min": 6,
+        "short_title_max": 16,
+        "max_size_mb": 20 * 1024,
+        "max_duration": 8 * 60 * 60,
+        "min_short_side": 360,
+        "video_codecs": ("h264", "hevc"),
+        "schedule_max_ahead": timedelta(days=30),
+    },
+    SOCIAL_MEDIA_KUAISHOU: {
+        "tags_max": 3,
+        "max_size_mb": 4 * 1024,
+        "max_duration": 15 * 60,
+        "min_short_side": 360,
+        "video_codecs": ("h264", "hevc"),
+        "schedule_min_ahead": timedelta(hours=1),
+        "schedule_max_ahead": timedelta(days=14),
+    },
+    SOCIAL_MEDIA_XIAOHONGSHU: {
+        "title_max": 20,
+        "tags_max": 10,
+        "max_size_mb": 20 * 1024,
+        "max_duration": 4 * 60 * 60,
+        "min_short_side": 360,
+        "video_codecs": ("h264", "hevc"),
+        "schedule_min_ahead": timedelta(hours=1),
+        "schedule_max_ahead": timedelta(days=14),
+    },
+}
+
+
+def _issue(level, field, msg):
+    return {"level": level, "field": field, "msg": msg}
+
+
+def _normalize_daily_times(daily_times, issues):
+    # 排期按整点计算，前端传的 "10:00" 转成 10
+    hours = []
+    for value in daily_times:
+        hour = value
+        if isinstance(value, str):
+            hour_text, _, minute_text = value.partition(":")
+            try:
+                hour = int(hour_text)
+            except ValueError:
+                issues.append(_issue(LEVEL_ERROR, "dailyTimes", f"无法识别的发布时间：{value}"))
+                continue
+            if minute_text.strip("0"):
+                issues.append(_issue(LEVEL_FIXED, "dailyTimes", f"定时发布只精确到整点，{value} 按 {hour}:00 发布"))
+        if not isinstance(hour, int) or not 0 <= hour <= 23:
+            issues.append(_issue(LEVEL_ERROR, "dailyTimes", f"发布时间应为 0-23 点：{value}"))
+            continue
+        hours.append(hour)
+    return hours
+
+
+def _check_text(payload, rules, issues):
+    title = payload.get("title") or ""
+    title_max = rules.get("title_max")
+    if title_max and len(title) > title_max:
+        payload["title"] = title[:title_max]
+        issues.append(_issue(LEVEL_FIXED, "title", f"标题超过 {title_max} 字，已截断为「{payload['title']}」"))
+    title_min = rules.get("title_min")
+    if title_min and len(title) < title_min:
+        issues.append(_issue(LEVEL_ERROR, "title", f"标题至少 {title_min} 字"))
+
+    tags = payload.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split()
+    cleaned = [tag.strip().lstrip("#") for tag in tags if tag and tag.strip().lstrip("#")]
+    tags_max = rules.get("tags_max")
+    if tags_max and len(cleaned) > tags_max:
+        issues.append(_issue(LEVEL_FIXED, "tags", f"最多 {tags_max} 个话题，已丢弃：{'、'.join(cleaned[tags_max:])}"))
+        cleaned = cleaned[:tags_max]
+    payload["tags"] = cleaned
+
+    short_title_max = rules.get("short_title_max")
+    if short_title_max:
+        # 上传器用 format_str_for_short_title 从标题生成短标题：超长截断，不足用空格补齐
+        short_title = clean_str_for_short_title(payload.get("title") or "")
+        if len(short_title.strip()) < rules.get("short_title_min", 0):
+            issues.append(_issue(LEVEL_WARNING, "title",
+                                 f"标题去掉特殊字符后不足 {rules['short_title_min']} 字，短标题会用空格补齐，平台可能不接受"))
+        elif len(short_title) > short_title_max:
+            issues.append(_issue(LEVEL_FIXED, "title",
+                                 f"短标题最多 {short_title_max} 字，将使用「{format_str_for_short_title(short_title)}」"))
+
+    product_url, product_title = payload.get("productUrl"), payload.get("productTitle")
+    product_title_max = rules.get("product_title_max")
+    if product_url or product_title:
+        if not product_title_max:
+            issues.append(_issue(LEVEL_WARNING, "productUrl", "该平台不支持挂车，商品信息会被忽略"))
+        elif not (product_url and product_title):
+            issues.append(_issue(LEVEL_WARNING, "productUrl", "挂车需要同时填写商品链接和商品短标题，此次不挂车"))
+        elif len(product_title) > product_title_max:
+            payload["productTitle"] = product_title[:product_title_max]
+            issues.append(_issue(LEVEL_FIXED, "productTitle",
+                                 f"商品短标题超过 {product_title_max} 字，已截断为「{payload['productTitle']}」"))
+
+
+def _check_media(file_name, rules, issues, transcode=False):
+    path = VIDEO_DIR / file_name
+    field = f"fileList:{file_name}"
+    if not path.exists():
+        issues.append(_issue(LEVEL_ERROR, field, "素材文件不存在"))
+        return
+    max_size_mb = rules.get("max_size_mb")
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    if max_size_mb and size_mb > max_size_mb:
+        issues.append(_issue(LEVEL_ERROR, field, f"文件 {size_mb:.0f}MB 超过 {max_size_mb}MB 上限"))
+
+    info = get_media_info(file_name)
+    if info is None:
+        issues.append(_issue(LEVEL_WARNING, field, "素材还在探测中，未检查时长 / 分辨率 / 编码"))
+        return
+    if info["probe_error"]:
+        issues.append(_issue(LEVEL_ERROR, field, f"无法识别的视频文件：{info['probe_error']}"))
+        return
+    duration = info["duration"]
+    if duration is not None:
+        if rules.get("max_duration") and duration > rules["max_duration"]:
+            issues.append(_issue(LEVEL_ERROR, field, f"时长 {duration:.0f} 秒超过 {rules['max_duration']} 秒上限"))
+        if rules.get("min_duration") and duration < rules["min_duration"]:
+            issues.append(_issue(LEVEL_ERROR, field, f"时长 {duration:.0f} 秒不足 {rules['min_duration']} 秒"))
+    if rules.get("min_short_side") and info["width"] and info["height"]:
+        if min(info["width"], info["height"]) < rules["min_short_side"]:
+            issues.append(_issue(LEVEL_ERROR, field,
+                                 f"分辨率 {info['width']}x{info['height']} 过低，短边至少 {rules['min_short_side']}"))
+    codecs = rules.get("video_codecs")
+    if codecs and info["video_codec"] not in codecs:
+        if transcode:
+            issues.append(_issue(LEVEL_WARNING, field, f"视频编码 {info['video_codec']} 不受支持，发布前会先转码"))
+        else:
+            issues.append(_issue(LEVEL_ERROR, field,
+                                 f"视频编码 {info['video_codec']} 不受支持（支持 {'/'.join(codecs)}）"))
+
+
+def _check_schedule(payload, rules, issues):
+    if not payload.get("enableTimer"):
+        return
+    if not payload.get("videosPerDay"):
+        payload["videosPerDay"] = 1
+        issues.append(_issue(LEVEL_FIXED, "videosPerDay", "未指定每天发布数量，按每天 1 条"))
+    daily_times = payload.get("dailyTimes")
+    if daily_times:
+        payload["dailyTimes"] = daily_times = _normalize_daily_times(daily_times, issues)
+        if not daily_times:
+            return
+    try:
+        schedule = generate_schedule_time_next_day(len(payload.get("fileList") or []), payload["videosPerDay"],
+                                                   daily_times or None, start_days=payload.get("startDays") or 0)
+    except ValueError as e:
+        issues.append(_issue(LEVEL_ERROR, "videosPerDay", str(e)))
+        return
+    now = datetime.now()
+    min_ahead, max_ahead = rules.get("schedule_min_ahead"), rules.get("schedule_max_ahead")
+    for publish_time in schedule:
+        if min_ahead and publish_time - now < min_ahead:
+            issues.append(_issue(LEVEL_ERROR, "dailyTimes",
+                                 f"定时 {publish_time:%Y-%m-%d %H:%M} 距现在不足 {min_ahead.total_seconds() / 3600:g} 小时"))
+        if max_ahead and publish_time - now > max_ahead:
+            issues.append(_issue(LEVEL_ERROR, "startDays",
+                                 f"定时 {publish_time:%Y-%m-%d %H:%M} 超出平台允许的 {max_ahead.days} 天"))
+
+
+def check_payload(payload, platform):
+    """
+    按平台规则检查一条发布任务（/postVideo 请求体），能修正的直接改在返回的副本上。
+    返回 (修正后的 payload, [问题])，有 error 级别的问题时不应入队。
+    """
+    payload = dict(payload)
+    issues = []
+    rules = PLATFORM_RULES.get(platform, {})
+    if not payload.get("fileList"):
+        issues.append(_issue(LEVEL_ERROR, "fileList", "没有选择素材"))
+    if not payload.get("accountList"):
+        issues.append(_issue(LEVEL_ERROR, "accountList", "没有选择账号"))
+    for account in payload.get("accountList") or []:
+        if not (COOKIE_DIR / account).exists():
+            issues.append(_issue(LEVEL_ERROR, f"accountList:{account}", "账号 cookie 文件不存在，请重新登录"))
+    _check_text(payload, rules, issues)
+    transcode = TRANSCODE_ENABLED and bool(PLATFORM_TRANSCODE_PROFILES.get(platform))
+    for file_name in payload.get("fileList") or []:
+        _check_media(file_name, rules, issues, transcode)
+    _check_schedule(payload, rules, issues)
+    return payload, issues
+
+
+def has_errors(issues) -> bool:
+    return any(issue["level"] == LEVEL_ERROR for issue in issues)
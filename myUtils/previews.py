@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from conf import BASE_DIR, FFMPEG_PATH, PREVIEWS_ENABLED, PREVIEW_WORKERS, PREVIEW_TIMEOUT
+from utils.db import get_connection
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+
+# 预览文件和原文件放在一起：<原文件名去掉扩展名>.poster.jpg / .sprite.jpg / .360p.mp4
+POSTER_SUFFIX = ".poster.jpg"
+SPRITE_SUFFIX = ".sprite.jpg"
+PROXY_SUFFIX = ".360p.mp4"
+# 封面候选帧的位置（占时长的比例），选 JPEG 最大的一帧（细节最多，基本能避开黑场 / 纯色转场）
+POSTER_POSITIONS = (0.1, 0.3, 0.5, 0.7)
+# 雪碧图：SPRITE_COLUMNS x SPRITE_ROWS 张等间隔缩略图，每张宽 SPRITE_TILE_WIDTH
+SPRITE_COLUMNS = 5
+SPRITE_ROWS = 5
+SPRITE_TILE_WIDTH = 160
+PROXY_SHORT_SIDE = 360
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _even(value):
+    return max(2, int(round(value / 2)) * 2)
+
+
+def _run_ffmpeg(args):
+    completed = subprocess.run([FFMPEG_PATH, "-y", "-v", "error"] + args, capture_output=True, timeout=PREVIEW_TIMEOUT)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+
+
+def _extract_poster(src, dst, duration):
+    candidates = []
+    try:
+        for index, position in enumerate(POSTER_POSITIONS):
+            candidate = f"{dst}.{index}.jpg"
+            _run_ffmpeg(["-ss", f"{duration * position:.2f}", "-i", str(src), "-frames:v", "1", "-q:v", "2", candidate])
+            if os.path.exists(candidate):
+                candidates.append(candidate)
+        if not candidates:
+            raise RuntimeError("没有截到任何画面")
+        os.replace(max(candidates, key=os.path.getsize), dst)
+    finally:
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                os.remove(candidate)
+
+
+def _build_sprite(src, dst, duration):
+    frames = SPRITE_COLUMNS * SPRITE_ROWS
+    # 只解关键帧，长视频也能很快出图
+    _run_ffmpeg(["-skip_frame", "nokey", "-i", str(src),
+                 "-vf", f"fps={frames / duration:.6f},scale={SPRITE_TILE_WIDTH}:-2,tile={SPRITE_COLUMNS}x{SPRITE_ROWS}",
+                 "-frames:v", "1", "-q:v", "4", str(dst)])
+
+
+def _build_proxy(src, dst, width, height):
+    scale = min(1.0, PROXY_SHORT_SIDE / min(width, height))
+    part = f"{dst}.part.mp4"
+    try:
+        _run_ffmpeg(["-i", str(src), "-vf", f"scale={_even(width * scale)}:{_even(height * scale)}",
+                     "-c:v", "libx264", "-preset", "veryfast", "-crf", "30", "-maxrate", "800k", "-bufsize", "1600k",
+                     "-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart", part])
+        os.replace(part, dst)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+
+
+def generate_previews(src, duration, width, height) -> dict:
+    """在子进程池里执行：生成封面、雪碧图和 360p 代理视频，返回 videoFile 下的文件名。"""
+    src = Path(src)
+    stem = src.with_suffix("")
+    poster, sprite, proxy = (Path(f"{stem}{suffix}") for suffix in (POSTER_SUFFIX, SPRITE_SUFFIX, PROXY_SUFFIX))
+    try:
+        _extract_poster(src, poster, duration)
+        _build_sprite(src, sprite, duration)
+        _build_proxy(src, proxy, width, height)
+    except FileNotFoundError:
+        raise RuntimeError(f"找不到 ffmpeg（{FFMPEG_PATH}），请安装 ffmpeg 或修改 conf.py 的 FFMPEG_PATH")
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"生成预览超过 {PREVIEW_TIMEOUT} 秒")
+    return {"poster_path": poster.name, "sprite_path": sprite.name, "proxy_path": proxy.name}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=PREVIEW_WORKERS)
+        return _executor
+
+
+def save_preview_result(record_id, paths=None, error=None):
+    paths = paths or {}
+    with get_connection() as conn:
+        conn.execute('''
+        UPDATE file_records
+        SET poster_path = ?, sprite_path = ?, proxy_path = ?, preview_error = ?, previews_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        ''', (paths.get("poster_path"), paths.get("sprite_path"), paths.get("proxy_path"), error, record_id))
+
+
+def submit_previews(record, info):
+    """探测成功后调用：后台生成预览文件并写回 file_records。"""
+    if not PREVIEWS_ENABLED or not info.get("duration") or not info.get("width") or not info.get("height"):
+        return None
+    record_id = record["id"]
+    with _pending_lock:
+        if record_id in _pending:
+            return None
+        _pending.add(record_id)
+
+    def on_done(future):
+        try:
+            save_preview_result(record_id, paths=future.result())
+        except Exception as e:
+            save_preview_result(record_id, error=str(e))
+            print(f"⚠️ 素材 {record['filename']} 生成预览失败：{e}")
+        finally:
+            with _pending_lock:
+                _pending.discard(record_id)
+
+    future = _get_executor().submit(generate_previews, VIDEO_DIR / record["file_path"],
+                                    info["duration"], info["width"], info["height"])
+    future.add_done_callback(on_done)
+    return future
+
+
+def preview_pending_files():
+    """启动时补生成已探测成功、还没有预览的素材，返回提交数。"""
+    if not PREVIEWS_ENABLED:
+        return 0
+    with get_connection(sqlite3.Row) as conn:
+        rows = conn.execute('''
+        SELECT id, filename, file_path, duration, width, height FROM file_records
+        WHERE previews_at IS NULL AND probed_at IS NOT NULL AND probe_error IS NULL
+        ''').fetchall()
+    submitted = 0
+    for row in rows:
+        row = dict(row)
+        if (VIDEO_DIR / row["file_path"]).exists() and submit_previews(row, row) is not None:
+            submitted += 1
+    return submitted
+
+
+def get_poster_path(file_path):
+    """素材的自动封面（完整路径），还没生成返回 None。"""
+    with get_connection(sqlite3.Row) as conn:
+        row = conn.execute("SELECT poster_path FROM file_records WHERE file_path = ?",
+                           (Path(file_path).name,)).fetchone()
+    if row is None or not row["poster_path"] or not (VIDEO_DIR / row["poster_path"]).exists():
+        return None
+    return str(VIDEO_DIR / row["poster_path"])
@@ -0,0 +1,145 @@
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+from conf import BASE_DIR
+from utils.db import get_connection
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+
+# 中日韩字符逐字切开再交给 FTS5（unicode61 会把连续汉字当成一个词），
+# 查询时按短语匹配连续的字，相当于子串搜索，不依赖分词库
+_CJK_RE = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff])")
+_TAG_SPLIT_RE = re.compile(r"[,，、;；#\s]+")
+_COLUMNS = ("filename", "title", "tags")
+
+
+def _fts_text(text) -> str:
+    return _CJK_RE.sub(r" \1 ", text or "").strip()
+
+
+def parse_sidecar(txt_path):
+    """
+    读取素材同名 .txt：第 1 行标题，第 2 行话题（空格 / 逗号 / 顿号分隔，可带 #），
+    第 3、4 行商品链接和商品短标题（同 read_txt_payload）。返回 (title, tags)。
+    """
+    with open(txt_path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    title = lines[0] if lines else ""
+    tags = [tag for tag in _TAG_SPLIT_RE.split(lines[1]) if tag] if len(lines) > 1 else []
+    return title, tags
+
+
+def sidecar_path(file_path) -> Path:
+    return (VIDEO_DIR / file_path).with_suffix(".txt")
+
+
+def index_file(record_id, filename, title=None, tags=None):
+    """写入 / 覆盖一条素材的全文索引。"""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM file_search WHERE rowid = ?", (record_id,))
+        conn.execute("INSERT INTO file_search (rowid, filename, title, tags) VALUES (?, ?, ?, ?)",
+                     (record_id, _fts_text(filename), _fts_text(title), _fts_text(tags)))
+
+
+def remove_file(record_id):
+    with get_connection() as conn:
+        conn.execute("DELETE FROM file_search WHERE rowid = ?", (record_id,))
+
+
+def sync_file_meta(record, force=False):
+    """
+    sidecar 有变化（按 mtime 判断）时把标题 / 话题写回 file_records 并重建该条索引。
+    返回是否更新了索引。
+    """
+    txt_path = sidecar_path(record["file_path"])
+    try:
+        mtime = os.path.getmtime(txt_path)
+    except OSError:
+        mtime = None
+    if not force and mtime == record.get("meta_mtime"):
+        return False
+    if mtime is None:
+        title, tags = None, None
+    else:
+        title, tags = parse_sidecar(txt_path)
+        tags = " ".join(tags)
+    with get_connection() as conn:
+        conn.execute("UPDATE file_records SET title = ?, tags = ?, meta_mtime = ? WHERE id = ?",
+                     (title, tags, mtime, record["id"]))
+    index_file(record["id"], record["filename"], title, tags)
+    return True
+
+
+def write_sidecar(record, title, tags, product_url=None, product_title=None):
+    """改写素材的 .txt 并立即更新索引。"""
+    lines = [title or "", " ".join(f"#{tag.lstrip('#')}" for tag in tags or [])]
+    if product_url and product_title:
+        lines += [product_url, product_title]
+    with open(sidecar_path(record["file_path"]), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    sync_file_meta(record, force=True)
+
+
+def reindex_files():
+    """增量重建：补上还没进索引的素材，并同步 sidecar 有变化的素材。返回更新条数。"""
+    with get_connection(sqlite3.Row) as conn:
+        records = [dict(row) for row in conn.execute("SELECT id, filename, file_path, meta_mtime FROM file_records")]
+        indexed = {row[0] for row in conn.execute("SELECT rowid FROM file_search")}
+    updated = 0
+    for record in records:
+        if sync_file_meta(record, force=record["id"] not in indexed):
+            updated += 1
+    with get_connection() as conn:
+        # 清掉已删除素材残留的索引
+        conn.execute("DELETE FROM file_search WHERE rowid NOT IN (SELECT id FROM file_records)")
+    return updated
+
+
+def build_match_query(query) -> str:
+    """
+    把用户输入转成 FTS5 查询：空格分隔的词之间是 AND；
+    tag:美食 / title:xx / filename:xx 只在对应字段里找；每个词按短语匹配。
+    """
+    clauses = []
+    for term in query.split():
+        column = None
+        if ":" in term:
+            prefix, rest = term.split(":", 1)
+            if prefix in _COLUMNS or prefix == "tag":
+                column, term = ("tags" if prefix == "tag" else prefix), rest
+        text = _fts_text(term.lstrip("#"))
+        if not text:
+            continue
+        phrase = '"' + text.replace('"', '""') + '"'
+        clauses.append(f"{column} : {phrase}" if column else phrase)
+    return " AND ".join(clauses)
+
+
+def search_files(query="", not_posted_to=None, limit=50, offset=0):
+    """
+    全文搜索素材，按相关度排序；not_posted_to 为平台名时排除已在该平台（任一账号）发布过的素材。
+    返回 {items, total}。
+    """
+    match = build_match_query(query or "")
+    conditions, params = [], []
+    source = "file_records f"
+    order_by = "f.id DESC"
+    if match:
+        source = "file_search JOIN file_records f ON f.id = file_search.rowid"
+        conditions.append("file_search MATCH ?")
+        params.append(match)
+        order_by = "bm25(file_search)"
+    if not_posted_to:
+        conditions.append('''NOT EXISTS (
+            SELECT 1 FROM publications p
+            WHERE p.content_hash = f.content_hash AND p.platform = ? AND p.status = 'published'
+        )''')
+        params.append(not_posted_to)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection(sqlite3.Row) as conn:
+        rows = conn.execute(f"SELECT f.* FROM {source} {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                            params + [limit, offset]).fetchall()
+        total = conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+    return {"items": [dict(row) for row in rows], "total": total}
@@ -0,0 +1,275 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from conf import BASE_DIR, GC_INTERVAL, GC_GRACE_SECONDS, ORPHAN_RETENTION_DAYS, UPLOAD_SESSION_TTL, \
+    VARIANT_RETENTION_DAYS, COOKIE_RETENTION_DAYS, DISK_QUOTA_MB, DISK_MIN_FREE_MB
+from myUtils.transcode import busy_variants
+from utils.db import get_connection
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+VARIANT_DIR = VIDEO_DIR / "variants"
+COOKIE_DIR = Path(BASE_DIR / "cookiesFile")
+MB = 1024 * 1024
+
+_gc_lock = threading.Lock()
+_gc_thread = None
+
+
+class MaterialInUse(Exception):
+    """素材还被排队 / 执行中的发布任务引用，暂时不能删除文件。"""
+
+
+def _files(directory):
+    if not directory.is_dir():
+        return []
+    return [entry for entry in os.scandir(directory) if entry.is_file(follow_symlinks=False)]
+
+
+def _dir_size(directory) -> int:
+    return sum(entry.stat().st_size for entry in _files(directory))
+
+
+def _material_files(record) -> list:
+    """一条素材在 videoFile 下的全部文件：原文件、同名 .txt、封面 / 雪碧图 / 代理视频。"""
+    names = [record["file_path"], Path(record["file_path"]).with_suffix(".txt").name]
+    names += [record[column] for column in ("poster_path", "sprite_path", "proxy_path") if record[column]]
+    return [VIDEO_DIR / name for name in names]
+
+
+def _remove(path, failed=None) -> int:
+    """删除一个文件并返回释放的字节数；删不掉（如 Windows 上文件被占用）时记入 failed 并返回 0，不中断整轮清理。"""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+    except OSError as e:
+        print(f"⚠️ 删除文件失败 {path}：{e}")
+        if failed is not None:
+            failed.append(str(path))
+        return 0
+
+
+def _active_hashes(conn) -> set:
+    """排队 / 执行中的发布任务用到的素材内容哈希，这些素材的转码变体可能正在上传。"""
+    names = set()
+    for (payload,) in conn.execute("SELECT payload FROM publish_jobs WHERE status IN ('queued', 'running')"):
+        names.update(Path(name).name for name in json.loads(payload).get("fileList") or [])
+    if not names:
+        return set()
+    placeholders = ",".join("?" for _ in names)
+    return {row[0] for row in conn.execute(
+        f"SELECT content_hash FROM file_records WHERE file_path IN ({placeholders}) AND content_hash IS NOT NULL",
+        list(names))}
+
+
+def _remove_variants(conn, content_hash) -> int:
+    freed = 0
+    for row in conn.execute("SELECT file_path FROM media_variants WHERE content_hash = ?", (content_hash,)).fetchall():
+        freed += _remove(VARIANT_DIR / row["file_path"])
+    conn.execute("DELETE FROM media_variants WHERE content_hash = ?", (content_hash,))
+    return freed
+
+
+def delete_material(record) -> int:
+    """
+    删除素材记录和它在磁盘上的全部文件（含转码变体），返回释放的字节数。
+    内容去重后一份内容只有一条记录，所以文件不会被别的记录共用；发布台账按内容哈希保留，不受影响。
+    """
+    with get_connection(sqlite3.Row) as conn:
+        in_use = conn.execute('''
+        SELECT id FROM publish_jobs WHERE status IN ('queued', 'running') AND payload LIKE ?
+        ''', (f'%"{record["file_path"]}"%',)).fetchone()
+        if in_use:
+            raise MaterialInUse(f"素材正在被发布任务 {in_use['id']} 使用，请等任务结束后再删除")
+        conn.execute("DELETE FROM file_records WHERE id = ?", (record["id"],))
+        freed = _remove_variants(conn, record["content_hash"]) if record["content_hash"] else 0
+    # 单个文件删不掉时继续删其余文件，留下的文件之后会被当作无记录文件回收
+    for path in _material_files(record):
+        freed += _remove(path)
+    return freed
+
+
+def _plan(now):
+    """
+    找出可以回收的文件，返回 [(路径, 字节数, 原因)]；只列出不删除。
+    以 . 开头的临时文件（上传 / 转码 / 截图的中间文件）超过 GC_GRACE_SECONDS 即可回收；
+    其余没有记录的文件（如旧接口 /upload 直接落盘的）保留 ORPHAN_RETENTION_DAYS 天，且不动排队 / 执行中任务用到的文件。
+    """
+    candidates = []
+    with get_connection(sqlite3.Row) as conn:
+        records = conn.execute("SELECT * FROM file_records").fetchall()
+        sessions = conn.execute("SELECT id FROM upload_sessions").fetchall()
+        variants = conn.execute('''
+        SELECT v.content_hash, v.profile, v.file_path,
+               strftime('%s', 'now') - strftime('%s', COALESCE(v.last_used_at, v.created_at)) AS idle,
+               f.id IS NULL AS orphan
+        FROM media_variants v LEFT JOIN file_records f ON f.content_hash = v.content_hash
+        ''').fetchall()
+        stale_sessions = {row["id"] for row in conn.execute('''
+        SELECT id FROM upload_sessions WHERE strftime('%s', 'now') - strftime('%s', updated_at) > ?
+        ''', (UPLOAD_SESSION_TTL,))}
+        cookies = {row[0] for row in conn.execute("SELECT filePath FROM user_info")}
+        payloads = [row[0] for row in conn.execute("SELECT payload FROM publish_jobs WHERE status IN ('queued', 'running')")]
+        active = _active_hashes(conn)
+    inflight = busy_variants()
+
+    referenced = {f".{row['id']}.part" for row in sessions if row["id"] not in stale_sessions}
+    for record in records:
+        referenced.update(path.name for path in _material_files(record))
+    for payload in payloads:
+        referenced.update(Path(name).name for name in json.loads(payload).get("fileList") or [])
+    for entry in _files(VIDEO_DIR):
+        if entry.name in referenced:
+            continue
+        retention = GC_GRACE_SECONDS if entry.name.startswith(".") else ORPHAN_RETENTION_DAYS * 86400
+        if now - entry.stat().st_mtime < retention:
+            continue
+        is_stale_upload = entry.name.endswith(".part") and entry.name[1:-len(".part")] in stale_sessions
+        candidates.append((Path(entry.path), entry.stat().st_size, "stale_upload" if is_stale_upload else "orphan"))
+
+    known_variants = set()
+    for row in variants:
+        known_variants.add(row["file_path"])
+        path = VARIANT_DIR / row["file_path"]
+        if not path.exists() or row["content_hash"] in active or (row["content_hash"], row["profile"]) in inflight:
+            continue
+        if row["orphan"]:
+            candidates.append((path, path.stat().st_size, "orphan_variant"))
+        elif row["idle"] is not None and row["idle"] > VARIANT_RETENTION_DAYS * 86400:
+            candidates.append((path, path.stat().st_size, "expired_variant"))
+    for entry in _files(VARIANT_DIR):
+        if entry.name not in known_variants and now - entry.stat().st_mtime >= GC_GRACE_SECONDS:
+            candidates.append((Path(entry.path), entry.stat().st_size, "orphan"))
+
+    # 没有账号记录引用的 cookie（登录校验失败、账号已删除）保留 COOKIE_RETENTION_DAYS 天
+    for entry in _files(COOKIE_DIR):
+        if entry.name.endswith(".json") and entry.name not in cookies \
+                and now - entry.stat().st_mtime > COOKIE_RETENTION_DAYS * 86400:
+            candidates.append((Path(entry.path), entry.stat().st_size, "orphan_cookie"))
+    return candidates, stale_sessions
+
+
+def _over_quota() -> int:
+    """超出配额的字节数（videoFile 总量超过 DISK_QUOTA_MB，或磁盘剩余低于 DISK_MIN_FREE_MB）。"""
+    over = 0
+    if DISK_QUOTA_MB:
+        over = max(over, _dir_size(VIDEO_DIR) + _dir_size(VARIANT_DIR) - DISK_QUOTA_MB * MB)
+    if DISK_MIN_FREE_MB and VIDEO_DIR.exists():
+        over = max(over, DISK_MIN_FREE_MB * MB - shutil.disk_usage(VIDEO_DIR).free)
+    return over
+
+
+def _evict_variants(need, failed=None) -> int:
+    """
+    超配额时按最近使用时间从旧到新删除转码变体（需要时会重新生成），原素材不会被自动删除。
+    正在转码的变体和排队 / 执行中任务的素材对应的变体跳过。
+    """
+    freed = 0
+    inflight = busy_variants()
+    with get_connection(sqlite3.Row) as conn:
+        active = _active_hashes(conn)
+        rows = conn.execute('''
+        SELECT content_hash, profile, file_path FROM media_variants ORDER BY COALESCE(last_used_at, created_at)
+        ''').fetchall()
+        for row in rows:
+            if freed >= need:
+                break
+            if row["content_hash"] in active or (row["content_hash"], row["profile"]) in inflight:
+                continue
+            path = VARIANT_DIR / row["file_path"]
+            freed += _remove(path, failed)
+            if path.exists():
+                continue
+            conn.execute("DELETE FROM media_variants WHERE content_hash = ? AND profile = ?",
+                         (row["content_hash"], row["profile"]))
+    return freed
+
+
+def collect_garbage(dry_run=False) -> dict:
+    """
+    执行一次回收，返回 {freedBytes, removed: {原因: 个数}, failed: [删不掉的文件], overQuotaBytes}；
+    dry_run 时只统计不删除。
+    """
+    with _gc_lock:
+        candidates, stale_sessions = _plan(time.time())
+        removed, freed, failed = {}, 0, []
+        for path, size, reason in candidates:
+            if dry_run:
+                freed += size
+            else:
+                freed += _remove(path, failed)
+                if path.exists():
+                    continue
+            removed[reason] = removed.get(reason, 0) + 1
+        if not dry_run:
+            variant_files = [(path.name,) for path, _, reason in candidates
+                             if reason.endswith("_variant") and not path.exists()]
+            with get_connection() as conn:
+                conn.executemany("DELETE FROM upload_sessions WHERE id = ?", [(i,) for i in stale_sessions])
+                conn.executemany("DELETE FROM media_variants WHERE file_path = ?", variant_files)
+                conn.execute("DELETE FROM media_variants WHERE content_hash NOT IN "
+                             "(SELECT content_hash FROM file_records WHERE content_hash IS NOT NULL)")
+            over = _over_quota()
+            if over > 0:
+                evicted = _evict_variants(over, failed)
+                freed += evicted
+                over -= evicted
+                if over > 0:
+                    print(f"⚠️ 清理后仍超出磁盘配额 {over / MB:.0f}MB，请手动删除不用的素材")
+        else:
+            over = _over_quota()
+        return {"freedBytes": freed, "removed": removed, "failed": failed, "overQuotaBytes": max(over, 0)}
+
+
+def disk_report() -> dict:
+    """各类文件占用、可回收字节数和磁盘剩余空间。"""
+    with get_connection(sqlite3.Row) as conn:
+        records = conn.execute("SELECT * FROM file_records").fetchall()
+    usage = {"originals": 0, "sidecars": 0, "previews": 0}
+    for record in records:
+        paths = _material_files(record)
+        for key, path in (("originals", paths[0]), ("sidecars", paths[1])):
+            if path.exists():
+                usage[key] += path.stat().st_size
+        usage["previews"] += sum(path.stat().st_size for path in paths[2:] if path.exists())
+    usage["variants"] = _dir_size(VARIANT_DIR)
+    usage["cookies"] = _dir_size(COOKIE_DIR)
+    candidates, _ = _plan(time.time())
+    reclaimable = {}
+    for _, size, reason in candidates:
+        reclaimable[reason] = reclaimable.get(reason, 0) + size
+    disk = shutil.disk_usage(VIDEO_DIR if VIDEO_DIR.exists() else BASE_DIR)
+    return {
+        "usageBytes": usage,
+        "reclaimableBytes": reclaimable,
+        "totalReclaimableBytes": sum(reclaimable.values()),
+        "overQuotaBytes": max(_over_quota(), 0),
+        "quotaBytes": DISK_QUOTA_MB * MB if DISK_QUOTA_MB else None,
+        "disk": {"total": disk.total, "used": disk.used, "free": disk.free},
+    }
+
+
+def _gc_loop():
+    while True:
+        time.sleep(GC_INTERVAL)
+        try:
+            result = collect_garbage()
+            if result["freedBytes"]:
+                print(f"🧹 磁盘清理释放 {result['freedBytes'] / MB:.1f}MB：{result['removed']}")
+        except Exception as e:
+            print(f"⚠️ 磁盘清理失败：{e}")
+
+
+def start_gc_thread():
+    """后台定时清理，GC_INTERVAL 为 0 时不启动。"""
+    global _gc_thread
+    if GC_INTERVAL and _gc_thread is None:
+        _gc_thread = threading.Thread(target=_gc_loop, name="storage-gc", daemon=True)
+        _gc_thread.start()
@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from conf import BASE_DIR, FFMPEG_PATH, TRANSCODE_ENABLED, TRANSCODE_WORKERS, TRANSCODE_TIMEOUT, \
+    PLATFORM_TRANSCODE_PROFILES
+from myUtils.mediaProbe import get_media_info
+from utils.db import get_connection
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+VARIANT_DIR = VIDEO_DIR / "variants"
+
+# 转码档位：codec_name 为 ffprobe 里的编码名，已满足全部条件的素材直接用原文件
+#   max_short_side 分辨率短边上限；max_bitrate 码率上限（bit/s）；max_fps 帧率上限
+#   aspect 目标画幅（宽, 高），不一致时加黑边；None 表示保持原画幅
+TRANSCODE_PROFILES = {
+    "h264_1080p": {
+        "codec_name": "h264",
+        "encoder": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p"],
+        "max_short_side": 1080,
+        "max_bitrate": 8_000_000,
+        "max_fps": 60,
+        "aspect": None,
+    },
+    "h264_1080p_portrait": {
+        "codec_name": "h264",
+        "encoder": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p"],
+        "max_short_side": 1080,
+        "max_bitrate": 8_000_000,
+        "max_fps": 60,
+        "aspect": (9, 16),
+    },
+}
+AUDIO_CODECS = ("aac", None)
+
+_executor = None
+_executor_lock = threading.Lock()
+# (内容哈希, 档位) -> 正在转码的 future，同一变体同时只转一次，其他调用方等同一个结果
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class TranscodeError(Exception):
+    """ffmpeg 不可用或转码失败。"""
+
+
+def _even(value):
+    return max(2, int(round(value / 2)) * 2)
+
+
+def needs_transcode(info, profile) -> bool:
+    if info["video_codec"] != profile["codec_name"] or info["audio_codec"] not in AUDIO_CODECS:
+        return True
+    if info["bitrate"] and info["bitrate"] > profile["max_bitrate"]:
+        return True
+    if info["fps"] and info["fps"] > profile["max_fps"]:
+        return True
+    if info["width"] and info["height"]:
+        if min(info["width"], info["height"]) > profile["max_short_side"]:
+            return True
+        if profile["aspect"]:
+            aspect_w, aspect_h = profile["aspect"]
+            if abs(info["width"] / info["height"] - aspect_w / aspect_h) > 0.01:
+                return True
+    return False
+
+
+def _video_filter(info, profile) -> str:
+    width, height = info["width"], info["height"]
+    if not width or not height:
+        return "setsar=1"
+    scale = min(1.0, profile["max_short_side"] / min(width, height))
+    width, height = width * scale, height * scale
+    if not profile["aspect"]:
+        return f"scale={_even(width)}:{_even(height)},setsar=1"
+    # 加黑边补成目标画幅，画布短边同样不超过上限
+    aspect_w, aspect_h = profile["aspect"]
+    if width / height > aspect_w / aspect_h:
+        canvas_w, canvas_h = width, width * aspect_h / aspect_w
+    else:
+        canvas_w, canvas_h = height * aspect_w / aspect_h, height
+    shrink = min(1.0, profile["max_short_side"] / min(canvas_w, canvas_h))
+    return (f"scale={_even(width * shrink)}:{_even(height * shrink)},"
+            f"pad={_even(canvas_w * shrink)}:{_even(canvas_h * shrink)}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+
+
+def transcode_file(src, dst, info, profile):
+    """在子进程池里执行：把 src 按档位转码到 dst（先写临时文件，成功后再改名）。"""
+    part = f"{dst}.part.mp4"
+    args = [FFMPEG_PATH, "-y", "-v", "error", "-i", str(src), "-vf", _video_filter(info, profile)]
+    args += profile["encoder"]
+    args += ["-maxrate", str(profile["max_bitrate"]), "-bufsize", str(profile["max_bitrate"] * 2)]
+    if info["fps"] and info["fps"] > profile["max_fps"]:
+        args += ["-r", str(profile["max_fps"])]
+    args += ["-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", part]
+    try:
+        completed = subprocess.run(args, capture_output=True, timeout=TRANSCODE_TIMEOUT)
+        if completed.returncode != 0:
+            raise TranscodeError(completed.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+        os.replace(part, dst)
+    except FileNotFoundError:
+        raise TranscodeError(f"找不到 ffmpeg（{FFMPEG_PATH}），请安装 ffmpeg 或修改 conf.py 的 FFMPEG_PATH")
+    except subprocess.TimeoutExpired:
+        raise TranscodeError(f"转码超过 {TRANSCODE_TIMEOUT} 秒")
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    return os.path.getsize(dst)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=TRANSCODE_WORKERS)
+        return _executor
+
+
+def _cached_variant(content_hash, profile_name):
+    with get_connection(sqlite3.Row) as conn:
+        row = conn.execute("SELECT file_path FROM media_variants WHERE content_hash = ? AND profile = ?",
+                           (content_hash, profile_name)).fetchone()
+    if row and (VARIANT_DIR / row["file_path"]).exists():
+        with get_connection() as conn:
+            conn.execute("UPDATE media_variants SET last_used_at = CURRENT_TIMESTAMP WHERE content_hash = ? AND profile = ?",
+                         (content_hash, profile_name))
+        return VARIANT_DIR / row["file_path"]
+    return None
+
+
+def _build_variant(content_hash, profile_name, src, info):
+    key = (content_hash, profile_name)
+    dst = VARIANT_DIR / f"{content_hash[:16]}_{profile_name}.mp4"
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            VARIANT_DIR.mkdir(parents=True, exist_ok=True)
+            future = _get_executor().submit(transcode_file, src, dst, info, TRANSCODE_PROFILES[profile_name])
+            _inflight[key] = future
+    try:
+        size = future.result()
+        with get_connection() as conn:
+            conn.execute('''
+            INSERT INTO media_variants (content_hash, profile, file_path, size, last_used_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (content_hash, profile) DO UPDATE
+            SET file_path = excluded.file_path, size = excluded.size, last_used_at = excluded.last_used_at
+            ''', (content_hash, profile_name, dst.name, size))
+        return dst
+    finally:
+        with _inflight_lock:
+            if _inflight.get(key) is future:
+                _inflight.pop(key)
+
+
+def busy_variants() -> set:
+    """正在转码的 (内容哈希, 档位)，磁盘清理时不能删这些变体。"""
+    with _inflight_lock:
+        return set(_inflight)
+
+
+def get_upload_file(file_path, platform):
+    """
+    返回实际要上传到 platform 的文件：未开启转码、平台没配档位、素材已符合档位或转码失败时返回原文件，
+    否则返回（必要时先生成）按 内容哈希 + 档位 缓存的变体，多个账号 / 任务共用同一个变体。
+    会阻塞到转码完成，在事件循环里请用 asyncio.to_thread 调用。
+    """
+    profile_name = PLATFORM_TRANSCODE_PROFILES.get(platform)
+    if not TRANSCODE_ENABLED or not profile_name:
+        return file_path
+    info = get_media_info(file_path)
+    if info is None or info["probe_error"] or not needs_transcode(info, TRANSCODE_PROFILES[profile_name]):
+        return file_path
+    with get_connection(sqlite3.Row) as conn:
+        row = conn.execute("SELECT content_hash FROM file_records WHERE file_path = ?",
+                           (Path(file_path).name,)).fetchone()
+    if row is None or row["content_hash"] is None:
+        return file_path
+    content_hash = row["content_hash"]
+    variant = _cached_variant(content_hash, profile_name)
+    if variant is not None:
+        return str(variant)
+    try:
+        return str(_build_variant(content_hash, profile_name, file_path, info))
+    except Exception as e:
+        print(f"⚠️ {Path(file_path).name} 转码为 {profile_name} 失败，使用原文件上传：{e}")
+        return file_path
@@ -7,11 +7,22 @@ import uuid
 from pathlib import Path
 from queue import Queue
 from flask_cors import CORS
-from myUtils.auth import check_cookie
+from myUtils.auth import check_cookies
 from flask import Flask, request, jsonify, Response, render_template, send_from_directory
-from conf import BASE_DIR
+from werkzeug.security import safe_join
+from conf import BASE_DIR, FILE_CACHE_MAX_AGE, USE_X_SENDFILE, LISTING_MAX_LIMIT
+from utils.db import get_connection, migrate
 from myUtils.login import get_tencent_cookie, douyin_cookie_gen, get_ks_cookie, xiaohongshu_cookie_gen
-from myUtils.postVideo import post_video_tencent, post_video_DouYin, post_video_ks, post_video_xhs
+from myUtils.fileStore import save_material, lookup_content_hash, create_upload_session, get_upload_session, append_upload_chunk, \
+    complete_upload_session, UploadOffsetMismatch
+from myUtils.jobQueue import enqueue_jobs, get_jobs, get_job_worker_pool
+from myUtils.listing import list_files, list_accounts, invalidate_counts
+from myUtils.postVideo import UPLOAD_APP_BUILDERS, PLATFORM_NAMES
+from myUtils.search import search_files, write_sidecar, reindex_files, remove_file
+from myUtils.mediaProbe import probe_pending_files
+from myUtils.previews import preview_pending_files
+from myUtils.storageGc import delete_material, MaterialInUse, collect_garbage, disk_report, start_gc_thread
+from myUtils.preflight import check_payload, has_errors
 
 active_queues = {}
 app = Flask(__name__)
@@ -19,8 +30,10 @@ app = Flask(__name__)
 #允许所有来源跨域访问
 CORS(app)
 
-# 限制上传文件大小为160MB
+# 限制单次请求大小为160MB（更大的素材走 /uploadChunk 分片上传，每个分片单独受此限制）
 app.config['MAX_CONTENT_LENGTH'] = 160 * 1024 * 1024
+# 由 nginx / apache 直接发送文件（需要前端服务器配合）
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
 
 # 获取当前目录（假设 index.html 和 assets 在这里）
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -73,15 +86,22 @@ def get_file():
     if not filename:
         return {"error": "filename is required"}, 400
 
-    # 防止路径穿越攻击
-    if '..' in filename or filename.startswith('/'):
+    # 防止路径穿越攻击：safe_join 会拒绝 ..、绝对路径以及 Windows 的盘符 / UNC 路径
+    video_dir = str(BASE_DIR / "videoFile")
+    file_path = safe_join(video_dir, filename)
+    if file_path is None:
         return {"error": "Invalid filename"}, 400
-
-    # 拼接完整路径
-    file_path = str(Path(BASE_DIR / "videoFile"))
-
-    # 返回文件
-    return send_from_directory(file_path,filename)
+    if not os.path.isfile(file_path):
+        return {"error": "File not found"}, 404
+
+    # 支持 Range 拖动预览和 If-None-Match / If-Range 条件请求；
+    # 有内容哈希时用它做强 ETag 并长期缓存，没有（老数据）则退回 werkzeug 按 mtime / 大小生成的 ETag，且不长期缓存
+    content_hash = lookup_content_hash(filename)
+    response = send_from_directory(video_dir, filename, conditional=True, etag=content_hash or True,
+                                   max_age=FILE_CACHE_MAX_AGE if content_hash else None)
+    if content_hash:
+        response.cache_control.immutable = True
+    return response
 
 
 @app.route('/uploadSave', methods=['POST'])
@@ -109,32 +129,21 @@ def upload_save():
         filename = file.filename
 
     try:
-        # 生成 UUID v1
-        uuid_v1 = uuid.uuid1()
-        print(f"UUID v1: {uuid_v1}")
-
-        # 构造文件名和路径
-        final_filename = f"{uuid_v1}_{filename}"
-        filepath = Path(BASE_DIR / "videoFile" / f"{uuid_v1}_{filename}")
-
-        # 保存文件
-        file.save(filepath)
-
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                                INSERT INTO file_records (filename, filesize, file_path)
-            VALUES (?, ?, ?)
-                                ''', (filename, round(float(os.path.getsize(filepath)) / (1024 * 1024),2), final_filename))
-            conn.commit()
-            print("✅ 上传文件已记录")
+        # 边保存边计算 SHA-256，内容相同的素材直接复用已有记录
+        record, duplicate = save_material(file.stream, filename)
+        print("✅ 素材已存在，复用已有记录" if duplicate else "✅ 上传文件已记录")
 
         return jsonify({
             "code": 200,
-            "msg": "File uploaded and saved successfully",
+            "msg": "File already exists" if duplicate else "File uploaded and saved successfully",
             "data": {
-                "filename": filename,
-                "filepath": final_filename
+                "id": record['id'],
+                "filename": record['filename'],
+                "filepath": record['file_path'],
+                "contentHash": record['content_hash'],
+                "duplicate": duplicate,
+                # 内容重复时复用已有素材，本次提交的文件名不会生效，交给前端提示用户
+                "requestedFilename": filename
             }
         }), 200
 
@@ -145,12 +154,103 @@ def upload_save():
             "data": None
         }), 500
 
+@app.route('/uploadChunk/init', methods=['POST'])
+def upload_chunk_init():
+    # 创建分片上传会话，之后按 offset 逐段 append，断线后查询 offset 续传
+    data = request.get_json() or {}
+    original = data.get('filename')
+    if not original:
+        return jsonify({"code": 400, "msg": "filename is required", "data": None}), 400
+    custom_filename = data.get('customFilename')
+    filename = custom_filename + "." + original.split('.')[-1] if custom_filename else original
+    size = data.get('size')
+    if size is not None and (not isinstance(size, int) or size < 0):
+        return jsonify({"code": 400, "msg": "invalid size", "data": None}), 400
+    session = create_upload_session(filename, size)
+    return jsonify({"code": 200, "msg": None, "data": {"uploadId": session['id'], "offset": session['offset']}}), 200
+
+
+@app.route('/uploadChunk/status', methods=['GET'])
+def upload_chunk_status():
+    session = get_upload_session(request.args.get('uploadId', ''))
+    if session is None:
+        return jsonify({"code": 404, "msg": "upload session not found", "data": None}), 404
+    return jsonify({"code": 200, "msg": None,
+                    "data": {"uploadId": session['id'], "offset": session['offset'], "size": session['size']}}), 200
+
+
+@app.route('/uploadChunk/append', methods=['POST', 'PATCH'])
+def upload_chunk_append():
+    # 请求体就是原始字节，offset 通过 Upload-Offset 头或 offset 参数给出
+    upload_id = request.args.get('uploadId', '')
+    offset = request.headers.get('Upload-Offset', request.args.get('offset', ''))
+    if not offset.isdigit():
+        return jsonify({"code": 400, "msg": "offset is required", "data": None}), 400
+    try:
+        new_offset = append_upload_chunk(upload_id, int(offset), request.stream)
+    except KeyError:
+        return jsonify({"code": 404, "msg": "upload session not found", "data": None}), 404
+    except UploadOffsetMismatch as e:
+        return jsonify({"code": 409, "msg": str(e), "data": {"offset": e.offset}}), 409
+    except ValueError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+    return jsonify({"code": 200, "msg": None, "data": {"offset": new_offset}}), 200
+
+
+@app.route('/uploadChunk/complete', methods=['POST'])
+def upload_chunk_complete():
+    data = request.get_json() or {}
+    session = get_upload_session(data.get('uploadId', ''))
+    if session is None:
+        return jsonify({"code": 404, "msg": "upload session not found", "data": None}), 404
+    try:
+        record, duplicate = complete_upload_session(session['id'])
+    except KeyError:
+        return jsonify({"code": 404, "msg": "upload session not found", "data": None}), 404
+    except UploadOffsetMismatch as e:
+        return jsonify({"code": 409, "msg": "upload is incomplete", "data": {"offset": e.offset}}), 409
+    return jsonify({
+        "code": 200,
+        "msg": "File already exists" if duplicate else "File uploaded and saved successfully",
+        "data": {
+            "id": record['id'],
+            "filename": record['filename'],
+            "filepath": record['file_path'],
+            "contentHash": record['content_hash'],
+            "duplicate": duplicate,
+            "requestedFilename": session['filename']
+        }
+    }), 200
+
+def _optional_arg(name, type):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    return type(value)
+
+
 @app.route('/getFiles', methods=['GET'])
 def get_all_files():
+    # 带 limit / cursor 参数时走分页（keyset），否则保持原来一次性返回全部的行为
+    if 'limit' in request.args or 'cursor' in request.args:
+        try:
+            page = list_files(
+                keyword=request.args.get('keyword'),
+                min_size=_optional_arg('minSize', float),
+                max_size=_optional_arg('maxSize', float),
+                uploaded_from=request.args.get('uploadedFrom'),
+                uploaded_to=request.args.get('uploadedTo'),
+                sort=request.args.get('sort', 'upload_time'),
+                order=request.args.get('order', 'desc'),
+                limit=_optional_arg('limit', int) or 50,
+                cursor=request.args.get('cursor'),
+            )
+        except ValueError as e:
+            return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+        return jsonify({"code": 200, "msg": "success", "data": page}), 200
     try:
         # 使用 with 自动管理数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row  # 允许通过列名访问结果
+        with get_connection(sqlite3.Row) as conn:
             cursor = conn.cursor()
 
             # 查询所有记录
@@ -173,36 +273,102 @@ def get_all_files():
         }), 500
 
 
+@app.route('/getAccounts', methods=['GET'])
+def get_accounts():
+    # 账号分页列表，只读库里的状态，不做 cookie 校验（校验仍走 /getValidAccounts）
+    try:
+        page = list_accounts(
+            type=_optional_arg('type', int),
+            status=_optional_arg('status', int),
+            keyword=request.args.get('keyword'),
+            sort=request.args.get('sort', 'id'),
+            order=request.args.get('order', 'asc'),
+            limit=_optional_arg('limit', int) or 50,
+            cursor=request.args.get('cursor'),
+        )
+    except ValueError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+    return jsonify({"code": 200, "msg": None, "data": page}), 200
+
+
+@app.route('/searchFiles', methods=['GET'])
+def search_materials():
+    # 全文搜索文件名 / 标题 / 话题；notPostedTo=平台类型 时排除已发布到该平台的素材
+    try:
+        not_posted_to = _optional_arg('notPostedTo', int)
+        if not_posted_to is not None and not_posted_to not in PLATFORM_NAMES:
+            raise ValueError(f"invalid platform type: {not_posted_to}")
+        limit = max(1, min(_optional_arg('limit', int) or 50, LISTING_MAX_LIMIT))
+        result = search_files(
+            query=request.args.get('q', ''),
+            not_posted_to=PLATFORM_NAMES.get(not_posted_to),
+            limit=limit,
+            offset=_optional_arg('offset', int) or 0,
+        )
+    except ValueError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+    return jsonify({"code": 200, "msg": "success", "data": result}), 200
+
+
+@app.route('/updateFileMeta', methods=['POST'])
+def update_file_meta():
+    # 改写素材同名 .txt（标题 / 话题 / 商品信息）并同步搜索索引
+    data = request.get_json() or {}
+    file_id = data.get('id')
+    with get_connection(sqlite3.Row) as conn:
+        record = conn.execute("SELECT * FROM file_records WHERE id = ?", (file_id,)).fetchone()
+    if not record:
+        return jsonify({"code": 404, "msg": "File not found", "data": None}), 404
+    tags = data.get('tags') or []
+    if isinstance(tags, str):
+        tags = tags.split()
+    write_sidecar(dict(record), data.get('title'), tags, data.get('productUrl'), data.get('productTitle'))
+    return jsonify({"code": 200, "msg": "success", "data": None}), 200
+
+
+@app.route('/reindexFiles', methods=['POST'])
+def reindex_materials():
+    # 手动改过 videoFile 下的 .txt 后可调用，按修改时间增量重建
+    updated = reindex_files()
+    return jsonify({"code": 200, "msg": "success", "data": {"updated": updated}}), 200
+
+
 @app.route("/getValidAccounts",methods=['GET'])
 async def getValidAccounts():
-    with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
+    with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
         SELECT * FROM user_info''')
         rows = cursor.fetchall()
-        rows_list = [list(row) for row in rows]
-        print("\n📋 当前数据表内容：")
-        for row in rows:
-            print(row)
-        for row in rows_list:
-            flag = await check_cookie(row[1],row[2])
-            if not flag:
-                row[4] = 0
-                cursor.execute('''
-                UPDATE user_info 
-                SET status = ? 
-                WHERE id = ?
-                ''', (0,row[0]))
-                conn.commit()
-                print("✅ 用户状态已更新")
-        for row in rows:
-            print(row)
-        return jsonify(
-                        {
-                            "code": 200,
-                            "msg": None,
-                            "data": rows_list
-                        }),200
+    rows_list = [list(row) for row in rows]
+    print("\n📋 当前数据表内容：")
+    for row in rows:
+        print(row)
+    # 并发校验（有并发上限），未过期的缓存结果直接复用
+    results = await check_cookies([(row[1], row[2]) for row in rows_list])
+    changes = []
+    for row, flag in zip(rows_list, results):
+        status = 1 if flag else 0
+        if row[4] != status:
+            row[4] = status
+            changes.append((status, row[0]))
+    if changes:
+        # 所有状态变更放在同一个事务里一次写入
+        with get_connection() as conn:
+            conn.executemany('''
+            UPDATE user_info 
+            SET status = ? 
+            WHERE id = ?
+            ''', changes)
+            conn.commit()
+        invalidate_counts("user_info")
+        print(f"✅ 用户状态已更新 {len(changes)} 条")
+    return jsonify(
+                    {
+                        "code": 200,
+                        "msg": None,
+                        "data": rows_list
+                    }),200
 
 @app.route('/deleteFile', methods=['GET'])
 def delete_file():
@@ -217,8 +383,7 @@ def delete_file():
 
     try:
         # 获取数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection(sqlite3.Row) as conn:
             cursor = conn.cursor()
 
             # 查询要删除的记录
@@ -234,16 +399,21 @@ def delete_file():
 
             record = dict(record)
 
-            # 删除数据库记录
-            cursor.execute("DELETE FROM file_records WHERE id = ?", (file_id,))
-            conn.commit()
+        # 删除数据库记录，连同原文件、.txt、预览和转码变体
+        try:
+            freed = delete_material(record)
+        except MaterialInUse as e:
+            return jsonify({"code": 409, "msg": str(e), "data": None}), 409
+        invalidate_counts("file_records")
+        remove_file(record['id'])
 
         return jsonify({
             "code": 200,
             "msg": "File deleted successfully",
             "data": {
                 "id": record['id'],
-                "filename": record['filename']
+                "filename": record['filename'],
+                "freedBytes": freed
             }
         }), 200
 
@@ -254,14 +424,26 @@ def delete_file():
             "data": None
         }), 500
 
+@app.route('/diskReport', methods=['GET'])
+def get_disk_report():
+    # 各类文件占用、可回收空间（按原因分类）和磁盘剩余
+    return jsonify({"code": 200, "msg": None, "data": disk_report()}), 200
+
+
+@app.route('/runGc', methods=['POST'])
+def run_gc():
+    # 立即执行一次磁盘清理；dryRun=1 时只统计不删除
+    dry_run = request.args.get('dryRun') in ('1', 'true')
+    return jsonify({"code": 200, "msg": None, "data": collect_garbage(dry_run=dry_run)}), 200
+
+
 @app.route('/deleteAccount', methods=['GET'])
 def delete_account():
     account_id = int(request.args.get('id'))
 
     try:
         # 获取数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection(sqlite3.Row) as conn:
             cursor = conn.cursor()
 
             # 查询要删除的记录
@@ -280,6 +462,7 @@ def delete_account():
             # 删除数据库记录
             cursor.execute("DELETE FROM user_info WHERE id = ?", (account_id,))
             conn.commit()
+        invalidate_counts("user_info")
 
         return jsonify({
             "code": 200,
@@ -320,50 +503,111 @@ def login():
     response.headers['Connection'] = 'keep-alive'
     return response
 
+def _preflight(payloads):
+    """入队前按平台规则逐条检查，返回 (修正后的 payloads, 每条的问题列表, 是否全部通过)。"""
+    checked, reports = [], []
+    for payload in payloads:
+        platform = PLATFORM_NAMES.get(payload.get('type'))
+        if platform is None:
+            fixed, issues = payload, [{"level": "error", "field": "type", "msg": f"不支持的平台：{payload.get('type')}"}]
+        else:
+            fixed, issues = check_payload(payload, platform)
+        checked.append(fixed)
+        reports.append(issues)
+    return checked, reports, not any(has_errors(issues) for issues in reports)
+
+
+def _preflight_failed(reports):
+    return jsonify({"code": 400, "msg": "preflight check failed", "data": {"preflight": reports}}), 400
+
+
+@app.route('/preflight', methods=['POST'])
+def preflight():
+    # 只检查不入队，前端提交前可先调用；传单个对象或数组（同 /postVideo、/postVideoBatch）
+    data = request.get_json()
+    payloads = data if isinstance(data, list) else [data or {}]
+    checked, reports, ok = _preflight(payloads)
+    return jsonify({"code": 200, "msg": None, "data": {"ok": ok, "payloads": checked, "preflight": reports}}), 200
+
+
 @app.route('/postVideo', methods=['POST'])
 def postVideo():
     # 获取JSON数据
     data = request.get_json()
 
-    # 从JSON数据中提取fileList和accountList
-    file_list = data.get('fileList', [])
-    account_list = data.get('accountList', [])
-    type = data.get('type')
-    title = data.get('title')
-    tags = data.get('tags')
-    category = data.get('category')
-    enableTimer = data.get('enableTimer')
-    if category == 0:
-        category = None
-
-    videos_per_day = data.get('videosPerDay')
-    daily_times = data.get('dailyTimes')
-    start_days = data.get('startDays')
     # 打印获取到的数据（仅作为示例）
-    print("File List:", file_list)
-    print("Account List:", account_list)
-    match type:
-        case 1:
-            post_video_xhs(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                               start_days)
-        case 2:
-            post_video_tencent(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                               start_days)
-        case 3:
-            post_video_DouYin(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                      start_days)
-        case 4:
-            post_video_ks(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                      start_days)
+    print("File List:", data.get('fileList', []))
+    print("Account List:", data.get('accountList', []))
+    # 入队前先按平台规则检查，不合格的直接拒绝，不占用浏览器
+    checked, reports, ok = _preflight([data])
+    if not ok:
+        return _preflight_failed(reports)
+    # 只写入任务队列，由后台 worker 异步发布，接口立即返回任务 id
+    batch_id, job_ids = enqueue_jobs(checked)
     # 返回响应给客户端
     return jsonify(
         {
             "code": 200,
             "msg": None,
-            "data": None
+            "data": {
+                "batchId": batch_id,
+                "jobId": job_ids[0],
+                "preflight": reports[0]
+            }
         }), 200
 
 
+@app.route('/postVideoFanout', methods=['POST'])
+def postVideoFanout():
+    # 同一个素材分发到多个（平台, 账号），每个目标一个任务，由 worker 并发执行
+    data = request.get_json() or {}
+    file_id = data.get('fileId')
+    targets = data.get('targets') or []
+    if not file_id or not isinstance(targets, list) or not targets:
+        return jsonify({"code": 400, "msg": "fileId and targets are required", "data": None}), 400
+    for target in targets:
+        if target.get('type') not in UPLOAD_APP_BUILDERS or not target.get('account'):
+            return jsonify({"code": 400, "msg": f"invalid target: {target}", "data": None}), 400
+
+    with get_connection(sqlite3.Row) as conn:
+        record = conn.execute("SELECT * FROM file_records WHERE id = ?", (file_id,)).fetchone()
+    if not record:
+        return jsonify({"code": 404, "msg": "File not found", "data": None}), 404
+
+    common = {key: data.get(key) for key in
+              ('title', 'tags', 'category', 'enableTimer', 'videosPerDay', 'dailyTimes', 'startDays')}
+    payloads = [dict(common, type=target['type'], fileList=[record['file_path']], accountList=[target['account']])
+                for target in targets]
+    checked, reports, ok = _preflight(payloads)
+    if not ok:
+        return _preflight_failed(reports)
+    batch_id, job_ids = enqueue_jobs(checked)
+    return jsonify({
+        "code": 200,
+        "msg": None,
+        "data": {
+            "batchId": batch_id,
+            "targets": [{"type": target['type'], "account": target['account'], "jobId": job_id, "preflight": issues}
+                        for target, job_id, issues in zip(targets, job_ids, reports)]
+        }
+    }), 200
+
+
+@app.route('/getJobs', methods=['GET'])
+def getJobs():
+    # 按批次号或任务 id（逗号分隔）查询发布任务状态
+    batch_id = request.args.get('batchId')
+    ids = request.args.get('ids', '')
+    job_ids = [int(i) for i in ids.split(',') if i.strip().isdigit()]
+    if not batch_id and not job_ids:
+        return jsonify({"code": 400, "msg": "batchId or ids is required", "data": None}), 400
+    try:
+        jobs = get_jobs(job_ids=job_ids, batch_id=batch_id)
+        return jsonify({"code": 200, "msg": None, "data": jobs}), 200
+    except Exception as e:
+        return jsonify({"code": 500, "msg": str("get jobs failed!"), "data": None}), 500
+
+
 @app.route('/updateUserinfo', methods=['POST'])
 def updateUserinfo():
     # 获取JSON数据
@@ -375,8 +619,7 @@ def updateUserinfo():
     userName = data.get('userName')
     try:
         # 获取数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection(sqlite3.Row) as conn:
             cursor = conn.cursor()
 
             # 更新数据库记录
@@ -387,6 +630,7 @@ def updateUserinfo():
                            WHERE id = ?;
                            ''', (type, userName, user_id))
             conn.commit()
+        invalidate_counts("user_info")
 
         return jsonify({
             "code": 200,
@@ -408,41 +652,25 @@ def postVideoBatch():
     if not isinstance(data_list, list):
         return jsonify({"error": "Expected a JSON array"}), 400
     for data in data_list:
-        # 从JSON数据中提取fileList和accountList
-        file_list = data.get('fileList', [])
-        account_list = data.get('accountList', [])
-        type = data.get('type')
-        title = data.get('title')
-        tags = data.get('tags')
-        category = data.get('category')
-        enableTimer = data.get('enableTimer')
-        if category == 0:
-            category = None
-
-        videos_per_day = data.get('videosPerDay')
-        daily_times = data.get('dailyTimes')
-        start_days = data.get('startDays')
         # 打印获取到的数据（仅作为示例）
-        print("File List:", file_list)
-        print("Account List:", account_list)
-        match type:
-            case 1:
-                return
-            case 2:
-                post_video_tencent(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                                   start_days)
-            case 3:
-                post_video_DouYin(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                          start_days)
-            case 4:
-                post_video_ks(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                          start_days)
+        print("File List:", data.get('fileList', []))
+        print("Account List:", data.get('accountList', []))
+    # 整批先检查，有任何一条不合格就整批拒绝，避免只发出去一部分
+    checked, reports, ok = _preflight(data_list)
+    if not ok:
+        return _preflight_failed(reports)
+    # 每个元素一个任务，同一批次号，可以被多个 worker 并发处理
+    batch_id, job_ids = enqueue_jobs(checked)
     # 返回响应给客户端
     return jsonify(
         {
             "code": 200,
             "msg": None,
-            "data": None
+            "data": {
+                "batchId": batch_id,
+                "jobIds": job_ids,
+                "preflight": reports
+            }
         }), 200
 
 # 包装函数：在线程中运行异步函数
@@ -480,4 +708,16 @@ def sse_stream(status_queue):
             time.sleep(0.1)
 
 if __name__ == '__main__':
+    # 启动时先把数据库迁移到最新版本
+    migrate()
+    # 补建 / 同步素材搜索索引
+    reindex_files()
+    # 补探测还没有时长 / 编码信息的素材（后台进程池执行，不阻塞启动）
+    probe_pending_files()
+    # 补生成封面 / 雪碧图 / 代理视频
+    preview_pending_files()
+    # 后台定时清理孤儿文件、过期的上传会话 / 转码变体 / cookie
+    start_gc_thread()
+    # 启动发布任务 worker，顺带接管上次进程中断时未完成的任务
+    get_job_worker_pool()
     app.run(host='0.0.0.0' ,port=5409)
@@ -7,6 +7,11 @@ export const accountApi = {
     return http.get('/getValidAccounts')
   },
   
+  // 分页获取账号（按平台 type / 状态 status / 用户名 keyword 过滤，不做 cookie 校验）
+  getAccountsPage(params) {
+    return http.get('/getAccounts', { limit: 50, ...params })
+  },
+
   // 添加账号
   addAccount(data) {
     return http.post('/account', data)
@@ -6,6 +6,21 @@ export const materialApi = {
   getAllMaterials: () => {
     return http.get('/getFiles')
   },
+
+  // 分页获取素材（keyset 翻页，cursor 取上一页返回的 nextCursor）
+  getMaterialsPage: (params) => {
+    return http.get('/getFiles', { limit: 50, ...params })
+  },
+
+  // 全文搜索素材（文件名 / 标题 / 话题），notPostedTo 传平台类型可排除已发布到该平台的素材
+  searchMaterials: (params) => {
+    return http.get('/searchFiles', params)
+  },
+
+  // 修改素材标题 / 话题
+  updateMaterialMeta: (data) => {
+    return http.post('/updateFileMeta', data)
+  },
   
   // 上传素材
   uploadMaterial: (formData) => {
@@ -13,6 +28,38 @@ export const materialApi = {
     return http.upload('/uploadSave', formData)
   },
   
+  // 分片上传素材：断线后按服务端确认的 offset 续传，大文件不受单次请求大小限制
+  uploadMaterialChunked: async (file, customFilename, onProgress) => {
+    const chunkSize = 8 * 1024 * 1024
+    const maxRetries = 5
+    const init = await http.post('/uploadChunk/init', {
+      filename: file.name,
+      size: file.size,
+      customFilename: customFilename || undefined
+    })
+    const uploadId = init.data.uploadId
+    let offset = init.data.offset
+    let retries = 0
+    while (offset < file.size) {
+      try {
+        const res = await http.post(
+          `/uploadChunk/append?uploadId=${uploadId}`,
+          file.slice(offset, offset + chunkSize),
+          { headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) } }
+        )
+        offset = res.data.offset
+        retries = 0
+        if (onProgress) onProgress(Math.round(offset * 100 / file.size))
+      } catch (error) {
+        if (++retries > maxRetries) throw error
+        // 以服务端已确认的 offset 为准继续上传
+        const status = await http.get('/uploadChunk/status', { uploadId })
+        offset = status.data.offset
+      }
+    }
+    return http.post('/uploadChunk/complete', { uploadId })
+  },
+
   // 删除素材
   deleteMaterial: (id) => {
     return http.get(`/deleteFile?id=${id}`)
@@ -13,20 +13,30 @@ export const useAccountStore = defineStore('account', () => {
     4: '快手'
   }
   
+  // 转换后端返回的数据格式为前端使用的格式（/getValidAccounts 返回数组，/getAccounts 返回对象）
+  const toAccount = (item) => {
+    const row = Array.isArray(item)
+      ? { id: item[0], type: item[1], filePath: item[2], userName: item[3], status: item[4] }
+      : item
+    return {
+      id: row.id,
+      type: row.type,
+      filePath: row.filePath,
+      name: row.userName,
+      status: row.status === 1 ? '正常' : '异常',
+      platform: platformTypes[row.type] || '未知',
+      avatar: '/vite.svg' // 默认使用vite.svg作为头像
+    }
+  }
+  
   // 设置账号列表
   const setAccounts = (accountsData) => {
-    // 转换后端返回的数据格式为前端使用的格式
-    accounts.value = accountsData.map(item => {
-      return {
-        id: item[0],
-        type: item[1],
-        filePath: item[2],
-        name: item[3],
-        status: item[4] === 1 ? '正常' : '异常',
-        platform: platformTypes[item[1]] || '未知',
-        avatar: '/vite.svg' // 默认使用vite.svg作为头像
-      }
-    })
+    accounts.value = accountsData.map(toAccount)
+  }
+  
+  // 追加下一页账号
+  const appendAccounts = (accountsData) => {
+    accounts.value = accounts.value.concat(accountsData.map(toAccount))
   }
   
   // 添加账号
@@ -55,6 +65,7 @@ export const useAccountStore = defineStore('account', () => {
   return {
     accounts,
     setAccounts,
+    appendAccounts,
     addAccount,
     updateAccount,
     deleteAccount,
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import utils.db as db
+
+_tmpdir = tempfile.TemporaryDirectory()
+# 必须在第一次 get_connection() 之前换掉库路径，迁移和各线程的连接都落在临时库上
+db.DB_PATH = Path(_tmpdir.name) / "test.db"
+
+from myUtils import jobQueue  # noqa: E402
+from utils.upload_checkpoint import UploadStage  # noqa: E402
+
+
+class _QuotaReachedDouyinApp(object):
+    """模拟 DouYinVideo：填到商品时购物车额度已满，不发布，返回 (False, "quota_reached")。"""
+
+    def __init__(self, file_path, account_file):
+        self.file_path = file_path
+        self.account_file = account_file
+        self.thumbnail_path = None
+        self.product_url = None
+        self.product_title = None
+        self.checkpoint = None
+
+    async def main(self):
+        await self.checkpoint.amark(UploadStage.TRANSFER_COMPLETE)
+        return False, "quota_reached"
+
+
+def _douyin_builder(title, files, tags, account_files, *args, **kwargs):
+    return [_QuotaReachedDouyinApp(str(file), account) for account in account_files for file in files]
+
+
+def _publication_rows():
+    with db.get_connection() as conn:
+        return conn.execute("SELECT * FROM publications").fetchall()
+
+
+def tearDownModule():
+    _tmpdir.cleanup()
+
+
+class ExecuteJobTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patches = [
+            mock.patch.dict(jobQueue.UPLOAD_APP_BUILDERS, {3: _douyin_builder}),
+            mock.patch.object(jobQueue, "get_content_hash", return_value="hash-quota"),
+            mock.patch.object(jobQueue, "get_upload_file", side_effect=lambda file_path, platform: file_path),
+            mock.patch.object(jobQueue, "get_poster_path", return_value=None),
+            mock.patch.object(jobQueue, "get_job_worker_pool"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_douyin_quota_reached_ends_failed(self):
+        payload = {"type": 3, "title": "t", "tags": [], "fileList": ["a.mp4"], "accountList": ["acc.json"]}
+        _, (job_id,) = jobQueue.enqueue_jobs([payload], max_attempts=3)
+        job = jobQueue.claim_job("test-worker")
+        self.assertEqual(job["id"], job_id)
+
+        status, error = await jobQueue.execute_job(job, browser_pool=None)
+
+        # 上传器没有发布：任务直接失败不重试，发布台账的占位被释放
+        self.assertEqual(status, jobQueue.JOB_FAILED)
+        self.assertIn("quota_reached", error)
+        (stored,) = jobQueue.get_jobs([job_id])
+        self.assertEqual(stored["status"], jobQueue.JOB_FAILED)
+        self.assertEqual(_publication_rows(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
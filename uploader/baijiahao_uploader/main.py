@@ -8,7 +8,10 @@ import time
 import asyncio
 
 from conf import LOCAL_CHROME_PATH
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_BAIJIAHAO
+from utils.browser_pool import browser_session
+from utils.http_cookie_auth import http_cookie_auth
+from utils.rate_limiter import rate_limiter
 from utils.log import baijiahao_logger
 from utils.network import async_retry
 
@@ -36,6 +39,9 @@ async def baijiahao_cookie_gen(account_file):
 
 
 async def cookie_auth(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_BAIJIAHAO, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -63,7 +69,7 @@ async def baijiahao_setup(account_file, handle=False):
     return True
 
 class BaiJiaHaoVideo(object):
-    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, proxy_setting=None):
+    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, proxy_setting=None, browser_pool=None):
         self.title = title  # 视频标题
         self.file_path = file_path
         self.tags = tags
@@ -72,6 +78,7 @@ class BaiJiaHaoVideo(object):
         self.date_format = '%Y年%m月%d日 %H:%M'
         self.local_executable_path = LOCAL_CHROME_PATH
         self.proxy_setting = proxy_setting
+        self.browser_pool = browser_pool
 
     async def set_schedule_time(self, page, publish_date):
         """
@@ -119,7 +126,11 @@ class BaiJiaHaoVideo(object):
 
     async def upload(self, playwright: Playwright) -> None:
         # 使用 Chromium 浏览器启动一个浏览器实例
-        browser = await playwright.chromium.launch(headless=False, executable_path=self.local_executable_path, proxy=self.proxy_setting)
+        async with browser_session(playwright, self.browser_pool, headless=False,
+                                   executable_path=self.local_executable_path, proxy=self.proxy_setting) as browser:
+            return await self._upload(browser)
+
+    async def _upload(self, browser) -> None:
         # 创建一个浏览器上下文，使用指定的 cookie 文件
         context = await browser.new_context(storage_state=f"{self.account_file}", user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.4324.150 Safari/537.36')
         # context = await set_init_script(context)
@@ -181,7 +192,6 @@ class BaiJiaHaoVideo(object):
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
         # 关闭浏览器上下文和浏览器实例
         await context.close()
-        await browser.close()
 
 
     @async_retry(timeout=300)  # 例如，最多重试3次，超时时间为180秒
@@ -244,8 +254,11 @@ class BaiJiaHaoVideo(object):
         await title_container.fill(self.title[:30])
 
     async def main(self):
+        await rate_limiter.acquire(SOCIAL_MEDIA_BAIJIAHAO, self.account_file)
+        if self.browser_pool is not None:
+            return await self.upload(self.browser_pool.playwright)
         async with async_playwright() as playwright:
-            await self.upload(playwright)
+            return await self.upload(playwright)
 
 
 
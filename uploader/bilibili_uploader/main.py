@@ -3,7 +3,9 @@ import pathlib
 import random
 from biliup.plugins.bili_webup import BiliBili, Data
 
+from utils.base_social_media import SOCIAL_MEDIA_BILIBILI
 from utils.log import bilibili_logger
+from utils.rate_limiter import rate_limiter
 
 
 def extract_keys_from_json(data):
@@ -63,6 +65,7 @@ class BilibiliUploader(object):
         self.data.dtime = self.dtime
 
     def upload(self):
+        rate_limiter.acquire_sync(SOCIAL_MEDIA_BILIBILI, self.cookie_data.get('DedeUserID'))
         with BiliBili(self.data) as bili:
             bili.login_by_cookies(self.cookie_data)
             bili.access_token = self.cookie_data.get('access_token')
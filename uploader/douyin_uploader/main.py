@@ -7,7 +7,11 @@ import asyncio
 from typing import List, Tuple, Optional
 
 from conf import LOCAL_CHROME_PATH
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_DOUYIN
+from utils.browser_pool import browser_session
+from utils.http_cookie_auth import http_cookie_auth
+from utils.rate_limiter import rate_limiter
+from utils.upload_checkpoint import UploadCheckpoint, UploadStage, PublishStateUnknown
 from utils.log import douyin_logger
 
 
@@ -15,6 +19,9 @@ from utils.log import douyin_logger
 # 基础：cookie 检测 / 生成
 # ---------------------------
 async def cookie_auth(account_file: str, headless: bool = True) -> bool:
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_DOUYIN, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=headless)
         context = await browser.new_context(storage_state=account_file)
@@ -131,6 +138,7 @@ class DouYinVideo(object):
         product_title: str = None,
         txt_path: str = None,          # 新增：可传 .txt 一键覆盖
         headless: bool = False,        # 可视化/无头切换（CLI 会传）
+        browser_pool=None,             # 共享浏览器池（postVideo / 调度器会传）
     ):
         # 先用 cli 传入的
         self.title = title
@@ -144,6 +152,9 @@ class DouYinVideo(object):
         self.date_format = '%Y年%m月%d日 %H:%M'
         self.local_executable_path = LOCAL_CHROME_PATH
         self.headless = headless
+        self.browser_pool = browser_pool
+        # 上传进度断点（发布任务会替换成落库的断点，重试时据此续传）
+        self.checkpoint = UploadCheckpoint()
 
         # 若给了 .txt，覆盖字段
         t_title, t_tags, t_url, t_short = read_txt_payload(txt_path)
@@ -288,16 +299,55 @@ class DouYinVideo(object):
                 pass
             return False, "error"
 
+    async def title_on_manage_page(self, page: Page) -> bool:
+        """上次在点击发布时中断：到作品管理页看有没有同标题（填进去的前 30 字）的作品。"""
+        await page.goto("https://creator.douyin.com/creator-micro/content/manage")
+        try:
+            await page.wait_for_url("**/content/manage**", timeout=15000)
+            await page.wait_for_load_state("networkidle", timeout=15000)
+        except Exception:
+            pass
+        title = (self.title or "")[:30]
+        return bool(title) and await page.get_by_text(title, exact=False).count() > 0
+
+    async def restore_draft(self, page: Page) -> bool:
+        """
+        上次已经选过文件，抖音会保留草稿：点“继续编辑”回到发布页，不用重新传视频。
+        账号只有一份草稿，可能是别的任务留下的，所以进入后核对标题，不是本次的标题就回上传页重新传。
+        """
+        title = (self.title or "")[:30]
+        continue_btn = page.get_by_text("继续编辑", exact=True)
+        if not title:
+            return False
+        try:
+            await continue_btn.first.wait_for(state='visible', timeout=5000)
+        except Exception:
+            return False
+        await continue_btn.first.click()
+        try:
+            await page.wait_for_url("**/content/**?enter_from=publish_page", timeout=15000)
+            title_input = page.get_by_text('作品标题').locator("..").locator(
+                "xpath=following-sibling::div[1]").locator("input")
+            draft_title = await title_input.input_value(timeout=5000)
+        except Exception:
+            draft_title = None
+        if draft_title != title:
+            douyin_logger.info(f"  [-] 草稿标题「{draft_title}」不是本次作品，重新上传")
+            await page.goto("https://creator.douyin.com/creator-micro/content/upload")
+            await page.wait_for_url("**/creator-micro/content/upload", timeout=30000)
+            return False
+        douyin_logger.info("  [-] 已恢复上次未发布的草稿")
+        return True
+
     # ---------- 主上传 ----------
-    async def upload(self, playwright: Playwright) -> None:
+    async def upload(self, playwright: Playwright) -> Tuple[bool, str]:
+        """返回 (是否已发布, 原因)：published / already_published / quota_reached / add_product_error。"""
         # 启动浏览器
-        if self.local_executable_path:
-            browser = await playwright.chromium.launch(
-                headless=self.headless, executable_path=self.local_executable_path
-            )
-        else:
-            browser = await playwright.chromium.launch(headless=self.headless)
+        launch_options = {"executable_path": self.local_executable_path} if self.local_executable_path else {}
+        async with browser_session(playwright, self.browser_pool, headless=self.headless, **launch_options) as browser:
+            return await self._upload(browser)
 
+    async def _upload(self, browser) -> Tuple[bool, str]:
         # 用 cookie 创建上下文；提前给 geolocation 权限，避免弹窗挡表单
         context = await browser.new_context(storage_state=f"{self.account_file}")
         context = await set_init_script(context)
@@ -305,13 +355,28 @@ class DouYinVideo(object):
         await context.set_geolocation({"latitude": 30.2741, "longitude": 120.1551})
 
         page = await context.new_page()
+
+        # 上次点了发布但没等到结果：作品管理页没有同标题作品才重新发；
+        # 有同标题作品时分不清是不是以前发的同名作品，交给人工确认，既不重发也不当成已发布
+        if self.checkpoint.stage == UploadStage.PUBLISHING:
+            if await self.title_on_manage_page(page):
+                await context.close()
+                raise PublishStateUnknown(
+                    f"抖音 {os.path.basename(self.file_path)} 上次点击发布后中断，作品管理页已有同标题作品，请人工确认是否已发布")
+            douyin_logger.info("  [-] 上次未发布成功，重新发布")
+            await self.checkpoint.aclear()
+
         await page.goto("https://creator.douyin.com/creator-micro/content/upload")
         douyin_logger.info(f'[+]正在上传: {os.path.basename(self.file_path)}')
         douyin_logger.info('[-] 正在打开主页...')
         await page.wait_for_url("**/creator-micro/content/upload", timeout=30000)
 
-        # 上传视频
-        await page.locator("div[class^='container'] input[type='file']").first.set_input_files(self.file_path)
+        # 上传视频（重试时优先恢复草稿）
+        draft_restored = self.checkpoint.reached(UploadStage.FILE_SET) and await self.restore_draft(page)
+        await self.checkpoint.amark(UploadStage.PAGE_OPENED)
+        if not draft_restored:
+            await page.locator("div[class^='container'] input[type='file']").first.set_input_files(self.file_path)
+        await self.checkpoint.amark(UploadStage.FILE_SET)
 
         # 等两种发布页
         while True:
@@ -347,6 +412,11 @@ class DouYinVideo(object):
                 await page.keyboard.press("Enter")
 
         css_selector = ".zone-container"
+        if draft_restored:
+            # 草稿里已有上次输入的话题，清空后重填，避免重复
+            await page.click(css_selector)
+            await page.keyboard.press("Control+A")
+            await page.keyboard.press("Backspace")
         for tag in (self.tags or []):
             await page.type(css_selector, "#" + tag)
             await page.press(css_selector, "Space")
@@ -368,6 +438,7 @@ class DouYinVideo(object):
             except Exception:
                 douyin_logger.info("  [-] 正在上传视频中...")
                 await asyncio.sleep(2)
+        await self.checkpoint.amark(UploadStage.TRANSFER_COMPLETE)
 
         # 封面（可选）
         await self.set_thumbnail(page, self.thumbnail_path)
@@ -379,15 +450,13 @@ class DouYinVideo(object):
             await context.storage_state(path=self.account_file)  # 仍然保存最新 cookie
             douyin_logger.error("  [×] 因购物车额度限制，本次任务已停止并未发布。详见 add_product_error.png / full_page.html")
             await context.close()
-            await browser.close()
-            return
+            return False, "quota_reached"
         elif not added and reason == "error":
             # 异常也不发布
             await context.storage_state(path=self.account_file)
             douyin_logger.error("  [×] 添加商品出现异常，本次未发布。详见 add_product_error.png / full_page.html")
             await context.close()
-            await browser.close()
-            return
+            return False, "add_product_error"
 
         # 头条/西瓜联动开关（按需）
         third_part_element = '[class^="info"] > [class^="first-part"] div div.semi-switch'
@@ -399,12 +468,15 @@ class DouYinVideo(object):
                     await page.locator(third_part_element).locator('input.semi-switch-native-control').click()
         except Exception:
             pass
+        await self.checkpoint.amark(UploadStage.METADATA_FILLED)
 
         # 定时发布
         if self.publish_date != 0:
             await self.set_schedule_time_douyin(page, self.publish_date)
+        await self.checkpoint.amark(UploadStage.SCHEDULE_SET)
 
         # 发布
+        await self.checkpoint.amark(UploadStage.PUBLISHING)
         while True:
             try:
                 publish_button = page.get_by_role('button', name="发布", exact=True)
@@ -412,6 +484,7 @@ class DouYinVideo(object):
                     await publish_button.click()
                 await page.wait_for_url("**/content/manage**", timeout=3000)
                 douyin_logger.success("  [-] 视频发布成功")
+                await self.checkpoint.amark(UploadStage.PUBLISHED)
                 break
             except Exception:
                 douyin_logger.info("  [-] 视频正在发布中...")
@@ -422,7 +495,7 @@ class DouYinVideo(object):
         douyin_logger.success('  [-] cookie 更新完毕！')
         await asyncio.sleep(0.5)
         await context.close()
-        await browser.close()
+        return True, "published"
 
     async def set_thumbnail(self, page: Page, thumbnail_path: str):
         if thumbnail_path:
@@ -438,6 +511,12 @@ class DouYinVideo(object):
                 "div[class^='extractFooter'] button:visible:has-text('完成')"
             ).click()
 
-    async def main(self):
+    async def main(self) -> Tuple[bool, str]:
+        if self.checkpoint.reached(UploadStage.PUBLISHED):
+            douyin_logger.info(f'[+] {os.path.basename(self.file_path)} 已发布，跳过')
+            return True, "already_published"
+        await rate_limiter.acquire(SOCIAL_MEDIA_DOUYIN, self.account_file)
+        if self.browser_pool is not None:
+            return await self.upload(self.browser_pool.playwright)
         async with async_playwright() as playwright:
-            await self.upload(playwright)
+            return await self.upload(playwright)
@@ -6,12 +6,19 @@ import os
 import asyncio
 
 from conf import LOCAL_CHROME_PATH
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_KUAISHOU
+from utils.browser_pool import browser_session
+from utils.http_cookie_auth import http_cookie_auth
+from utils.rate_limiter import rate_limiter
+from utils.upload_checkpoint import UploadCheckpoint, UploadStage
 from utils.files_times import get_absolute_path
 from utils.log import kuaishou_logger
 
 
 async def cookie_auth(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_KUAISHOU, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -62,7 +69,7 @@ async def get_ks_cookie(account_file):
 
 
 class KSVideo(object):
-    def __init__(self, title, file_path, tags, publish_date: datetime, account_file):
+    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, browser_pool=None):
         self.title = title  # 视频标题
         self.file_path = file_path
         self.tags = tags
@@ -70,6 +77,8 @@ class KSVideo(object):
         self.account_file = account_file
         self.date_format = '%Y-%m-%d %H:%M'
         self.local_executable_path = LOCAL_CHROME_PATH
+        self.browser_pool = browser_pool
+        self.checkpoint = UploadCheckpoint()  # 上传进度断点
 
     async def handle_upload_error(self, page):
         kuaishou_logger.error("视频出错了，重新上传中")
@@ -78,15 +87,11 @@ class KSVideo(object):
     async def upload(self, playwright: Playwright) -> None:
         # 使用 Chromium 浏览器启动一个浏览器实例
         print(self.local_executable_path)
-        if self.local_executable_path:
-            browser = await playwright.chromium.launch(
-                headless=False,
-                executable_path=self.local_executable_path,
-            )
-        else:
-            browser = await playwright.chromium.launch(
-                headless=False
-            )  # 创建一个浏览器上下文，使用指定的 cookie 文件
+        launch_options = {"executable_path": self.local_executable_path} if self.local_executable_path else {}
+        async with browser_session(playwright, self.browser_pool, headless=False, **launch_options) as browser:
+            return await self._upload(browser)
+
+    async def _upload(self, browser) -> None:
         context = await browser.new_context(storage_state=f"{self.account_file}")
         context = await set_init_script(context)
         # 创建一个新的页面
@@ -97,6 +102,7 @@ class KSVideo(object):
         # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
         kuaishou_logger.info('正在打开主页...')
         await page.wait_for_url("https://cp.kuaishou.com/article/publish/video")
+        await self.checkpoint.amark(UploadStage.PAGE_OPENED)
         # 点击 "上传视频" 按钮
         upload_button = page.locator("button[class^='_upload-btn']")
         await upload_button.wait_for(state='visible')  # 确保按钮可见
@@ -105,6 +111,7 @@ class KSVideo(object):
             await upload_button.click()
         file_chooser = await fc_info.value
         await file_chooser.set_files(self.file_path)
+        await self.checkpoint.amark(UploadStage.FILE_SET)
 
         await asyncio.sleep(2)
 
@@ -156,12 +163,17 @@ class KSVideo(object):
 
         if retry_count == max_retries:
             kuaishou_logger.warning("超过最大重试次数，视频上传可能未完成。")
+        else:
+            await self.checkpoint.amark(UploadStage.TRANSFER_COMPLETE)
+            await self.checkpoint.amark(UploadStage.METADATA_FILLED)
 
         # 定时任务
         if self.publish_date != 0:
             await self.set_schedule_time(page, self.publish_date)
+        await self.checkpoint.amark(UploadStage.SCHEDULE_SET)
 
         # 判断视频是否发布成功
+        await self.checkpoint.amark(UploadStage.PUBLISHING)
         while True:
             try:
                 publish_button = page.get_by_text("发布", exact=True)
@@ -179,6 +191,7 @@ class KSVideo(object):
                     timeout=5000,
                 )
                 kuaishou_logger.success("视频发布成功")
+                await self.checkpoint.amark(UploadStage.PUBLISHED)
                 break
             except Exception as e:
                 kuaishou_logger.info(f"视频正在发布中... 错误: {e}")
@@ -190,11 +203,17 @@ class KSVideo(object):
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
         # 关闭浏览器上下文和浏览器实例
         await context.close()
-        await browser.close()
 
     async def main(self):
+        # 已发布直接跳过；上次点发布时中断会抛 PublishStateUnknown，避免重复发布
+        if self.checkpoint.already_published():
+            kuaishou_logger.info(f'{os.path.basename(self.file_path)} 已发布，跳过')
+            return
+        await rate_limiter.acquire(SOCIAL_MEDIA_KUAISHOU, self.account_file)
+        if self.browser_pool is not None:
+            return await self.upload(self.browser_pool.playwright)
         async with async_playwright() as playwright:
-            await self.upload(playwright)
+            return await self.upload(playwright)
 
     async def set_schedule_time(self, page, publish_date):
         kuaishou_logger.info("click schedule")
@@ -6,32 +6,19 @@ import os
 import asyncio
 
 from conf import LOCAL_CHROME_PATH
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_TENCENT, format_str_for_short_title
+from utils.browser_pool import browser_session
+from utils.http_cookie_auth import http_cookie_auth
+from utils.rate_limiter import rate_limiter
+from utils.upload_checkpoint import UploadCheckpoint, UploadStage
 from utils.files_times import get_absolute_path
 from utils.log import tencent_logger
 
 
-def format_str_for_short_title(origin_title: str) -> str:
-    # 定义允许的特殊字符
-    allowed_special_chars = "《》“”:+?%°"
-
-    # 移除不允许的特殊字符
-    filtered_chars = [char if char.isalnum() or char in allowed_special_chars else ' ' if char == ',' else '' for
-                      char in origin_title]
-    formatted_string = ''.join(filtered_chars)
-
-    # 调整字符串长度
-    if len(formatted_string) > 16:
-        # 截断字符串
-        formatted_string = formatted_string[:16]
-    elif len(formatted_string) < 6:
-        # 使用空格来填充字符串
-        formatted_string += ' ' * (6 - len(formatted_string))
-
-    return formatted_string
-
-
 async def cookie_auth(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_TENCENT, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -82,7 +69,7 @@ async def weixin_setup(account_file, handle=False):
 
 
 class TencentVideo(object):
-    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, category=None):
+    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, category=None, browser_pool=None):
         self.title = title  # 视频标题
         self.file_path = file_path
         self.tags = tags
@@ -90,6 +77,8 @@ class TencentVideo(object):
         self.account_file = account_file
         self.category = category
         self.local_executable_path = LOCAL_CHROME_PATH
+        self.browser_pool = browser_pool
+        self.checkpoint = UploadCheckpoint()  # 上传进度断点
 
     async def set_schedule_time_tencent(self, page, publish_date):
         label_element = page.locator("label").filter(has_text="定时").nth(1)
@@ -135,7 +124,11 @@ class TencentVideo(object):
 
     async def upload(self, playwright: Playwright) -> None:
         # 使用 Chromium (这里使用系统内浏览器，用chromium 会造成h264错误
-        browser = await playwright.chromium.launch(headless=False, executable_path=self.local_executable_path)
+        async with browser_session(playwright, self.browser_pool, headless=False,
+                                   executable_path=self.local_executable_path) as browser:
+            return await self._upload(browser)
+
+    async def _upload(self, browser) -> None:
         # 创建一个浏览器上下文，使用指定的 cookie 文件
         context = await browser.new_context(storage_state=f"{self.account_file}")
         context = await set_init_script(context)
@@ -147,9 +140,11 @@ class TencentVideo(object):
         tencent_logger.info(f'[+]正在上传-------{self.title}.mp4')
         # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
         await page.wait_for_url("https://channels.weixin.qq.com/platform/post/create")
+        await self.checkpoint.amark(UploadStage.PAGE_OPENED)
         # await page.wait_for_selector('input[type="file"]', timeout=10000)
         file_input = page.locator('input[type="file"]')
         await file_input.set_input_files(self.file_path)
+        await self.checkpoint.amark(UploadStage.FILE_SET)
         # 填充标题和话题
         await self.add_title_tags(page)
         # 添加商品
@@ -160,19 +155,23 @@ class TencentVideo(object):
         await self.add_original(page)
         # 检测上传状态
         await self.detect_upload_status(page)
+        await self.checkpoint.amark(UploadStage.TRANSFER_COMPLETE)
         if self.publish_date != 0:
             await self.set_schedule_time_tencent(page, self.publish_date)
         # 添加短标题
         await self.add_short_title(page)
+        await self.checkpoint.amark(UploadStage.METADATA_FILLED)
+        await self.checkpoint.amark(UploadStage.SCHEDULE_SET)
 
+        await self.checkpoint.amark(UploadStage.PUBLISHING)
         await self.click_publish(page)
+        await self.checkpoint.amark(UploadStage.PUBLISHED)
 
         await context.storage_state(path=f"{self.account_file}")  # 保存cookie
         tencent_logger.success('  [-]cookie更新完毕！')
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
         # 关闭浏览器上下文和浏览器实例
         await context.close()
-        await browser.close()
 
     async def add_short_title(self, page):
         short_title_element = page.get_by_text("短标题", exact=True).locator("..").locator(
@@ -263,5 +262,12 @@ class TencentVideo(object):
                 await page.locator('button:has-text("声明原创"):visible').click()
 
     async def main(self):
+        # 已发布直接跳过；上次点发布时中断会抛 PublishStateUnknown，避免重复发布
+        if self.checkpoint.already_published():
+            tencent_logger.info(f'[+] {os.path.basename(self.file_path)} 已发布，跳过')
+            return
+        await rate_limiter.acquire(SOCIAL_MEDIA_TENCENT, self.account_file)
+        if self.browser_pool is not None:
+            return await self.upload(self.browser_pool.playwright)
         async with async_playwright() as playwright:
-            await self.upload(playwright)
+            return await self.upload(playwright)
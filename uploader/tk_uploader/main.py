@@ -6,12 +6,18 @@ from playwright.async_api import Playwright, async_playwright
 import os
 import asyncio
 from uploader.tk_uploader.tk_config import Tk_Locator
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_TIKTOK
+from utils.browser_pool import browser_session
+from utils.http_cookie_auth import http_cookie_auth
+from utils.rate_limiter import rate_limiter
 from utils.files_times import get_absolute_path
 from utils.log import tiktok_logger
 
 
 async def cookie_auth(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_TIKTOK, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.firefox.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -69,13 +75,14 @@ async def get_tiktok_cookie(account_file):
 
 
 class TiktokVideo(object):
-    def __init__(self, title, file_path, tags, publish_date, account_file):
+    def __init__(self, title, file_path, tags, publish_date, account_file, browser_pool=None):
         self.title = title
         self.file_path = file_path
         self.tags = tags
         self.publish_date = publish_date
         self.account_file = account_file
         self.locator_base = None
+        self.browser_pool = browser_pool
 
 
     async def set_schedule_time(self, page, publish_date):
@@ -140,7 +147,10 @@ class TiktokVideo(object):
         await file_chooser.set_files(self.file_path)
 
     async def upload(self, playwright: Playwright) -> None:
-        browser = await playwright.firefox.launch(headless=False)
+        async with browser_session(playwright, self.browser_pool, browser_type="firefox", headless=False) as browser:
+            return await self._upload(browser)
+
+    async def _upload(self, browser) -> None:
         context = await browser.new_context(storage_state=f"{self.account_file}")
         context = await set_init_script(context)
         page = await context.new_page()
@@ -180,7 +190,6 @@ class TiktokVideo(object):
         await asyncio.sleep(2)  # close delay for look the video status
         # close all
         await context.close()
-        await browser.close()
 
     async def add_title_tags(self, page):
 
@@ -260,6 +269,9 @@ class TiktokVideo(object):
             self.locator_base = page.locator(Tk_Locator.default) 
 
     async def main(self):
+        await rate_limiter.acquire(SOCIAL_MEDIA_TIKTOK, self.account_file)
+        if self.browser_pool is not None:
+            return await self.upload(self.browser_pool.playwright)
         async with async_playwright() as playwright:
-            await self.upload(playwright)
+            return await self.upload(playwright)
 
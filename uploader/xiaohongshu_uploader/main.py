@@ -6,11 +6,18 @@ import os
 import asyncio
 
 from conf import LOCAL_CHROME_PATH
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, SOCIAL_MEDIA_XIAOHONGSHU
+from utils.browser_pool import browser_session
+from utils.http_cookie_auth import http_cookie_auth
+from utils.rate_limiter import rate_limiter
+from utils.upload_checkpoint import UploadCheckpoint, UploadStage
 from utils.log import xiaohongshu_logger
 
 
 async def cookie_auth(account_file):
+    fast_result = await http_cookie_auth(SOCIAL_MEDIA_XIAOHONGSHU, account_file)
+    if fast_result is not None:
+        return fast_result
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
         context = await browser.new_context(storage_state=account_file)
@@ -64,7 +71,7 @@ async def xiaohongshu_cookie_gen(account_file):
 
 
 class XiaoHongShuVideo(object):
-    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, thumbnail_path=None):
+    def __init__(self, title, file_path, tags, publish_date: datetime, account_file, thumbnail_path=None, browser_pool=None):
         self.title = title  # 视频标题
         self.file_path = file_path
         self.tags = tags
@@ -73,6 +80,8 @@ class XiaoHongShuVideo(object):
         self.date_format = '%Y年%m月%d日 %H:%M'
         self.local_executable_path = LOCAL_CHROME_PATH
         self.thumbnail_path = thumbnail_path
+        self.browser_pool = browser_pool
+        self.checkpoint = UploadCheckpoint()  # 上传进度断点
 
     async def set_schedule_time_xiaohongshu(self, page, publish_date):
         print("  [-] 正在设置定时发布时间...")
@@ -107,10 +116,11 @@ class XiaoHongShuVideo(object):
 
     async def upload(self, playwright: Playwright) -> None:
         # 使用 Chromium 浏览器启动一个浏览器实例
-        if self.local_executable_path:
-            browser = await playwright.chromium.launch(headless=False, executable_path=self.local_executable_path)
-        else:
-            browser = await playwright.chromium.launch(headless=False)
+        launch_options = {"executable_path": self.local_executable_path} if self.local_executable_path else {}
+        async with browser_session(playwright, self.browser_pool, headless=False, **launch_options) as browser:
+            return await self._upload(browser)
+
+    async def _upload(self, browser) -> None:
         # 创建一个浏览器上下文，使用指定的 cookie 文件
         context = await browser.new_context(
             viewport={"width": 1600, "height": 900},
@@ -126,8 +136,10 @@ class XiaoHongShuVideo(object):
         # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
         xiaohongshu_logger.info(f'[-] 正在打开主页...')
         await page.wait_for_url("https://creator.xiaohongshu.com/publish/publish?from=homepage&target=video")
+        await self.checkpoint.amark(UploadStage.PAGE_OPENED)
         # 点击 "上传视频" 按钮
         await page.locator("div[class^='upload-content'] input[class='upload-input']").set_input_files(self.file_path)
+        await self.checkpoint.amark(UploadStage.FILE_SET)
 
         # 等待页面跳转到指定的 URL 2025.01.08修改在原有基础上兼容两种页面
         while True:
@@ -157,6 +169,7 @@ class XiaoHongShuVideo(object):
             except Exception as e:
                 print(f"  [-] 检测过程出错: {str(e)}，重新尝试...")
                 await asyncio.sleep(0.5)  # 等待0.5秒后重新尝试
+        await self.checkpoint.amark(UploadStage.TRANSFER_COMPLETE)
 
         # 填充标题和话题
         # 检查是否存在包含输入框的元素
@@ -179,6 +192,7 @@ class XiaoHongShuVideo(object):
             await page.type(css_selector, "#" + tag)
             await page.press(css_selector, "Space")
         xiaohongshu_logger.info(f'总共添加{len(self.tags)}个话题')
+        await self.checkpoint.amark(UploadStage.METADATA_FILLED)
 
         # while True:
         #     # 判断重新上传按钮是否存在，如果不存在，代表视频正在上传，则等待
@@ -215,8 +229,10 @@ class XiaoHongShuVideo(object):
 
         if self.publish_date != 0:
             await self.set_schedule_time_xiaohongshu(page, self.publish_date)
+        await self.checkpoint.amark(UploadStage.SCHEDULE_SET)
 
         # 判断视频是否发布成功
+        await self.checkpoint.amark(UploadStage.PUBLISHING)
         while True:
             try:
                 # 等待包含"定时发布"文本的button元素出现并点击
@@ -229,6 +245,7 @@ class XiaoHongShuVideo(object):
                     timeout=3000
                 )  # 如果自动跳转到作品页面，则代表发布成功
                 xiaohongshu_logger.success("  [-]视频发布成功")
+                await self.checkpoint.amark(UploadStage.PUBLISHED)
                 break
             except:
                 xiaohongshu_logger.info("  [-] 视频正在发布中...")
@@ -240,8 +257,7 @@ class XiaoHongShuVideo(object):
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
         # 关闭浏览器上下文和浏览器实例
         await context.close()
-        await browser.close()
-    
+
     async def set_thumbnail(self, page: Page, thumbnail_path: str):
         if thumbnail_path:
             await page.click('text="选择封面"')
@@ -361,7 +377,14 @@ class XiaoHongShuVideo(object):
             return False
 
     async def main(self):
+        # 已发布直接跳过；上次点发布时中断会抛 PublishStateUnknown，避免重复发布
+        if self.checkpoint.already_published():
+            xiaohongshu_logger.info(f'[+] {os.path.basename(self.file_path)} 已发布，跳过')
+            return
+        await rate_limiter.acquire(SOCIAL_MEDIA_XIAOHONGSHU, self.account_file)
+        if self.browser_pool is not None:
+            return await self.upload(self.browser_pool.playwright)
         async with async_playwright() as playwright:
-            await self.upload(playwright)
+            return await self.upload(playwright)
 
 
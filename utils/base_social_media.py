@@ -8,6 +8,8 @@ SOCIAL_MEDIA_TENCENT = "tencent"
 SOCIAL_MEDIA_TIKTOK = "tiktok"
 SOCIAL_MEDIA_BILIBILI = "bilibili"
 SOCIAL_MEDIA_KUAISHOU = "kuaishou"
+SOCIAL_MEDIA_XIAOHONGSHU = "xiaohongshu"
+SOCIAL_MEDIA_BAIJIAHAO = "baijiahao"
 
 
 def get_supported_social_media() -> List[str]:
@@ -18,6 +20,28 @@ def get_cli_action() -> List[str]:
     return ["upload", "login", "watch"]
 
 
+def clean_str_for_short_title(origin_title: str) -> str:
+    # 视频号短标题只允许字母数字和少量特殊字符，逗号换成空格，其余字符移除
+    allowed_special_chars = "《》“”:+?%°"
+    filtered_chars = [char if char.isalnum() or char in allowed_special_chars else ' ' if char == ',' else '' for
+                      char in origin_title]
+    return ''.join(filtered_chars)
+
+
+def format_str_for_short_title(origin_title: str) -> str:
+    formatted_string = clean_str_for_short_title(origin_title)
+
+    # 调整字符串长度
+    if len(formatted_string) > 16:
+        # 截断字符串
+        formatted_string = formatted_string[:16]
+    elif len(formatted_string) < 6:
+        # 使用空格来填充字符串
+        formatted_string += ' ' * (6 - len(formatted_string))
+
+    return formatted_string
+
+
 async def set_init_script(context):
     stealth_js_path = Path(BASE_DIR / "utils/stealth.min.js")
     await context.add_init_script(path=stealth_js_path)
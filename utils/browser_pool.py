@@ -0,0 +1,220 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from conf import BROWSER_POOL_SIZE, BROWSER_IDLE_TIMEOUT
+from utils.log import logger
+
+
+class _PooledBrowser(object):
+    def __init__(self, key, browser):
+        self.key = key
+        self.browser = browser
+        self.leased = False
+        self.last_used = time.monotonic()
+
+
+class BrowserPool(object):
+    """
+    长驻的 Playwright 浏览器池。
+
+    上传器通过 acquire/release（或 lease）借用浏览器，用完只关闭自己的 context，
+    浏览器进程留在池里给下一个任务复用。按启动参数（浏览器类型、headless、
+    executable_path、proxy）分组，size 限制同时存在的浏览器进程数，
+    空闲超过 idle_timeout 秒的浏览器会被回收，借出前会检查进程是否仍然存活。
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, idle_timeout: float = BROWSER_IDLE_TIMEOUT):
+        if size <= 0:
+            raise ValueError("size should be a positive integer")
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.playwright = None
+        self._playwright_cm = None
+        self._entries = []
+        self._condition = None
+        self._reaper_task = None
+
+    async def start(self):
+        if self.playwright is None:
+            self._playwright_cm = async_playwright()
+            self.playwright = await self._playwright_cm.start()
+            self._condition = asyncio.Condition()
+            self._reaper_task = asyncio.create_task(self._reap_idle())
+        return self
+
+    async def close(self):
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for entry in self._entries:
+            await self._close_browser(entry.browser)
+        self._entries = []
+        if self._playwright_cm:
+            await self._playwright_cm.__aexit__(None, None, None)
+        self.playwright = None
+        self._playwright_cm = None
+
+    @staticmethod
+    def _make_key(browser_type, options):
+        return browser_type, tuple(sorted((k, repr(v)) for k, v in options.items()))
+
+    @staticmethod
+    def _is_healthy(browser) -> bool:
+        try:
+            return browser.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    async def _close_browser(browser):
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def acquire(self, browser_type: str = "chromium", **launch_options):
+        await self.start()
+        key = self._make_key(browser_type, launch_options)
+        async with self._condition:
+            while True:
+                # 先剔除已经断开的浏览器
+                for entry in [e for e in self._entries if not e.leased and not self._is_healthy(e.browser)]:
+                    self._entries.remove(entry)
+                    logger.warning("[browser_pool] 浏览器已断开，移出池")
+                    await self._close_browser(entry.browser)
+
+                for entry in self._entries:
+                    if not entry.leased and entry.key == key:
+                        entry.leased = True
+                        return entry.browser
+
+                if len(self._entries) >= self.size:
+                    # 池满时优先淘汰一个空闲但参数不匹配的浏览器
+                    idle = [e for e in self._entries if not e.leased]
+                    if not idle:
+                        await self._condition.wait()
+                        continue
+                    victim = min(idle, key=lambda e: e.last_used)
+                    self._entries.remove(victim)
+                    await self._close_browser(victim.browser)
+
+                launcher = getattr(self.playwright, browser_type)
+                browser = await launcher.launch(**launch_options)
+                entry = _PooledBrowser(key, browser)
+                entry.leased = True
+                self._entries.append(entry)
+                logger.info(f"[browser_pool] 启动新浏览器 {browser_type}，当前 {len(self._entries)}/{self.size}")
+                return browser
+
+    async def release(self, browser):
+        async with self._condition:
+            for entry in self._entries:
+                if entry.browser is browser:
+                    entry.leased = False
+                    entry.last_used = time.monotonic()
+                    # 归还时顺便清掉遗留的 context，避免不同账号的会话串在一起
+                    if self._is_healthy(browser):
+                        for context in list(browser.contexts):
+                            try:
+                                await context.close()
+                            except Exception:
+                                pass
+                    break
+            else:
+                await self._close_browser(browser)
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def lease(self, browser_type: str = "chromium", **launch_options):
+        browser = await self.acquire(browser_type, **launch_options)
+        try:
+            yield browser
+        finally:
+            await self.release(browser)
+
+    async def _reap_idle(self):
+        interval = max(1.0, min(self.idle_timeout / 2, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            async with self._condition:
+                now = time.monotonic()
+                expired = [e for e in self._entries
+                           if not e.leased and now - e.last_used > self.idle_timeout]
+                for entry in expired:
+                    self._entries.remove(entry)
+                    await self._close_browser(entry.browser)
+                if expired:
+                    logger.info(f"[browser_pool] 回收 {len(expired)} 个空闲浏览器")
+                    self._condition.notify_all()
+
+
+class BrowserPoolService(object):
+    """
+    在独立线程里运行一个长驻事件循环和 BrowserPool，
+    同步代码（Flask 请求线程、postVideo）通过 run() 把协程提交进来执行。
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, idle_timeout: float = BROWSER_IDLE_TIMEOUT):
+        self.pool = BrowserPool(size, idle_timeout)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="browser-pool", daemon=True)
+        self._thread.start()
+        self.run(self.pool.start())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        """
+        阻塞等待协程完成；超过 timeout 秒时取消协程（上传器的 finally 会归还浏览器）并抛出 concurrent.futures.TimeoutError。
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        self.run(self.pool.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_browser_pool_service() -> BrowserPoolService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BrowserPoolService()
+        return _service
+
+
+@asynccontextmanager
+async def browser_session(playwright, browser_pool=None, browser_type: str = "chromium", **launch_options):
+    """
+    上传器统一的浏览器获取入口：有池就从池里借、退出时归还，没有池就按原来的方式直接启动、退出时关闭。
+    上传出异常（如 cookie 失效导致页面超时）时也会归还，否则浏览器在池里一直是借出状态，池满后 acquire 会永远等待；
+    归还 / 关闭浏览器时会一并关闭还开着的 context。
+    """
+    if browser_pool is not None:
+        async with browser_pool.lease(browser_type, **launch_options) as browser:
+            yield browser
+        return
+    browser = await getattr(playwright, browser_type).launch(**launch_options)
+    try:
+        yield browser
+    finally:
+        await browser.close()
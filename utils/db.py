@@ -0,0 +1,281 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+from conf import BASE_DIR, DB_BUSY_TIMEOUT, DB_CACHED_STATEMENTS
+
+DB_PATH = Path(BASE_DIR / "db" / "database.db")
+
+# 每个线程复用一个连接（sqlite3 连接不能跨线程使用）
+_local = threading.local()
+_migrate_lock = threading.Lock()
+_migrated = False
+
+
+def _open_connection() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT, cached_statements=DB_CACHED_STATEMENTS)
+    # WAL：读写互不阻塞，多个 worker / 请求同时写时排队而不是直接报 database is locked
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT * 1000)}")
+    return conn
+
+
+class _ConnectionView(object):
+    """
+    线程共用连接的一个“视图”：row_factory 只设在它创建的游标上，不改共用连接本身，
+    嵌套调用的 helper 换了 row_factory 也不会影响外层还在读的结果。
+    """
+
+    def __init__(self, conn, row_factory):
+        self._conn = conn
+        self._row_factory = row_factory
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        cursor.row_factory = self._row_factory
+        return cursor
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+    def __getattr__(self, name):
+        # commit / rollback / total_changes 等直接用共用连接的
+        return getattr(self._conn, name)
+
+
+def get_connection(row_factory=None):
+    """
+    返回当前线程的数据库连接，第一次调用时顺带执行未应用的迁移。
+    用法同 sqlite3.connect：with get_connection() as conn: ...（退出时提交，异常时回滚，不关闭连接）。
+    row_factory 只对这次拿到的连接（游标）生效。
+    """
+    if not _migrated:
+        migrate()
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _open_connection()
+    return _ConnectionView(conn, row_factory)
+
+
+# ---------------------------
+# 版本化迁移：MIGRATIONS[i] 把库从版本 i 升到 i + 1，当前版本记在 PRAGMA user_version。
+# 之前由各模块按需建的表都用 IF NOT EXISTS / 列检查，老库也能直接升级。
+# ---------------------------
+def _create_base_tables(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_info (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type INTEGER NOT NULL,
+        filePath TEXT NOT NULL,  -- 存储文件路径
+        userName TEXT NOT NULL,
+        status INTEGER DEFAULT 0
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS file_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, -- 唯一标识每条记录
+        filename TEXT NOT NULL,               -- 文件名
+        filesize REAL,                        -- 文件大小（单位：MB）
+        upload_time DATETIME DEFAULT CURRENT_TIMESTAMP, -- 上传时间，默认当前时间
+        file_path TEXT                        -- 文件路径
+    )
+    ''')
+
+
+def _add_listing_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_info_type_status ON user_info (type, status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_upload_time ON file_records (upload_time)')
+
+
+def _create_publish_jobs(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS publish_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        batch_id TEXT,                          -- 同一次请求提交的任务共用一个批次号
+        type INTEGER NOT NULL,                  -- 平台标识 1 小红书 2 视频号 3 抖音 4 快手
+        payload TEXT NOT NULL,                  -- /postVideo 请求体（JSON）
+        status TEXT NOT NULL DEFAULT 'queued',  -- queued / running / success / failed
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 1,
+        error TEXT,
+        worker TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        started_at DATETIME,
+        finished_at DATETIME
+    )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_publish_jobs_status ON publish_jobs (status, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_publish_jobs_batch ON publish_jobs (batch_id)')
+
+
+def _create_upload_checkpoints(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS upload_checkpoints (
+        run_id TEXT NOT NULL,                   -- 同一个发布任务的多次重试共用一个 run_id（如任务 id）
+        platform TEXT NOT NULL,
+        account_file TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        stage INTEGER NOT NULL DEFAULT 0,       -- 见 utils.upload_checkpoint.UploadStage
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, platform, account_file, file_path)
+    )
+    ''')
+
+
+def _add_content_hash(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(file_records)")]
+    if 'content_hash' not in columns:
+        conn.execute("ALTER TABLE file_records ADD COLUMN content_hash TEXT")  # 文件内容 SHA-256，用于去重
+    # 旧记录的 content_hash 为 NULL，不受唯一约束影响
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_file_records_hash ON file_records (content_hash)')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS publications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT NOT NULL,              -- 素材内容 SHA-256
+        platform TEXT NOT NULL,
+        account TEXT NOT NULL,                   -- cookie 文件名
+        job_id INTEGER,                          -- 认领这次发布的任务
+        status TEXT NOT NULL,                    -- publishing / published
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (content_hash, platform, account)
+    )
+    ''')
+
+
+def _create_upload_sessions(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS upload_sessions (
+        id TEXT PRIMARY KEY,                     -- 分片上传会话 id
+        filename TEXT NOT NULL,
+        size INTEGER,                            -- 客户端声明的总大小，可为空
+        offset INTEGER NOT NULL DEFAULT 0,       -- 已落盘并确认的字节数
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _add_sort_indexes(conn):
+    # 素材列表按大小 / 文件名排序翻页（索引隐含 rowid，正好覆盖（排序列, id）的 keyset 条件）
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_filesize ON file_records (filesize)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_filename ON file_records (filename)')
+
+
+def _create_file_search(conn):
+    # 素材的标题 / 话题来自同名 .txt（sidecar），meta_mtime 记录上次同步时 sidecar 的修改时间
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(file_records)")]
+    for column, definition in (("title", "TEXT"), ("tags", "TEXT"), ("meta_mtime", "REAL")):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE file_records ADD COLUMN {column} {definition}")
+    # 全文索引，rowid 即 file_records.id；内容由 myUtils/search.py 预处理后写入，已有素材在启动时补建
+    conn.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS file_search USING fts5(
+        filename, title, tags, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    ''')
+
+
+def _add_media_probe(conn):
+    # ffprobe 探测结果，见 myUtils/mediaProbe.py；probed_at 为空表示还没探测
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(file_records)")]
+    for column, definition in (
+            ("duration", "REAL"),          # 时长（秒）
+            ("width", "INTEGER"),
+            ("height", "INTEGER"),
+            ("video_codec", "TEXT"),
+            ("audio_codec", "TEXT"),
+            ("bitrate", "INTEGER"),        # 总码率（bit/s）
+            ("fps", "REAL"),
+            ("probe_error", "TEXT"),       # 探测失败原因（非视频文件、ffprobe 不可用等）
+            ("probed_at", "DATETIME"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE file_records ADD COLUMN {column} {definition}")
+
+
+def _create_media_variants(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS media_variants (
+        content_hash TEXT NOT NULL,              -- 原素材内容 SHA-256
+        profile TEXT NOT NULL,                   -- 转码档位，见 myUtils/transcode.py
+        file_path TEXT NOT NULL,                 -- videoFile/variants 下的文件名
+        size INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (content_hash, profile)
+    )
+    ''')
+
+
+def _add_preview_paths(conn):
+    # 封面 / 雪碧图 / 360p 代理视频，见 myUtils/previews.py；都是 videoFile 下的文件名
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(file_records)")]
+    for column, definition in (
+            ("poster_path", "TEXT"),
+            ("sprite_path", "TEXT"),
+            ("proxy_path", "TEXT"),
+            ("preview_error", "TEXT"),
+            ("previews_at", "DATETIME"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE file_records ADD COLUMN {column} {definition}")
+
+
+def _add_variant_last_used(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(media_variants)")]
+    if 'last_used_at' not in columns:
+        # 磁盘清理按最近使用时间淘汰变体
+        conn.execute("ALTER TABLE media_variants ADD COLUMN last_used_at DATETIME")
+
+
+MIGRATIONS = [
+    _create_base_tables,
+    _add_listing_indexes,
+    _create_publish_jobs,
+    _create_upload_checkpoints,
+    _add_content_hash,
+    _create_upload_sessions,
+    _add_sort_indexes,
+    _create_file_search,
+    _add_media_probe,
+    _create_media_variants,
+    _add_preview_paths,
+    _add_variant_last_used,
+]
+
+
+def migrate():
+    """把数据库升级到最新版本，进程内只执行一次；多进程同时启动时靠 BEGIN IMMEDIATE 串行。"""
+    global _migrated
+    with _migrate_lock:
+        if _migrated:
+            return
+        conn = _open_connection()
+        try:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for index in range(version, len(MIGRATIONS)):
+                MIGRATIONS[index](conn)
+            if version < len(MIGRATIONS):
+                conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+                print(f"✅ 数据库已从版本 {version} 升级到 {len(MIGRATIONS)}")
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        _migrated = True
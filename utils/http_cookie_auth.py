@@ -0,0 +1,163 @@
+import json
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from conf import COOKIE_HTTP_PROBE
+from utils.base_social_media import SOCIAL_MEDIA_DOUYIN, SOCIAL_MEDIA_TENCENT, SOCIAL_MEDIA_TIKTOK, \
+    SOCIAL_MEDIA_KUAISHOU, SOCIAL_MEDIA_XIAOHONGSHU, SOCIAL_MEDIA_BAIJIAHAO
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) " \
+             "Chrome/127.0.0.0 Safari/537.36"
+LOGIN_MARKERS = ("login", "passport", "sso")
+
+
+def _judge_douyin(data):
+    if data.get("status_code") == 0 and data.get("user"):
+        return True
+    if data.get("status_code") in (8, 2190008):
+        return False
+    return None
+
+
+def _judge_tencent(data):
+    if data.get("errCode") == 0:
+        return True
+    if data.get("errCode") in (300333, 300334):
+        return False
+    return None
+
+
+def _judge_xiaohongshu(data):
+    if data.get("success") is True and data.get("data"):
+        return True
+    if data.get("code") in (-100, -101):
+        return False
+    return None
+
+
+def _judge_tiktok(data):
+    if data.get("message") == "success" and data.get("data", {}).get("user_id"):
+        return True
+    if data.get("message") == "error" and data.get("data", {}).get("name") == "session_expired":
+        return False
+    return None
+
+
+def _judge_baijiahao(data):
+    if data.get("errno") == 0 and data.get("data"):
+        return True
+    if data.get("errno") in (110, 20040001):
+        return False
+    return None
+
+
+# 每个平台一个已登录才能访问的接口：302 到登录页 / 401 直接判失效，
+# JSON 业务码按 judge 判断，其余情况（页面改版、风控等）返回 None 交给浏览器兜底
+PLATFORM_PROBES = {
+    SOCIAL_MEDIA_DOUYIN: {
+        "method": "GET",
+        "url": "https://creator.douyin.com/web/api/media/user/info/",
+        "judge": _judge_douyin,
+    },
+    SOCIAL_MEDIA_TENCENT: {
+        "method": "POST",
+        "url": "https://channels.weixin.qq.com/cgi-bin/mmfinderassistant-bin/auth/auth_data",
+        "judge": _judge_tencent,
+    },
+    SOCIAL_MEDIA_KUAISHOU: {
+        "method": "GET",
+        "url": "https://cp.kuaishou.com/article/publish/video",
+        "judge": None,
+    },
+    SOCIAL_MEDIA_XIAOHONGSHU: {
+        "method": "GET",
+        "url": "https://creator.xiaohongshu.com/api/galaxy/user/info",
+        "judge": _judge_xiaohongshu,
+    },
+    SOCIAL_MEDIA_TIKTOK: {
+        "method": "GET",
+        "url": "https://www.tiktok.com/passport/web/account/info/",
+        "judge": _judge_tiktok,
+    },
+    SOCIAL_MEDIA_BAIJIAHAO: {
+        "method": "GET",
+        "url": "https://baijiahao.baidu.com/builder/app/appinfo",
+        "judge": _judge_baijiahao,
+    },
+}
+
+def _new_client() -> httpx.AsyncClient:
+    # client 绑定创建它的事件循环，而 Flask 异步视图每个请求一个新循环，
+    # 所以每次校验用完即关（async with），不跨循环缓存，避免泄漏连接池
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(8.0),
+        follow_redirects=False,
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+def load_storage_state_cookies(account_file) -> list:
+    """读取 Playwright storage_state 文件里的 cookies，丢弃已过期的。"""
+    with open(account_file, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    now = time.time()
+    # expires 为 -1 表示会话 cookie
+    return [c for c in state.get("cookies", [])
+            if c.get("expires") is None or c["expires"] <= 0 or c["expires"] > now]
+
+
+def build_cookie_header(cookies: list, url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    pairs = []
+    for cookie in cookies:
+        domain = (cookie.get("domain") or "").lstrip(".")
+        if domain and (host == domain or host.endswith("." + domain)):
+            pairs.append(f"{cookie['name']}={cookie['value']}")
+    return "; ".join(pairs)
+
+
+async def http_cookie_auth(platform: str, account_file):
+    """
+    不启动浏览器的 cookie 快速校验。
+    返回 True / False 表示结论明确，返回 None 表示无法判断，调用方应回退到浏览器校验。
+    """
+    probe = PLATFORM_PROBES.get(platform)
+    if not COOKIE_HTTP_PROBE or probe is None:
+        return None
+    try:
+        cookies = load_storage_state_cookies(account_file)
+    except (OSError, ValueError):
+        return None
+    cookie_header = build_cookie_header(cookies, probe["url"])
+    if not cookie_header:
+        return False
+
+    headers = {"Cookie": cookie_header}
+    try:
+        async with _new_client() as client:
+            if probe["method"] == "POST":
+                r = await client.post(probe["url"], headers=headers, json={})
+            else:
+                r = await client.get(probe["url"], headers=headers)
+    except httpx.HTTPError:
+        return None
+
+    if r.is_redirect:
+        location = r.headers.get("location", "").lower()
+        if any(marker in location for marker in LOGIN_MARKERS):
+            return False
+        return None
+    # 403 多半是风控而不是登录失效，交给浏览器判断
+    if r.status_code == 401:
+        return False
+    if r.status_code != 200 or probe["judge"] is None:
+        return None
+    try:
+        data = r.json()
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return probe["judge"](data)
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+from conf import PUBLISH_RATE_LIMITS, ACCOUNT_RATE_LIMIT
+from utils.log import logger
+
+
+class TokenBucket(object):
+    """
+    令牌桶：每分钟补充 rate_per_minute 个令牌，最多攒 burst 个。
+    reserve() 立即扣一个令牌并返回需要等待的秒数（令牌可以透支，透支部分按速率排队），
+    所以同一个桶可以同时被多个线程 / 事件循环使用。
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        if rate_per_minute <= 0 or burst <= 0:
+            raise ValueError("rate_per_minute and burst should be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter(object):
+    """
+    发布限速：每个平台一个桶，每个（平台, 账号）一个桶，发布前两个都要拿到令牌。
+    不同账号互不影响，可以并行；同一账号按 ACCOUNT_RATE_LIMIT 的速率排队。
+    """
+
+    def __init__(self, platform_limits=None, account_limit=None):
+        self.platform_limits = platform_limits if platform_limits is not None else PUBLISH_RATE_LIMITS
+        self.account_limit = account_limit if account_limit is not None else ACCOUNT_RATE_LIMIT
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key, limit):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*limit)
+                self._buckets[key] = bucket
+            return bucket
+
+    def reserve(self, platform: str, account=None) -> float:
+        waits = [0.0]
+        limit = self.platform_limits.get(platform)
+        if limit:
+            waits.append(self._bucket((platform,), limit).reserve())
+        if account is not None and self.account_limit:
+            waits.append(self._bucket((platform, str(account)), self.account_limit).reserve())
+        return max(waits)
+
+    async def acquire(self, platform: str, account=None):
+        wait = self.reserve(platform, account)
+        if wait > 0:
+            logger.info(f"[rate_limit] {platform} 发布限速，等待 {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, platform: str, account=None):
+        wait = self.reserve(platform, account)
+        if wait > 0:
+            logger.info(f"[rate_limit] {platform} 发布限速，等待 {wait:.1f}s")
+            time.sleep(wait)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,101 @@
+import asyncio
+import enum
+from pathlib import Path
+
+from utils.db import get_connection
+
+
+class UploadStage(enum.IntEnum):
+    """上传流程的各个阶段，数值越大进度越靠后。"""
+    NONE = 0
+    PAGE_OPENED = 1        # 打开发布页
+    FILE_SET = 2           # 已选择视频文件
+    TRANSFER_COMPLETE = 3  # 视频传输完成
+    METADATA_FILLED = 4    # 标题 / 话题 / 封面等已填写
+    SCHEDULE_SET = 5       # 定时发布已设置
+    PUBLISHING = 6         # 已开始点击发布，结果未确认
+    PUBLISHED = 7          # 发布成功
+
+
+class PublishStateUnknown(Exception):
+    """上一次尝试在点击发布时中断，无法确认是否已经发布，为避免重复发布不再自动重试。"""
+
+
+class UploadCheckpoint(object):
+    """
+    记录一次上传（run_id + 平台 + 账号 + 文件）走到了哪个阶段。
+    run_id 为空时只在内存里记录，不落库（单独运行 examples / cli 时的默认行为）；
+    发布任务重试时传入同一个 run_id，就能知道上一次尝试进行到哪一步。
+    """
+
+    def __init__(self, run_id=None, platform="", account_file="", file_path=""):
+        self.run_id = None if run_id is None else str(run_id)
+        self.platform = platform
+        self.account_file = str(account_file)
+        self.file_path = str(file_path)
+        self.stage = UploadStage.NONE
+        if self.run_id is not None:
+            self.stage = self._load()
+
+    def _connect(self):
+        return get_connection()
+
+    def _key(self):
+        return self.run_id, self.platform, self.account_file, self.file_path
+
+    def _load(self) -> UploadStage:
+        with self._connect() as conn:
+            row = conn.execute('''
+            SELECT stage FROM upload_checkpoints
+            WHERE run_id = ? AND platform = ? AND account_file = ? AND file_path = ?
+            ''', self._key()).fetchone()
+        return UploadStage(row[0]) if row else UploadStage.NONE
+
+    def reached(self, stage: UploadStage) -> bool:
+        return self.stage >= stage
+
+    def mark(self, stage: UploadStage):
+        # 阶段只前进不后退；PUBLISHING 之后允许回写 PUBLISHED
+        if stage <= self.stage:
+            return
+        self.stage = stage
+        if self.run_id is None:
+            return
+        with self._connect() as conn:
+            conn.execute('''
+            INSERT INTO upload_checkpoints (run_id, platform, account_file, file_path, stage)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (run_id, platform, account_file, file_path)
+            DO UPDATE SET stage = excluded.stage, updated_at = CURRENT_TIMESTAMP
+            ''', self._key() + (int(stage),))
+            conn.commit()
+
+    def clear(self):
+        """核实上次发布并未成功后，清掉进度从头再来。"""
+        self.stage = UploadStage.NONE
+        if self.run_id is not None:
+            with self._connect() as conn:
+                conn.execute('''
+                DELETE FROM upload_checkpoints
+                WHERE run_id = ? AND platform = ? AND account_file = ? AND file_path = ?
+                ''', self._key())
+                conn.commit()
+
+    async def amark(self, stage: UploadStage):
+        """上传器（事件循环里）用这个：落库放到线程里执行，等 sqlite 写锁时不会卡住同一循环里的其他上传。"""
+        await asyncio.to_thread(self.mark, stage)
+
+    async def aclear(self):
+        await asyncio.to_thread(self.clear)
+
+    def already_published(self) -> bool:
+        """
+        重试前调用：已发布返回 True（直接跳过）；
+        上次在点击发布时中断则抛出 PublishStateUnknown，由调用方决定核实或人工处理。
+        """
+        if self.stage >= UploadStage.PUBLISHED:
+            return True
+        if self.stage == UploadStage.PUBLISHING:
+            raise PublishStateUnknown(
+                f"{self.platform} {Path(self.file_path).name} 上次点击发布后中断，请到平台确认是否已发布")
+        return False